@@ -5,8 +5,25 @@ import numpy as np
 import plotly.express as px
 import re
 import json
+import hashlib
+import functools
+import html
 import requests
-import io
+import time
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+import data_source
+import image_cache
+from category_engine import KeywordClassifier, map_unique
+from csv_reader import CATEGORICAL_COLUMNS, CLEANED_SCHEMA, FLOAT32_COLUMNS, TEXT_COLUMNS, read_csv
+
+# orjson decodes the JSON-encoded brand/name cells several times faster when installed
+try:
+    import orjson
+    json_loads = orjson.loads
+except ImportError:
+    json_loads = json.loads
 
 # =====================
 # Data Cleaning Helpers
@@ -172,33 +189,18 @@ SPECIFIC_CATEGORY_MAP = {
     'accessories': 'Accessories',
 }
 
+# Category maps compiled once; the first key in dict order found in the text wins
+MAIN_CATEGORY_CLASSIFIER = KeywordClassifier(MAIN_CATEGORY_MAP)
+SPECIFIC_CATEGORY_CLASSIFIER = KeywordClassifier(SPECIFIC_CATEGORY_MAP)
+
+# discovery_input values too generic to say anything about the category
+GENERIC_DISCOVERY_INPUTS = ['womens-clothing-underwear', 'womens clothing underwear', 'lingerie', 'underwear']
+
 def extract_main_category(text):
-    if not isinstance(text, str):
-        return None
-    text_lc = text.lower()
-    # Try to extract from discovery_input first
-    for k, v in MAIN_CATEGORY_MAP.items():
-        if k in text_lc:
-            return v
-    # Try again without hyphens
-    text_lc_nohyphen = text_lc.replace('-', ' ')
-    for k, v in MAIN_CATEGORY_MAP.items():
-        if k in text_lc_nohyphen:
-            return v
-    return None
+    return MAIN_CATEGORY_CLASSIFIER.classify(text)
 
 def extract_specific_category(text):
-    if not isinstance(text, str):
-        return None
-    text_lc = text.lower()
-    for k, v in SPECIFIC_CATEGORY_MAP.items():
-        if k in text_lc:
-            return v
-    text_lc_nohyphen = text_lc.replace('-', ' ')
-    for k, v in SPECIFIC_CATEGORY_MAP.items():
-        if k in text_lc_nohyphen:
-            return v
-    return None
+    return SPECIFIC_CATEGORY_CLASSIFIER.classify(text)
 
 def extract_cat_from_discovery_input(di):
     try:
@@ -251,129 +253,194 @@ def extract_main_category_from_discovery_input(di):
         return 'Other'
 
 # --- Refactored Data Cleaning Functions ---
+def loads_json(text):
+    try:
+        return json_loads(text)
+    except ValueError:
+        # orjson is stricter than json (e.g. NaN literals); fall back so results match
+        return json.loads(text)
+
+def _first_json_string(cell, keys):
+    # First string value under `keys` (in order), else the first string value in the object
+    try:
+        parsed = loads_json(cell)
+        for key in keys:
+            if key in parsed and isinstance(parsed[key], str):
+                return parsed[key]
+        for v in parsed.values():
+            if isinstance(v, str):
+                return v
+    except Exception:
+        pass
+    return None
+
+def clean_text_values(values, keys, title=False):
+    """
+    Cleans a text column that may hold JSON objects such as '{"name": "Dorina"}'.
+    JSON cells are decoded to the first string under `keys`, other text has its
+    whitespace collapsed, and non-strings become 'Unknown'. Work is done once per
+    distinct value with str methods and mapped back to the rows.
+    """
+    codes, uniques = pd.factorize(pd.Series(values, dtype=object))
+    uniques = pd.Series(uniques, dtype=object)
+    cleaned = pd.Series('Unknown', index=uniques.index, dtype=object)
+
+    is_str = uniques.map(lambda v: isinstance(v, str)).astype(bool)
+    if is_str.any():
+        text = uniques[is_str].str.strip()
+        is_json = text.str.startswith('{') & text.str.endswith('}')
+        decoded = text[is_json].map(lambda cell: _first_json_string(cell, keys)).dropna()
+        text = text.str.replace(r'\s+', ' ', regex=True).str.strip()
+        # Values decoded from JSON are only stripped, not whitespace-collapsed
+        text[decoded.index] = decoded.str.strip()
+        cleaned[is_str] = text.str.title() if title else text
+
+    # factorize codes missing values as -1, which picks up the trailing 'Unknown'
+    results = np.append(cleaned.to_numpy(dtype=object), 'Unknown')
+    return results[codes]
+
+BRAND_JSON_KEYS = ['brand', 'brand_name', 'name']
+NAME_JSON_KEYS = ['name', 'title', 'product_name', 'text']
+
 def clean_brand_column(df):
-    def extract_clean_brand(brand_str):
-        if pd.isna(brand_str) or not isinstance(brand_str, str):
-            return 'Unknown'
-        brand_str = brand_str.strip()
-        if brand_str.startswith('{') and brand_str.endswith('}'):
-            try:
-                parsed = json.loads(brand_str)
-                for key in ['brand', 'brand_name', 'name']:
-                    if key in parsed and isinstance(parsed[key], str):
-                        return parsed[key].strip().title()
-                for v in parsed.values():
-                    if isinstance(v, str):
-                        return v.strip().title()
-            except Exception:
-                pass
-        cleaned = re.sub(r'\s+', ' ', brand_str).strip().title()
-        return cleaned
     if 'brand' in df.columns:
-        df['brand_clean'] = df['brand'].fillna(df.get('brand_name', '')).apply(extract_clean_brand)
+        df['brand_clean'] = clean_text_values(df['brand'].fillna(df.get('brand_name', '')), BRAND_JSON_KEYS, title=True)
     elif 'brand_name' in df.columns:
-        df['brand_clean'] = df['brand_name'].apply(extract_clean_brand)
+        df['brand_clean'] = clean_text_values(df['brand_name'], BRAND_JSON_KEYS, title=True)
     else:
         df['brand_clean'] = 'Unknown'
     return df
 
 def clean_name_columns(df):
-    def extract_clean_name(name_str):
-        if pd.isna(name_str) or not isinstance(name_str, str):
-            return 'Unknown'
-        name_str = name_str.strip()
-        if name_str.startswith('{') and name_str.endswith('}'):
-            try:
-                parsed = json.loads(name_str)
-                for key in ['name', 'title', 'product_name', 'text']:
-                    if key in parsed and isinstance(parsed[key], str):
-                        return parsed[key].strip()
-                for v in parsed.values():
-                    if isinstance(v, str):
-                        return v.strip()
-            except Exception:
-                pass
-        cleaned = re.sub(r'\s+', ' ', name_str).strip()
-        return cleaned
-    df['product_name_clean'] = df.get('product_name', '').apply(extract_clean_name)
-    df['name_clean'] = df.get('name', '').apply(extract_clean_name)
+    blank = pd.Series('', index=df.index, dtype=object)
+    df['product_name_clean'] = clean_text_values(df.get('product_name', blank), NAME_JSON_KEYS)
+    df['name_clean'] = clean_text_values(df.get('name', blank), NAME_JSON_KEYS)
     df['best_name'] = df['product_name_clean'].fillna(df['name_clean']).fillna(df.get('product_name', '')).fillna(df.get('name', ''))
     return df
 
+def classify_categories(df, classifier):
+    # Prefer the leaf category the product was crawled from, then discovery_input if
+    # available and not generic, else fall back to name. Each column is classified
+    # once per distinct value instead of once per row.
+    blank = pd.Series('', index=df.index, dtype=object)
+    crawl = df['crawl_category'] if 'crawl_category' in df.columns else blank
+    disc = df['discovery_input'] if 'discovery_input' in df.columns else blank
+    name = df['name'] if 'name' in df.columns else blank
+
+    crawl_cat = map_unique(crawl, lambda c: classifier.classify(c) if c not in ('', 'N/A') else None)
+    disc_cat = map_unique(disc, classifier.classify)
+    disc_generic = map_unique(disc, lambda d: isinstance(d, str) and d.lower() in GENERIC_DISCOVERY_INPUTS, False)
+    name_cat = map_unique(name, classifier.classify)
+
+    use_name = pd.isna(disc_cat) | disc_generic.astype(bool)
+    fallback = np.where(use_name, name_cat, disc_cat)
+    return np.where(pd.isna(crawl_cat), fallback, crawl_cat)
+
 def clean_category_columns(df):
-    # Use discovery_input if available and not generic, else fall back to name
-    def get_main_cat(row):
-        disc = row.get('discovery_input', '')
-        name = row.get('name', '')
-        main_cat = extract_main_category(disc)
-        if (not main_cat) or (disc.lower() in ['womens-clothing-underwear', 'womens clothing underwear', 'lingerie', 'underwear']):
-            main_cat = extract_main_category(name)
-        return main_cat
-    def get_spec_cat(row):
-        disc = row.get('discovery_input', '')
-        name = row.get('name', '')
-        spec_cat = extract_specific_category(disc)
-        if (not spec_cat) or (disc.lower() in ['womens-clothing-underwear', 'womens clothing underwear', 'lingerie', 'underwear']):
-            spec_cat = extract_specific_category(name)
-        return spec_cat
-    df['category_clean'] = df.apply(get_main_cat, axis=1)
-    df['specific_category'] = df.apply(get_spec_cat, axis=1)
+    df['category_clean'] = classify_categories(df, MAIN_CATEGORY_CLASSIFIER)
+    df['specific_category'] = classify_categories(df, SPECIFIC_CATEGORY_CLASSIFIER)
     return df
 
+BASIC_COLOR_MAP = {
+    'schwarz': 'Black', 'black': 'Black', 'noir': 'Black', 'jet': 'Black',
+    'weiß': 'White', 'weiss': 'White', 'white': 'White', 'offwhite': 'White', 'off-white': 'White', 'ecru': 'White', 'ivory': 'White',
+    'blau': 'Blue', 'navy': 'Blue', 'blue': 'Blue', 'dunkelblau': 'Blue', 'hellblau': 'Blue', 'denim': 'Blue', 'azur': 'Blue', 'marine': 'Blue',
+    'rot': 'Red', 'red': 'Red', 'bordeaux': 'Red', 'burgunder': 'Red', 'weinrot': 'Red', 'karminrot': 'Red',
+    'rosa': 'Pink', 'pink': 'Pink', 'altrosa': 'Pink', 'fuchsia': 'Pink', 'magenta': 'Pink', 'rosé': 'Pink',
+    'beige': 'Beige', 'sand': 'Beige', 'stone': 'Beige', 'camel': 'Beige', 'champagner': 'Beige',
+    'braun': 'Brown', 'brown': 'Brown', 'kastanie': 'Brown', 'espresso': 'Brown', 'mokka': 'Brown', 'chocolate': 'Brown',
+    'grün': 'Green', 'green': 'Green', 'oliv': 'Green', 'olive': 'Green', 'mint': 'Green', 'türkis': 'Green', 'turquoise': 'Green', 'smaragd': 'Green', 'khaki': 'Green',
+    'gelb': 'Yellow', 'yellow': 'Yellow', 'gold': 'Yellow', 'senf': 'Yellow', 'lemon': 'Yellow',
+    'lila': 'Purple', 'purple': 'Purple', 'violett': 'Purple', 'aubergine': 'Purple', 'mauve': 'Purple', 'lavendel': 'Purple',
+    'grau': 'Grey', 'gray': 'Grey', 'grey': 'Grey', 'anthrazit': 'Grey', 'silber': 'Grey', 'silver': 'Grey', 'platin': 'Grey',
+    'orange': 'Orange', 'koralle': 'Orange', 'coral': 'Orange', 'apricot': 'Orange', 'aprikose': 'Orange',
+    'multi': 'Multicolor', 'mehrfarbig': 'Multicolor', 'multicolor': 'Multicolor', 'bunt': 'Multicolor', 'print': 'Multicolor', 'gemustert': 'Multicolor',
+    'creme': 'Cream', 'cream': 'Cream', 'milch': 'Cream',
+    'khaki': 'Khaki',
+    'peach': 'Peach', 'pfirsich': 'Peach',
+    'taupe': 'Taupe',
+    'petrol': 'Petrol',
+    'powder': 'Powder', 'puder': 'Powder',
+    'crystal': 'Crystal', 'kristall': 'Crystal',
+    'smoke': 'Grey', 'rauch': 'Grey',
+    'mintgrün': 'Green', 'pastellgrün': 'Green', 'pastellblau': 'Blue', 'pastellrosa': 'Pink',
+    'pastellgelb': 'Yellow', 'pastelllila': 'Purple',
+}
+# Separators that mark a colour mix, tried in order
+COLOR_MIX_PATTERNS = [
+    re.compile(pat) for pat in [r'/', r'-', r',', r' & ', r' und ', r'\+', r'\s+mit\s+', r'\s+and\s+', r'\s*\+\s*']
+]
+COLOR_PART_SPLIT = re.compile(r'[ ,/\-]+')
+
+# Bump when map_color's logic changes so saved mappings are rebuilt
+COLOR_RULES_VERSION = 1
+COLOR_RULES_FINGERPRINT = hashlib.md5(json.dumps(
+    [COLOR_RULES_VERSION, BASIC_COLOR_MAP, [p.pattern for p in COLOR_MIX_PATTERNS]], sort_keys=True
+).encode('utf-8')).hexdigest()
+COLOR_MAPPING_FILE = 'color_mapping.json'
+
+# raw colour (as str) -> clean colour, shared by every clean_color_column call in this process
+COLOR_MAPPING_CACHE = {}
+
+def map_color(raw_color):
+    if pd.isna(raw_color):
+        return 'Unknown'
+    raw_color = str(raw_color).lower().strip()
+    # Handle color mixes
+    for pat in COLOR_MIX_PATTERNS:
+        if pat.search(raw_color):
+            parts = pat.split(raw_color)
+            mapped = [BASIC_COLOR_MAP.get(p.strip(), None) for p in parts]
+            mapped = [m for m in mapped if m]
+            if len(set(mapped)) == 1:
+                return mapped[0]
+            elif mapped:
+                return 'Multicolor'
+    # Direct mapping
+    if raw_color in BASIC_COLOR_MAP:
+        return BASIC_COLOR_MAP[raw_color]
+    for part in COLOR_PART_SPLIT.split(raw_color):
+        if part in BASIC_COLOR_MAP:
+            return BASIC_COLOR_MAP[part]
+    return raw_color.split()[0].capitalize() if raw_color else 'Unknown'
+
+def load_color_mapping(path=COLOR_MAPPING_FILE):
+    """Loads a saved colour mapping into the cache, unless it was built with other rules."""
+    try:
+        with open(path, 'r', encoding='utf-8') as f:
+            saved = json.load(f)
+    except (FileNotFoundError, ValueError):
+        return 0
+    if saved.get('rules') != COLOR_RULES_FINGERPRINT:
+        return 0
+    COLOR_MAPPING_CACHE.update(saved.get('mapping', {}))
+    return len(COLOR_MAPPING_CACHE)
+
+def save_color_mapping(path=COLOR_MAPPING_FILE):
+    """Saves the colour mapping cache so the next run only maps colours it has not seen."""
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump({'rules': COLOR_RULES_FINGERPRINT, 'mapping': COLOR_MAPPING_CACHE}, f, ensure_ascii=False, indent=0)
+
+def normalise_colors(values):
+    """Maps each distinct raw colour once (via the cache) and returns a categorical of clean colours."""
+    codes, uniques = pd.factorize(pd.Series(values, dtype=object))
+    labels = []
+    for raw in uniques:
+        key = str(raw)
+        label = COLOR_MAPPING_CACHE.get(key)
+        if label is None:
+            label = COLOR_MAPPING_CACHE[key] = map_color(raw)
+        labels.append(label)
+    # factorize codes missing values as -1, which picks up this trailing entry
+    labels.append('Unknown')
+    label_codes, categories = pd.factorize(np.array(labels, dtype=object))
+    return pd.Categorical.from_codes(label_codes[codes], categories=categories).remove_unused_categories()
+
 def clean_color_column(df):
-    basic_color_map = {
-        'schwarz': 'Black', 'black': 'Black', 'noir': 'Black', 'jet': 'Black',
-        'weiß': 'White', 'weiss': 'White', 'white': 'White', 'offwhite': 'White', 'off-white': 'White', 'ecru': 'White', 'ivory': 'White',
-        'blau': 'Blue', 'navy': 'Blue', 'blue': 'Blue', 'dunkelblau': 'Blue', 'hellblau': 'Blue', 'denim': 'Blue', 'azur': 'Blue', 'marine': 'Blue',
-        'rot': 'Red', 'red': 'Red', 'bordeaux': 'Red', 'burgunder': 'Red', 'weinrot': 'Red', 'karminrot': 'Red',
-        'rosa': 'Pink', 'pink': 'Pink', 'altrosa': 'Pink', 'fuchsia': 'Pink', 'magenta': 'Pink', 'rosé': 'Pink',
-        'beige': 'Beige', 'sand': 'Beige', 'stone': 'Beige', 'camel': 'Beige', 'champagner': 'Beige',
-        'braun': 'Brown', 'brown': 'Brown', 'kastanie': 'Brown', 'espresso': 'Brown', 'mokka': 'Brown', 'chocolate': 'Brown',
-        'grün': 'Green', 'green': 'Green', 'oliv': 'Green', 'olive': 'Green', 'mint': 'Green', 'türkis': 'Green', 'turquoise': 'Green', 'smaragd': 'Green', 'khaki': 'Green',
-        'gelb': 'Yellow', 'yellow': 'Yellow', 'gold': 'Yellow', 'senf': 'Yellow', 'lemon': 'Yellow',
-        'lila': 'Purple', 'purple': 'Purple', 'violett': 'Purple', 'aubergine': 'Purple', 'mauve': 'Purple', 'lavendel': 'Purple',
-        'grau': 'Grey', 'gray': 'Grey', 'grey': 'Grey', 'anthrazit': 'Grey', 'silber': 'Grey', 'silver': 'Grey', 'platin': 'Grey',
-        'orange': 'Orange', 'koralle': 'Orange', 'coral': 'Orange', 'apricot': 'Orange', 'aprikose': 'Orange',
-        'multi': 'Multicolor', 'mehrfarbig': 'Multicolor', 'multicolor': 'Multicolor', 'bunt': 'Multicolor', 'print': 'Multicolor', 'gemustert': 'Multicolor',
-        'creme': 'Cream', 'cream': 'Cream', 'milch': 'Cream',
-        'khaki': 'Khaki',
-        'peach': 'Peach', 'pfirsich': 'Peach',
-        'taupe': 'Taupe',
-        'petrol': 'Petrol',
-        'powder': 'Powder', 'puder': 'Powder',
-        'crystal': 'Crystal', 'kristall': 'Crystal',
-        'smoke': 'Grey', 'rauch': 'Grey',
-        'mintgrün': 'Green', 'pastellgrün': 'Green', 'pastellblau': 'Blue', 'pastellrosa': 'Pink',
-        'pastellgelb': 'Yellow', 'pastelllila': 'Purple',
-    }
-    color_mix_patterns = [
-        r'/', r'-', r',', r' & ', r' und ', r'\+', r'\s+mit\s+', r'\s+and\s+', r'\s*\+\s*'
-    ]
-    def map_color(raw_color):
-        if pd.isna(raw_color):
-            return 'Unknown'
-        raw_color = str(raw_color).lower().strip()
-        # Handle color mixes
-        for pat in color_mix_patterns:
-            if re.search(pat, raw_color):
-                parts = re.split(pat, raw_color)
-                mapped = [basic_color_map.get(p.strip(), None) for p in parts]
-                mapped = [m for m in mapped if m]
-                if len(set(mapped)) == 1:
-                    return mapped[0]
-                elif mapped:
-                    return 'Multicolor'
-        # Direct mapping
-        if raw_color in basic_color_map:
-            return basic_color_map[raw_color]
-        for part in re.split(r'[ ,/\-]+', raw_color):
-            if part in basic_color_map:
-                return basic_color_map[part]
-        return raw_color.split()[0].capitalize() if raw_color else 'Unknown'
     if 'color' in df.columns:
-        df['color_clean'] = df['color'].apply(map_color)
+        df['color_clean'] = normalise_colors(df['color'])
     elif 'colors' in df.columns:
-        df['color_clean'] = df['colors'].apply(map_color)
+        df['color_clean'] = normalise_colors(df['colors'])
     else:
         df['color_clean'] = 'Unknown'
     return df
@@ -397,6 +464,14 @@ def auto_clean_data(df):
     df = adjust_for_pack_size(df)
     return df
 
+# Bump when any cleaning function changes behaviour; with the maps below it stamps
+# cached cleaned rows so preprocess.py rebuilds everything when the rules change
+CLEANING_RULES_VERSION = 1
+CLEANING_RULES_FINGERPRINT = hashlib.md5(json.dumps([
+    CLEANING_RULES_VERSION, COLOR_RULES_FINGERPRINT, MAIN_CATEGORY_MAP, SPECIFIC_CATEGORY_MAP,
+    GENERIC_DISCOVERY_INPUTS, BRAND_JSON_KEYS, NAME_JSON_KEYS
+], sort_keys=True).encode('utf-8')).hexdigest()
+
 def adjust_for_pack_size(df):
     """
     Extracts pack size from product name and calculates price per item.
@@ -423,27 +498,472 @@ def adjust_for_pack_size(df):
     return df
 
 RAW_CSV = 'https://raw.githubusercontent.com/Uglamator/zalandoData/main/cleaned_zalando_data.csv'
+RAW_PARQUET = 'https://raw.githubusercontent.com/Uglamator/zalandoData/main/cleaned_zalando_data.parquet'
+CLEANED_PARQUET = 'cleaned_zalando_data.parquet'
+
+# --- Typed schema of the cleaned artefact written by preprocess.py ---
+# Same column groups as the cleaned CSV schema; low-cardinality labels are stored
+# dictionary-encoded and load as categoricals
+ARTEFACT_TYPES = {
+    **{col: pa.dictionary(pa.int32(), pa.string()) for col in CATEGORICAL_COLUMNS},
+    **{col: pa.float32() for col in FLOAT32_COLUMNS},
+    **{col: pa.string() for col in TEXT_COLUMNS},
+    'pack_size': pa.int8(),
+    # Size counts; nullable so rows without size data survive
+    'in_stock': pa.int32(),
+    'total': pa.int32(),
+}
 
+# Columns the dashboard reads; everything else stays on disk
+DASHBOARD_COLUMNS = [
+    'sku', 'best_name', 'brand_clean', 'category_clean', 'specific_category', 'color_clean', 'country_code',
+    'initial_price', 'final_price', 'discount_pct', 'pack_size', 'price_per_item',
+    'in_stock', 'total', 'inventory', 'sizes', 'main_image', 'product_url'
+]
+
+def to_artefact_table(df):
+    """
+    Converts a cleaned frame to an Arrow table with the artefact schema. Columns
+    listed in ARTEFACT_TYPES get their declared type; any others keep the type
+    Arrow infers.
+    """
+    df = df.copy()
+    fields = []
+    for col in df.columns:
+        arrow_type = ARTEFACT_TYPES.get(col)
+        if col in TEXT_COLUMNS or col in CATEGORICAL_COLUMNS:
+            # CSV type inference can turn e.g. SKUs into numbers; store them as text
+            values = df[col].astype(object)
+            values = values.where(values.isna(), values.astype(str))
+            df[col] = values.astype('category') if col in CATEGORICAL_COLUMNS else values
+        fields.append(pa.field(col, arrow_type) if arrow_type is not None
+                      else pa.Schema.from_pandas(df[[col]], preserve_index=False).field(col))
+    return pa.Table.from_pandas(df, schema=pa.schema(fields), preserve_index=False)
+
+def write_artefact(df, path=CLEANED_PARQUET):
+    pq.write_table(to_artefact_table(df), path)
+
+def sort_categories(df):
+    # Categories sort lexically so sort_values/sorted() behave as they did on text columns
+    for col in df.select_dtypes(include='category').columns:
+        df[col] = df[col].cat.set_categories(sorted(df[col].cat.categories))
+    return df
+
+def read_artefact(source, columns=DASHBOARD_COLUMNS):
+    """Reads the Parquet artefact from a path (memory-mapped) or bytes, projecting to `columns`."""
+    if isinstance(source, (bytes, bytearray)):
+        pf = pq.ParquetFile(pa.BufferReader(source))
+    else:
+        pf = pq.ParquetFile(source, memory_map=True)
+    available = [col for col in columns if col in pf.schema_arrow.names] if columns else None
+    table = pf.read(columns=available)
+    # Hand each Arrow buffer back as soon as its column is converted to keep peak memory down
+    df = table.to_pandas(split_blocks=True, self_destruct=True)
+    del table
+    pa.default_memory_pool().release_unused()
+    return sort_categories(df)
+
+def observed_counts(series, **kwargs):
+    """value_counts without the zero rows a categorical reports for categories not present."""
+    counts = series.value_counts(**kwargs)
+    return counts[counts > 0]
+
+# --- Size table: one row per (product row, size) written alongside the artefact ---
+RAW_SIZES_PARQUET = 'https://raw.githubusercontent.com/Uglamator/zalandoData/main/cleaned_zalando_sizes.parquet'
+CLEANED_SIZES_PARQUET = 'cleaned_zalando_sizes.parquet'
+SIZE_TABLE_TYPES = {
+    'row_id': pa.int32(),  # position of the product row in the cleaned data
+    'size': pa.dictionary(pa.int16(), pa.string()),
+    'available': pa.bool_(),
+}
+
+# Tried in order: 'NN/NN', then 'NNL' (e.g. 75B), then plain digits
+SIZE_PATTERNS = [
+    re.compile(r'^([0-9]{2}/[0-9]{2})'),
+    re.compile(r'^([0-9]+[A-Za-z]+)'),
+    re.compile(r'^([0-9]+)'),
+]
+# Any leading word (e.g. S, M, L, XL, 3XL)
+SIZE_FALLBACK_PATTERN = re.compile(r'^([A-Za-z0-9]+)')
+
+def normalise_size(size_name):
+    """Reduces a raw size label such as '75B (EU)' or '3840' to its size code."""
+    if not isinstance(size_name, str):
+        return None
+    for pattern in SIZE_PATTERNS:
+        match = pattern.match(size_name)
+        if match:
+            clean_size = match.group(1)
+            # If it's all digits and longer than 2, take first two digits
+            if clean_size.isdigit() and len(clean_size) > 2:
+                clean_size = clean_size[:2]
+            return clean_size
+    match = SIZE_FALLBACK_PATTERN.match(size_name)
+    return match.group(1) if match else size_name
+
+def build_size_table(df):
+    """
+    Explodes the JSON `sizes` column into a long table of (row_id, size,
+    available), where row_id is the row's position in `df`. Size codes are
+    normalised once per distinct raw label and stored as a categorical.
+    Rows whose sizes cell can't be parsed are left out.
+    """
+    row_ids, names, available = [], [], []
+    sizes = df['sizes'].tolist() if 'sizes' in df.columns else []
+    for row_id, cell in enumerate(sizes):
+        if not isinstance(cell, str) or not cell:
+            continue
+        try:
+            entries = [(s.get('name', 'Unknown'), bool(s.get('availability', True))) for s in loads_json(cell)]
+        except Exception:
+            continue
+        for name, is_available in entries:
+            row_ids.append(row_id)
+            names.append(name)
+            available.append(is_available)
+    size_codes = map_unique(names, normalise_size)
+    table = pd.DataFrame({
+        'row_id': np.array(row_ids, dtype='int32'),
+        'size': pd.Categorical(size_codes),
+        'available': np.array(available, dtype=bool),
+    })
+    return table[table['size'].notna()].reset_index(drop=True)
+
+def to_size_arrow(sizes):
+    schema = pa.schema([pa.field(col, arrow_type) for col, arrow_type in SIZE_TABLE_TYPES.items()])
+    return pa.Table.from_pandas(sizes[list(SIZE_TABLE_TYPES)], schema=schema, preserve_index=False)
+
+def write_size_table(sizes, path=CLEANED_SIZES_PARQUET):
+    pq.write_table(to_size_arrow(sizes), path)
+
+def read_size_table(source):
+    """Reads the size table from a path (memory-mapped) or bytes."""
+    if isinstance(source, (bytes, bytearray)):
+        table = pq.read_table(pa.BufferReader(source))
+    else:
+        table = pq.read_table(source, memory_map=True)
+    return sort_categories(table.to_pandas())
+
+def size_curve(sizes, row_ids):
+    """Number of available (row, size) pairs per size code for the given product rows."""
+    selected = sizes[sizes['row_id'].isin(row_ids) & sizes['available']]
+    counts = observed_counts(selected['size'].astype(str))
+    return counts.sort_index().rename_axis(None)
+
+def in_stock_by_row(sizes, row_ids):
+    """In-stock size count, total size count and in-stock % per product row that lists sizes."""
+    selected = sizes[sizes['row_id'].isin(row_ids)]
+    stats = selected.groupby('row_id')['available'].agg(in_stock='sum', total='size')
+    stats['in_stock'] = stats['in_stock'].astype(int)
+    stats['in_stock_pct'] = (stats['in_stock'] / stats['total'] * 100).round(2)
+    return stats
+
+
+# --- Aggregate cube: additive measures per brand x category x subcategory x colour x price band ---
+RAW_CUBE_PARQUET = 'https://raw.githubusercontent.com/Uglamator/zalandoData/main/cleaned_zalando_cube.parquet'
+CLEANED_CUBE_PARQUET = 'cleaned_zalando_cube.parquet'
+PRICE_BINS = [0, 20, 30, 40, 50, 60, 1e6]
+PRICE_LABELS = ['<20€', '20-30€', '30-40€', '40-50€', '50-60€', '60€+']
+CUBE_DIMENSIONS = ['brand_clean', 'category_clean', 'specific_category', 'color_clean', 'price_band']
+# Sums and non-null counts, so any roll-up can rebuild a mean exactly
+CUBE_MEASURES = [
+    'skus', 'price_sum', 'price_n', 'price_per_item_sum', 'price_per_item_n',
+    'discount_sum', 'discount_n', 'discounted', 'discounted_sum', 'in_stock'
+]
+CUBE_TYPES = {
+    **{dim: pa.dictionary(pa.int32(), pa.string()) for dim in CUBE_DIMENSIONS},
+    **{m: pa.float64() if m.endswith('_sum') else pa.int64() for m in CUBE_MEASURES},
+}
+
+def build_cube(df):
+    """
+    Aggregates the cleaned frame to one row per observed combination of
+    CUBE_DIMENSIONS (price band by final price), keeping missing labels as
+    their own group so totals still cover every row.
+    """
+    def numeric(col):
+        return pd.to_numeric(df[col], errors='coerce').astype('float64') if col in df.columns \
+            else pd.Series(np.nan, index=df.index)
+    price, per_item, discount = numeric('final_price'), numeric('price_per_item'), numeric('discount_pct')
+    frame = pd.DataFrame({
+        dim: df[dim] if dim in df.columns else pd.Series(np.nan, index=df.index, dtype=object)
+        for dim in CUBE_DIMENSIONS[:-1]
+    })
+    frame['price_band'] = pd.cut(price, bins=PRICE_BINS, labels=PRICE_LABELS, right=False)
+    for dim in CUBE_DIMENSIONS:
+        frame[dim] = frame[dim].astype('category')
+    frame['skus'] = 1
+    frame['price_sum'], frame['price_n'] = price.fillna(0), price.notna()
+    frame['price_per_item_sum'], frame['price_per_item_n'] = per_item.fillna(0), per_item.notna()
+    frame['discount_sum'], frame['discount_n'] = discount.fillna(0), discount.notna()
+    frame['discounted'] = discount > 0
+    frame['discounted_sum'] = discount.where(discount > 0, 0)
+    frame['in_stock'] = numeric('in_stock') > 0
+    cube = frame.groupby(CUBE_DIMENSIONS, observed=True, dropna=False)[CUBE_MEASURES].sum().reset_index()
+    return cube.astype({m: 'int64' for m in CUBE_MEASURES if not m.endswith('_sum')})
+
+def combine_cubes(cubes):
+    """Merges cubes built over disjoint rows (e.g. preprocess chunks) into one."""
+    cube = pd.concat(cubes, ignore_index=True)
+    for dim in CUBE_DIMENSIONS:
+        cube[dim] = cube[dim].astype(object).astype('category')
+    return cube.groupby(CUBE_DIMENSIONS, observed=True, dropna=False)[CUBE_MEASURES].sum().reset_index()
+
+def write_cube(cube, path=CLEANED_CUBE_PARQUET):
+    cube = cube.copy()
+    for dim in CUBE_DIMENSIONS:
+        values = cube[dim].astype(object)
+        cube[dim] = values.where(values.isna(), values.astype(str)).astype('category')
+    schema = pa.schema([pa.field(col, arrow_type) for col, arrow_type in CUBE_TYPES.items()])
+    pq.write_table(pa.Table.from_pandas(cube[list(CUBE_TYPES)], schema=schema, preserve_index=False), path)
+
+def read_cube(source):
+    if isinstance(source, (bytes, bytearray)):
+        table = pq.read_table(pa.BufferReader(source))
+    else:
+        table = pq.read_table(source, memory_map=True)
+    return sort_categories(table.to_pandas())
+
+def cube_rollup(cube, by=None, **filters):
+    """
+    Sums the cube's measures over the rows matching `filters` (dimension=value,
+    or dimension=list of values), grouped by the dimension(s) in `by`, and adds
+    the derived averages and shares. With no `by`, returns a single Series of totals.
+    """
+    for dim, value in filters.items():
+        cube = cube[cube[dim].isin(value if isinstance(value, (list, tuple)) else [value])]
+    if by:
+        rolled = cube.groupby(by, observed=True)[CUBE_MEASURES].sum()
+    else:
+        rolled = cube[CUBE_MEASURES].sum().to_frame().T
+    rolled['avg_price'] = rolled['price_sum'] / rolled['price_n']
+    rolled['avg_price_per_item'] = rolled['price_per_item_sum'] / rolled['price_per_item_n']
+    rolled['avg_discount'] = rolled['discount_sum'] / rolled['discount_n']
+    rolled['avg_discount_when_discounted'] = rolled['discounted_sum'] / rolled['discounted']
+    rolled['pct_discounted'] = rolled['discounted'] / rolled['skus'] * 100
+    rolled['pct_in_stock'] = rolled['in_stock'] / rolled['skus'] * 100
+    return rolled if by else rolled.iloc[0]
+
+# Published data files, in load_data()'s order of preference
+DATA_URLS = [RAW_PARQUET, RAW_CSV]
+# The size table and cube are published with them and revalidated on their own,
+# so their content hashes key every cache too, like the local artefacts
+COMPANION_URLS = [RAW_SIZES_PARQUET, RAW_CUBE_PARQUET]
+VERSION_URLS = DATA_URLS + COMPANION_URLS
+LOCAL_FILES = [CLEANED_PARQUET, CLEANED_SIZES_PARQUET, CLEANED_CUBE_PARQUET]
+
+def current_data_version():
+    """Content key of the data the dashboard reads: the local artefacts if present, else the disk copies of the published ones."""
+    if os.path.exists(CLEANED_PARQUET):
+        return data_source.file_version(LOCAL_FILES)
+    # Without any disk copy yet, download first so the key doesn't change under the cached loaders
+    if not any(data_source.read_meta(url) for url in DATA_URLS):
+        for url in DATA_URLS:
+            try:
+                data_source.revalidate(url)
+                break
+            except requests.exceptions.RequestException:
+                continue
+        for url in COMPANION_URLS:
+            try:
+                data_source.revalidate(url)
+            except requests.exceptions.RequestException:
+                pass # Optional; the loaders build it from the data
+    return data_source.data_version(VERSION_URLS)
 
-@st.cache_data # Cache the data loading process
 def load_data():
     """
-    Downloads the pre-cleaned data from GitHub and returns a DataFrame.
-    The result is cached to prevent re-downloading on every interaction.
+    Loads the pre-cleaned data and returns a DataFrame. Prefers the typed Parquet
+    artefact (local file, then GitHub) and falls back to the cleaned CSV.
+    The result is cached per data version, so it is only reloaded when the content changes.
     """
+    return _load_data(current_data_version())
+
+@st.cache_data(max_entries=2) # Cache the data loading process, keyed by content
+def _load_data(data_version):
+    started = time.perf_counter()
+    with data_source.track_peak_memory() as memory:
+        df, source = _read_data()
+    if source:
+        data_source.record_load(time.perf_counter() - started, source, data_version, memory['peak_mb'])
+    return df
+
+def _read_data():
+    """
+    Reads the data from a file on disk (the local artefact or the disk copy of a
+    published file), so the parser streams it instead of holding the body in
+    memory next to the frame. Returns (df, source), source None if nothing loaded.
+    """
+    if os.path.exists(CLEANED_PARQUET):
+        return read_artefact(CLEANED_PARQUET), 'local artefact'
+
     try:
-        # Use requests to reliably fetch the data, handling redirects
-        response = requests.get(RAW_CSV)
-        response.raise_for_status()  # Raise an exception for bad responses (4xx or 5xx)
+        return read_artefact(data_source.fetch(RAW_PARQUET)), 'published artefact'
+    except (requests.exceptions.RequestException, pa.ArrowException):
+        pass
 
-        # Read the cleaned CSV content directly into a DataFrame
-        cleaned_df = pd.read_csv(io.StringIO(response.text))
-        
-        return cleaned_df
+    try:
+        # Only the dashboard columns, with declared dtypes and categoricals
+        cleaned_df = read_csv(data_source.fetch(RAW_CSV), CLEANED_SCHEMA, columns=DASHBOARD_COLUMNS)
+        return sort_categories(cleaned_df), 'published CSV'
 
     except requests.exceptions.RequestException as e:
         st.error(f"Failed to download data: {e}")
-        return pd.DataFrame() # Return an empty DataFrame on error
+        return pd.DataFrame(), None # Return an empty DataFrame on error
+
+def load_companion(local_path, remote_url, reader):
+    """
+    Loads a table preprocess.py writes next to the artefact, from the same place
+    load_data() reads the artefact: the local file if there is a local artefact,
+    else the published one. Returns None if it isn't available.
+    """
+    if os.path.exists(CLEANED_PARQUET):
+        return reader(local_path) if os.path.exists(local_path) else None
+    try:
+        return reader(data_source.fetch(remote_url))
+    except (requests.exceptions.RequestException, pa.ArrowException):
+        return None
+
+def load_size_table():
+    """Size table for load_data()'s frame; row_id is the row label. Built from the data if not published."""
+    return _load_size_table(current_data_version())
+
+@st.cache_data(max_entries=2)
+def _load_size_table(data_version):
+    sizes = load_companion(CLEANED_SIZES_PARQUET, RAW_SIZES_PARQUET, read_size_table)
+    return sizes if sizes is not None else build_size_table(load_data())
+
+def load_cube():
+    """Aggregate cube for load_data()'s frame. Built from the data if not published."""
+    return _load_cube(current_data_version())
+
+@st.cache_data(max_entries=2)
+def _load_cube(data_version):
+    cube = load_companion(CLEANED_CUBE_PARQUET, RAW_CUBE_PARQUET, read_cube)
+    return cube if cube is not None else build_cube(load_data())
+
+def data_footer():
+    """Footer line: data version, where the data was loaded from, and the time and peak memory of the cold load."""
+    stats = data_source.LOAD_STATS
+    if not stats:
+        return
+    parts = [f"Data version {stats['version'][:8]}",
+             f"cold start: {stats['seconds']:.2f}s from {stats['source']}, peak memory +{stats['peak_mb']:.0f} MB"]
+    checked = None if os.path.exists(CLEANED_PARQUET) else data_source.last_checked(DATA_URLS)
+    if checked:
+        parts.append(f"checked upstream {max(0, time.time() - checked) / 60:.0f} min ago")
+    st.caption(" · ".join(parts))
+
+
+# --- Memoised view computations ---
+# Each view's data work lives in a pure function of (frame, filter selections)
+# wrapped by view_cache, so reruns that only touch the UI reuse the results
+VIEW_CACHE_ENTRIES = 32  # per function
+VIEW_CACHE_TTL = 3600  # seconds
+VIEW_CACHE_STATS = 'view_cache_stats'  # session_state key: function name -> {'calls', 'misses'}
+VIEW_CACHES = {}
+
+def _view_cache_stats(name):
+    stats = st.session_state.setdefault(VIEW_CACHE_STATS, {})
+    return stats.setdefault(name, {'calls': 0, 'misses': 0})
+
+def view_cache(func):
+    """
+    Caches func(df, *selections) with st.cache_data, keyed by the data version
+    and the selections; the frame itself isn't hashed. Hits and misses are
+    counted per session for the debug panel.
+    """
+    def compute(_df, data_version, *args):
+        _view_cache_stats(func.__name__)['misses'] += 1
+        return func(_df, *args)
+    # st.cache_data keys its store by qualified name and source, which are the same
+    # for every compute(); naming it after func gives each view function its own store
+    compute.__qualname__ = f"view_cache.{func.__qualname__}"
+    cached = st.cache_data(max_entries=VIEW_CACHE_ENTRIES, ttl=VIEW_CACHE_TTL, show_spinner=False)(compute)
+
+    @functools.wraps(func)
+    def wrapper(df, *args):
+        _view_cache_stats(func.__name__)['calls'] += 1
+        return cached(df, current_data_version(), *args)
+    wrapper.clear = cached.clear
+    VIEW_CACHES[func.__name__] = wrapper
+    return wrapper
+
+def cache_debug_panel():
+    """Sidebar panel with this session's view-cache hits and misses; shown with ?debug=1 in the URL."""
+    if st.query_params.get('debug') != '1':
+        return
+    with st.sidebar.expander("🛠 Cache debug", expanded=True):
+        st.caption(f"Data version {current_data_version()[:8]} · {VIEW_CACHE_ENTRIES} entries, "
+                   f"{VIEW_CACHE_TTL // 60} min TTL per function")
+        stats = st.session_state.get(VIEW_CACHE_STATS, {})
+        rows = [{'function': name, 'hits': s['calls'] - s['misses'], 'misses': s['misses'],
+                 'hit rate': f"{(s['calls'] - s['misses']) / s['calls'] * 100:.0f}%" if s['calls'] else '-'}
+                for name, s in sorted(stats.items())]
+        st.dataframe(pd.DataFrame(rows, columns=['function', 'hits', 'misses', 'hit rate']), hide_index=True)
+        if st.button("Clear view caches"):
+            for wrapper in VIEW_CACHES.values():
+                wrapper.clear()
+            st.session_state[VIEW_CACHE_STATS] = {}
+            st.rerun()
+
+def product_image(img_url, width):
+    """st.image of the locally cached thumbnail of a product image, or of the remote URL until it is cached."""
+    st.image(image_cache.thumbnail(img_url) or img_url, width=width)
+
+# --- Product cards: a whole gallery as one HTML grid instead of 6-8 elements per card ---
+# Streamlit serves this folder at app/static/ with server.enableStaticServing (.streamlit/config.toml)
+STATIC_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'static')
+
+def image_src(img_url):
+    """<img> src of a product image: its cached thumbnail under the static route, else (never waiting for it) the remote URL."""
+    path = image_cache.thumbnail(img_url)
+    if path and st.get_option('server.enableStaticServing'):
+        path = os.path.abspath(path)
+        if path.startswith(STATIC_DIR + os.sep):
+            return 'app/static/' + os.path.relpath(path, STATIC_DIR).replace(os.sep, '/')
+    return img_url
+
+def product_grid(cards, columns=5, image_width=120, layout='card', no_image="No image"):
+    """
+    Renders `cards` in a single st.markdown call as a CSS grid of `columns`
+    (styled by the product-grid rules in main()). Each card is a dict with
+    optional 'image' (URL), 'title' (bold), 'lines' (text, or (text, class) for
+    the 'discount' / 'muted' styles), 'caption' and 'link' (a "View on Zalando"
+    link). With layout='row' the image sits left of the text. Images load
+    lazily; text is escaped.
+    """
+    if not cards:
+        return
+    image_cells = []
+    for card in cards:
+        img_url = card.get('image')
+        if img_url and pd.notna(img_url) and str(img_url).startswith('http'):
+            image_cells.append(f'<img src="{html.escape(image_src(img_url))}" width="{image_width}" '
+                               f'loading="lazy" alt="">')
+        else:
+            image_cells.append(f'<p class="muted">{html.escape(no_image)}</p>' if no_image else '')
+    parts = []
+    for card, image in zip(cards, image_cells):
+        text = []
+        if card.get('title') is not None:
+            text.append(f'<p class="title">{html.escape(str(card["title"]))}</p>')
+        for line in card.get('lines', []):
+            line, css_class = line if isinstance(line, tuple) else (line, None)
+            text.append(f'<p class="{css_class}">' if css_class else '<p>')
+            text.append(f'{html.escape(str(line))}</p>')
+        if card.get('caption') is not None:
+            text.append(f'<p class="caption">{html.escape(str(card["caption"]))}</p>')
+        if card.get('link') and pd.notna(card['link']):
+            text.append(f'<p><a href="{html.escape(str(card["link"]))}" target="_blank">View on Zalando</a></p>')
+        if layout == 'row':
+            parts.append(f'<div class="product-card row" style="grid-template-columns:{image_width}px 1fr">'
+                         f'{image or "<div></div>"}<div>{"".join(text)}</div></div>')
+        else:
+            parts.append(f'<div class="product-card">{image}{"".join(text)}</div>')
+    grid = (f'<div class="product-grid" style="grid-template-columns:repeat({columns},minmax(0,1fr))">'
+            f'{"".join(parts)}</div>')
+    st.markdown(grid, unsafe_allow_html=True)
 
 def highlight_dorina(row):
     brand = row['brand_clean'] if 'brand_clean' in row else ''
@@ -482,11 +1002,117 @@ def smart_style(df):
             fmt[col] = "{:.2f}"
     return df.style.format(fmt)
 
+# --- Paged tables: one sorted page of a projected column set per rerun instead of the whole frame ---
+TABLE_PAGE_SIZE = 50
+# Columns of the deep-dive data tables; the JSON sizes and image/inventory columns stay server-side
+DATA_TABLE_COLUMNS = [
+    'sku', 'best_name', 'brand_clean', 'category_clean', 'specific_category', 'color_clean', 'country_code',
+    'initial_price', 'final_price', 'discount_pct', 'pack_size', 'price_per_item', 'in_stock', 'total',
+    'in_stock_pct', 'product_url'
+]
+
+def table_column_config(frame):
+    """st.dataframe column_config formatting integer columns as whole numbers and float columns to 2 dp."""
+    config = {}
+    for col in frame.columns:
+        if pd.api.types.is_integer_dtype(frame[col]) and not pd.api.types.is_bool_dtype(frame[col]):
+            config[str(col)] = st.column_config.NumberColumn(format="%d")
+        elif pd.api.types.is_float_dtype(frame[col]):
+            config[str(col)] = st.column_config.NumberColumn(format="%.2f")
+    return config
+
+@st.fragment
+def paged_table(df, key, columns=None, max_columns=None, page_size=TABLE_PAGE_SIZE):
+    """
+    st.dataframe of one page of `df`, sorted and sliced here so only that page
+    is sent. `columns` projects the frame (missing ones are skipped); with more
+    than `max_columns` columns left, a picker defaults to the fullest ones.
+    Widget keys start with `key`; a fragment, so sorting and paging rerun only
+    the table.
+    """
+    frame = df[[col for col in columns if col in df.columns]] if columns else df
+    if max_columns and frame.shape[1] > max_columns:
+        fullest = frame.notna().sum().sort_values(ascending=False, kind='stable').index[:max_columns]
+        shown = st.multiselect("Columns", list(frame.columns), default=[col for col in frame.columns if col in fullest],
+                               key=f"{key}_columns")
+        frame = frame[shown]
+    labels = [str(col) for col in frame.columns]
+    col1, col2, col3 = st.columns([3, 1, 1])
+    with col1:
+        sort_by = st.selectbox("Sort by", ['(original order)'] + labels, key=f"{key}_sort")
+    with col2:
+        descending = st.toggle("Descending", key=f"{key}_desc")
+    pages = max(1, (len(frame) - 1) // page_size + 1)
+    with col3:
+        page = st.number_input("Page", min_value=1, max_value=pages, value=1, step=1, key=f"{key}_page")
+    start = (min(page, pages) - 1) * page_size
+    if sort_by == '(original order)':
+        order = np.arange(len(frame))[::-1] if descending else np.arange(len(frame))
+    else:
+        values = frame.iloc[:, labels.index(sort_by)].reset_index(drop=True)
+        order = values.sort_values(ascending=not descending, kind='stable', na_position='last').index.to_numpy()
+    page_rows = frame.iloc[order[start:start + page_size]]
+    st.dataframe(page_rows, use_container_width=True, column_config=table_column_config(page_rows))
+    st.caption(f"Rows {start + 1 if len(frame) else 0:,}–{start + len(page_rows):,} of {len(frame):,}")
+
 # =====================
 # Dashboard Sections
 # =====================
 # (Implement all dashboard section functions here, similar to virtual_shopping_room)
 
+def dashboard_rows(df, category, subcat):
+    """Rows matching the dashboard's category and subcategory filters ('All' means no filter)."""
+    if category != 'All':
+        df = df[df['category_clean'] == category]
+    if subcat != 'All':
+        df = df[df['specific_category'] == subcat]
+    return df
+
+@view_cache
+def dashboard_summary(df, category, subcat):
+    """KPI tiles, price band and colour mixes, product shortlists and pack analysis for the dashboard filters."""
+    filtered = dashboard_rows(df, category, subcat)
+    cube_filters = {dim: value for dim, value in [('category_clean', category),
+                                                  ('specific_category', subcat)] if value != 'All'}
+    cube = load_cube()
+    totals = cube_rollup(cube, **cube_filters)
+    total_skus = int(totals['skus'])
+    discounted = int(totals['discounted'])
+    summary = {
+        'total_skus': total_skus,
+        'pct_in_stock': totals['pct_in_stock'] if total_skus > 0 else 0,
+        'pct_discounted': totals['pct_discounted'] if total_skus > 0 else 0,
+        'avg_discount': totals['avg_discount_when_discounted'] if discounted > 0 else 0,
+        'avg_price_pack': totals['avg_price'],
+        'avg_price_item': totals['avg_price_per_item'],
+    }
+    price_band_item = pd.cut(filtered['price_per_item'], bins=PRICE_BINS, labels=PRICE_LABELS, right=False)
+    summary['price_counts_item'] = price_band_item.value_counts().reindex(PRICE_LABELS, fill_value=0)
+    summary['color_pie'] = None
+    if 'color_clean' in filtered.columns:
+        color_counts = cube_rollup(cube, 'color_clean', **cube_filters)['skus']
+        sorted_colors = color_counts.sort_values(ascending=False)
+        total_colors = sorted_colors.sum()
+        cumsum = sorted_colors.cumsum() / total_colors
+        main_colors = sorted_colors[cumsum <= 0.5]
+        other_colors = sorted_colors[cumsum > 0.5]
+        pie_labels = list(main_colors.index)
+        pie_values = list(main_colors.values)
+        if not other_colors.empty:
+            pie_labels.append('Other')
+            pie_values.append(other_colors.sum())
+        summary['color_pie'] = (pie_labels, pie_values)
+    summary['top_discounted'] = filtered[filtered['discount_pct'] > 0].sort_values('discount_pct', ascending=False).head(10)
+    summary['low_instock'] = None
+    if 'in_stock' in filtered.columns and 'total' in filtered.columns:
+        with_pct = with_in_stock_pct(filtered)
+        summary['low_instock'] = with_pct[with_pct['in_stock_pct'] < 60].sort_values('in_stock_pct').head(10)
+    # Products sold in packs
+    packs_df = filtered[filtered['pack_size'] > 1]
+    summary['pack_counts'] = packs_df['pack_size'].value_counts().sort_index() if not packs_df.empty else None
+    summary['brand_pack_counts'] = observed_counts(packs_df['brand_clean']).head(10) if not packs_df.empty else None
+    return summary
+
 def dashboard_tab(df):
     st.header("Dashboard")
     st.markdown("---")
@@ -498,113 +1124,65 @@ def dashboard_tab(df):
     else:
         subcategories = ['All'] + sorted(df['specific_category'].dropna().unique())
     selected_subcat = st.selectbox("Filter by Subcategory", subcategories, index=0, key='dashboard_subcat')
-    filtered = df.copy()
-    if selected_category != 'All':
-        filtered = filtered[filtered['category_clean'] == selected_category]
-    if selected_subcat != 'All':
-        filtered = filtered[filtered['specific_category'] == selected_subcat]
+    summary = dashboard_summary(df, selected_category, selected_subcat)
     # --- Top Row: KPI Tiles ---
-    total_skus = len(filtered)
-    in_stock = (filtered['in_stock'] > 0).sum() if 'in_stock' in filtered.columns else 0
-    pct_in_stock = (in_stock / total_skus * 100) if total_skus > 0 else 0
-    discounted = (filtered['discount_pct'] > 0).sum()
-    pct_discounted = (discounted / total_skus * 100) if total_skus > 0 else 0
-    avg_discount = filtered.loc[filtered['discount_pct'] > 0, 'discount_pct'].mean() if discounted > 0 else 0
-    avg_price_pack = filtered['final_price'].mean()
-    avg_price_item = filtered['price_per_item'].mean()
-    n_brands = filtered['brand_clean'].nunique()
     col1, col2, col3, col4, col5, col6 = st.columns(6)
-    col1.metric("Total SKUs", f"{total_skus:,}")
-    col2.metric("% In Stock", f"{pct_in_stock:.1f}%")
-    col3.metric("% Discounted", f"{pct_discounted:.1f}%")
-    col4.metric("Avg Discount", f"{avg_discount:.1f}%")
-    col5.metric("Avg Price (Pack)", f"€{avg_price_pack:.2f}")
-    col6.metric("Avg Price (Item)", f"€{avg_price_item:.2f}")
+    col1.metric("Total SKUs", f"{summary['total_skus']:,}")
+    col2.metric("% In Stock", f"{summary['pct_in_stock']:.1f}%")
+    col3.metric("% Discounted", f"{summary['pct_discounted']:.1f}%")
+    col4.metric("Avg Discount", f"{summary['avg_discount']:.1f}%")
+    col5.metric("Avg Price (Pack)", f"€{summary['avg_price_pack']:.2f}")
+    col6.metric("Avg Price (Item)", f"€{summary['avg_price_item']:.2f}")
     st.markdown("---")
     # --- Second Row: Visual Mixes ---
     colA, colB = st.columns(2)
     with colA:
         st.markdown("**Price Band Mix (Per Item)**")
-        price_bins = [0, 20, 30, 40, 50, 60, 1e6]
-        price_labels = ['<20€', '20-30€', '30-40€', '40-50€', '50-60€', '60€+']
-        price_band_item = pd.cut(filtered['price_per_item'], bins=price_bins, labels=price_labels, right=False)
-        price_counts_item = price_band_item.value_counts().reindex(price_labels, fill_value=0)
-        st.plotly_chart(px.bar(x=price_labels, y=price_counts_item.values, labels={'x': 'Price Band (Per Item)', 'y': 'SKUs'}), use_container_width=True)
+        st.plotly_chart(px.bar(x=PRICE_LABELS, y=summary['price_counts_item'].values, labels={'x': 'Price Band (Per Item)', 'y': 'SKUs'}), use_container_width=True)
     with colB:
         st.markdown("**Color Mix**")
-        if 'color_clean' in filtered.columns:
-            color_counts = filtered['color_clean'].value_counts()
-            sorted_colors = color_counts.sort_values(ascending=False)
-            total_colors = sorted_colors.sum()
-            cumsum = sorted_colors.cumsum() / total_colors
-            main_colors = sorted_colors[cumsum <= 0.5]
-            other_colors = sorted_colors[cumsum > 0.5]
-            pie_labels = list(main_colors.index)
-            pie_values = list(main_colors.values)
-            if not other_colors.empty:
-                pie_labels.append('Other')
-                pie_values.append(other_colors.sum())
+        if summary['color_pie'] is not None:
+            pie_labels, pie_values = summary['color_pie']
             st.plotly_chart(px.pie(names=pie_labels, values=pie_values, title=None), use_container_width=True)
     st.markdown("---")
     # --- Third Row: Actionable Tables ---
+    for table in [summary['top_discounted'], summary['low_instock']]:
+        if table is not None:
+            image_cache.prefetch(table.get('main_image', []))
     with st.expander("Top Discounted Products", expanded=False):
-        top_discounted = filtered[filtered['discount_pct'] > 0].sort_values('discount_pct', ascending=False).head(10)
-        for i, row in top_discounted.iterrows():
-            cols = st.columns([1, 3])
-            with cols[0]:
-                img_url = row.get('main_image')
-                if img_url and pd.notna(img_url) and str(img_url).startswith('http'):
-                    st.image(img_url, width=80)
-                else:
-                    st.write("No image")
-            with cols[1]:
-                st.markdown(f"**{row['best_name']}**")
-                st.write(f"€{row['final_price']:.2f}")
-                st.write(f"Discount: {row['discount_pct']:.1f}%")
-                st.write(f"Brand: {row['brand_clean']}")
-                if 'in_stock' in row:
-                    st.write(f"In stock: {row['in_stock']}")
+        product_grid([{
+            'image': row.get('main_image'), 'title': row['best_name'],
+            'lines': [f"€{row['final_price']:.2f}", f"Discount: {row['discount_pct']:.1f}%", f"Brand: {row['brand_clean']}"]
+                     + ([f"In stock: {row['in_stock']}"] if 'in_stock' in row else []),
+        } for row in summary['top_discounted'].to_dict('records')], columns=1, image_width=80, layout='row')
     st.subheader("Most Out-of-Stock Products")
-    if 'in_stock' in filtered.columns and 'total' in filtered.columns:
-        filtered['in_stock_pct'] = (filtered['in_stock'] / filtered['total'] * 100).round(1)
-        low_instock = filtered[filtered['in_stock_pct'] < 60].sort_values('in_stock_pct').head(10)
-        for i, row in low_instock.iterrows():
-            cols = st.columns([1, 3])
-            with cols[0]:
-                img_url = row.get('main_image')
-                if img_url and pd.notna(img_url) and str(img_url).startswith('http'):
-                    st.image(img_url, width=80)
-                else:
-                    st.write("No image")
-            with cols[1]:
-                st.markdown(f"**{row['best_name']}**")
-                st.write(f"€{row['final_price']:.2f}")
-                st.write(f"Brand: {row['brand_clean']}")
-                st.write(f"In-stock: {row['in_stock']} / {row['total']} sizes ({row['in_stock_pct']}%)")
+    if summary['low_instock'] is not None:
+        product_grid([{
+            'image': row.get('main_image'), 'title': row['best_name'],
+            'lines': [f"€{row['final_price']:.2f}", f"Brand: {row['brand_clean']}",
+                      f"In-stock: {row['in_stock']} / {row['total']} sizes ({row['in_stock_pct']}%)"],
+        } for row in summary['low_instock'].to_dict('records')], columns=1, image_width=80, layout='row')
     st.markdown("---")
     # --- Deep Dive Tabs ---
     st.subheader("Deep Dives")
     deepdive_tabs = st.tabs(["Category Deep Dive", "Subcategory Deep Dive"])
     with deepdive_tabs[0]:
         st.info("Select a main category below to see brand, color, and price analytics for that category.")
-        category_deep_dives(filtered)
+        category_deep_dives(df, selected_category, selected_subcat)
     with deepdive_tabs[1]:
         st.info("Select a subcategory below to see brand, color, and price analytics for that subcategory.")
-        deep_dive_by_specific_category(filtered)
+        deep_dive_by_specific_category(df, selected_category, selected_subcat)
 
     # --- Pack Analysis Section ---
     st.markdown("---")
     st.header("Pack Analysis")
 
-    # Filter for products sold in packs
-    packs_df = filtered[filtered['pack_size'] > 1].copy()
-
-    if not packs_df.empty:
+    if summary['pack_counts'] is not None:
         col1, col2 = st.columns(2)
 
         with col1:
             st.markdown("**Distribution of Pack Sizes**")
-            pack_counts = packs_df['pack_size'].value_counts().sort_index()
+            pack_counts = summary['pack_counts']
             st.plotly_chart(px.bar(pack_counts, 
                                    x=pack_counts.index, 
                                    y=pack_counts.values, 
@@ -613,127 +1191,234 @@ def dashboard_tab(df):
 
         with col2:
             st.markdown("**Top 10 Brands Selling in Packs**")
-            brand_pack_counts = packs_df['brand_clean'].value_counts().head(10)
+            brand_pack_counts = summary['brand_pack_counts']
             st.dataframe(brand_pack_counts.reset_index().rename(columns={'index': 'Brand', 'brand_clean': 'SKU Count'}),
                          use_container_width=True)
     else:
         st.info("No products sold in packs match the current filter criteria.")
 
-def virtual_shopping_room(df):
+# --- Product Finder filter index: packed bitmaps per filter value, built once per data version ---
+FINDER_COLUMNS = ['category_clean', 'specific_category', 'brand_clean', 'color_clean']
+FINDER_PRICE_CAP = 60.0  # top of the price slider; a range ending there includes everything above
+
+def build_finder_index(df):
     """
-    Redesigned Product Finder for buyers: quick filters, summary panels, and a product gallery.
+    For each FINDER_COLUMNS value, a np.packbits bitmap of the rows holding it,
+    plus the sorted option lists (subcategories also per category) and the
+    non-null final prices in ascending order with their row positions.
+    """
+    rows = len(df)
+    index = {'rows': rows, 'bitmaps': {}, 'options': {}, 'subcats_by_category': {}}
+    codes, uniques = {}, {}
+    for col in FINDER_COLUMNS:
+        if col not in df.columns:
+            continue
+        codes[col], uniques[col] = pd.factorize(df[col])
+        index['bitmaps'][col] = {value: np.packbits(codes[col] == i) for i, value in enumerate(uniques[col])}
+        index['options'][col] = sorted(index['bitmaps'][col])
+    if 'category_clean' in codes and 'specific_category' in codes:
+        pairs = pd.DataFrame({col: codes[col] for col in ['category_clean', 'specific_category']})
+        pairs = pairs[(pairs >= 0).all(axis=1)].drop_duplicates()
+        for cat, subcats in pairs.groupby('category_clean')['specific_category']:
+            index['subcats_by_category'][uniques['category_clean'][cat]] = \
+                sorted(uniques['specific_category'][subcats.to_numpy()])
+    price = df['final_price'].to_numpy()
+    order = np.argsort(price, kind='stable')
+    order = order[~np.isnan(price[order])]
+    index['price_order'], index['prices'] = order, price[order]
+    index['price_min'] = float(index['prices'][0]) if len(order) else 0.0
+    max_price = float(index['prices'][-1]) if len(order) else 0.0
+    index['price_cap'] = FINDER_PRICE_CAP if max_price > FINDER_PRICE_CAP else max_price
+    return index
+
+def finder_index(df):
+    """build_finder_index() of load_data()'s frame, shared by every session until the data changes."""
+    return _finder_index(df, current_data_version())
+
+@st.cache_resource(max_entries=2, show_spinner=False)
+def _finder_index(_df, data_version):
+    return build_finder_index(_df)
+
+def finder_positions(index, category, subcat, brand, colors, price_range):
+    """Row positions, in frame order, matching the Product Finder filters: an AND of the bitmaps."""
+    empty = np.zeros((index['rows'] + 7) // 8, dtype=np.uint8)
+    prices = index['prices']
+    low, high = np.asarray(price_range, dtype=prices.dtype)
+    start = np.searchsorted(prices, low, side='left')
+    stop = len(prices) if price_range[1] == index['price_cap'] == FINDER_PRICE_CAP \
+        else np.searchsorted(prices, high, side='right')
+    in_range = np.zeros(index['rows'], dtype=bool)
+    in_range[index['price_order'][start:stop]] = True
+    selected = np.packbits(in_range)
+    for col, value in [('category_clean', category), ('specific_category', subcat), ('brand_clean', brand)]:
+        if value != 'All':
+            selected &= index['bitmaps'][col].get(value, empty)
+    if colors:
+        bitmaps = index['bitmaps']['color_clean']
+        selected &= np.bitwise_or.reduce([bitmaps.get(color, empty) for color in colors])
+    return np.flatnonzero(np.unpackbits(selected, count=index['rows']))
+
+# --- Product search: token inverted index over names, brands, colours, subcategories and sizes ---
+# Score of a match in each field; a product matching a term in several fields adds them up
+SEARCH_FIELDS = {'brand_clean': 3.0, 'specific_category': 2.0, 'color_clean': 2.0, 'best_name': 1.0}
+SEARCH_SIZE_WEIGHT = 1.0
+SEARCH_PREFIX_WEIGHT = 0.5  # share of the score a term gets for a token it only prefixes
+SEARCH_TOKEN = re.compile(r'\w+')
+SEARCH_MAX_CHAR = '\U0010ffff'
+
+def search_tokens(text):
+    """Lower-cased word tokens of `text`: 'Push-up Bra 75B' -> ['push', 'up', 'bra', '75b']."""
+    return SEARCH_TOKEN.findall(str(text).casefold())
+
+def _search_postings(row_ids, values, weight, token_ids):
+    """
+    (token id, row, weight) for every token of every value; each distinct value
+    is tokenised once, and new tokens are numbered in `token_ids`.
+    """
+    codes, uniques = pd.factorize(values)
+    vocab = pd.DataFrame({'code': np.arange(len(uniques)), 'token': [search_tokens(v) for v in uniques]})
+    vocab = vocab.explode('token').dropna()
+    vocab['token'] = [token_ids.setdefault(token, len(token_ids)) for token in vocab['token']]
+    rows = pd.DataFrame({'code': codes, 'row': row_ids})
+    return rows.merge(vocab, on='code')[['token', 'row']].assign(weight=weight)
+
+def build_search_index(df, sizes=None):
+    """
+    Inverted index of SEARCH_FIELDS and, if given, the size table's size codes:
+    a sorted token array, and for each token a slice (via offsets) of ascending
+    row positions with their summed field weights.
+    """
+    token_ids = {}
+    frames = [_search_postings(np.arange(len(df), dtype='int32'), df[col], weight, token_ids)
+              for col, weight in SEARCH_FIELDS.items() if col in df.columns]
+    if sizes is not None and not sizes.empty:
+        frames.append(_search_postings(sizes['row_id'].to_numpy(), sizes['size'], SEARCH_SIZE_WEIGHT, token_ids))
+    tokens = np.array(list(token_ids), dtype=str)
+    # Renumber the tokens in sorted order, so postings grouped by id are grouped alphabetically
+    order = np.argsort(tokens, kind='stable')
+    rank = np.empty(len(order), dtype='int32')
+    rank[order] = np.arange(len(order))
+    postings = pd.concat(frames, ignore_index=True) if frames else pd.DataFrame({'token': [], 'row': [], 'weight': []})
+    # One int64 key per (token, row), so sorting and summing duplicates is plain numpy
+    keys = rank[postings['token'].to_numpy(dtype='int64')].astype('int64') * (len(df) + 1) \
+        + postings['row'].to_numpy(dtype='int64')
+    keys, inverse = np.unique(keys, return_inverse=True)
+    weights = np.bincount(inverse, weights=postings['weight'].to_numpy(), minlength=len(keys))
+    counts = np.bincount(keys // (len(df) + 1), minlength=len(tokens))
+    return {
+        'rows': len(df),
+        'tokens': tokens[order],
+        'offsets': np.concatenate([[0], np.cumsum(counts)]),
+        'postings': (keys % (len(df) + 1)).astype('int32'),
+        'weights': weights.astype('float32'),
+    }
+
+def search_index(df):
+    """build_search_index() of load_data()'s frame and size table, shared by every session until the data changes."""
+    return _search_index(df, current_data_version())
+
+@st.cache_resource(max_entries=2, show_spinner=False)
+def _search_index(_df, data_version):
+    return build_search_index(_df, load_size_table())
+
+def search_positions(index, query):
+    """
+    Row positions matching every term of `query`, best score first (ties in
+    frame order). A term matches the tokens it is a prefix of, scoring an
+    exact token fully and the others at SEARCH_PREFIX_WEIGHT. None if the
+    query has no terms.
+    """
+    terms = list(dict.fromkeys(search_tokens(query)))
+    if not terms:
+        return None
+    tokens, offsets = index['tokens'], index['offsets']
+    matched = np.ones(index['rows'], dtype=bool)
+    total = np.zeros(index['rows'], dtype=np.float32)
+    for term in terms:
+        first = np.searchsorted(tokens, term, side='left')
+        last = np.searchsorted(tokens, term + SEARCH_MAX_CHAR, side='left')
+        rows = index['postings'][offsets[first]:offsets[last]]
+        weights = index['weights'][offsets[first]:offsets[last]] * SEARCH_PREFIX_WEIGHT
+        if first < last and tokens[first] == term:
+            weights[:offsets[first + 1] - offsets[first]] /= SEARCH_PREFIX_WEIGHT
+        scores = np.zeros(index['rows'], dtype=np.float32)
+        np.maximum.at(scores, rows, weights)
+        matched &= scores > 0
+        total += scores
+    hits = np.flatnonzero(matched)
+    return hits[np.argsort(-total[hits], kind='stable')]
+
+def finder_rows(df, category, subcat, brand, colors, price_range, query=''):
+    """
+    Rows matching the Product Finder filters and search `query`, ranked by
+    search score when there is one; a price range ending at the 60€ cap
+    includes everything above it.
+    """
+    positions = finder_positions(finder_index(df), category, subcat, brand, colors, price_range)
+    ranked = search_positions(search_index(df), query) if query else None
+    if ranked is not None:
+        selected = np.zeros(len(df), dtype=bool)
+        selected[positions] = True
+        positions = ranked[selected[ranked]]
+    return df.take(positions)
+
+@view_cache
+def finder_summary(df, category, subcat, brand, colors, price_range, query=''):
+    """Brand and colour mixes and discount / stock figures for the Product Finder filters and search."""
+    filtered = finder_rows(df, category, subcat, brand, colors, price_range, query)
+    summary = {'total_products': len(filtered), 'brand_pie': None, 'color_counts': None}
+    brand_counts = observed_counts(filtered['brand_clean'])
+    if not brand_counts.empty:
+        # Sort brands by count descending
+        sorted_counts = brand_counts.sort_values(ascending=False)
+        total = sorted_counts.sum()
+        cumsum = sorted_counts.cumsum() / total
+        # Brands to show individually: those before the last 50% of volume
+        main_brands = sorted_counts[cumsum <= 0.5]
+        other_brands = sorted_counts[cumsum > 0.5]
+        pie_labels = list(main_brands.index)
+        pie_values = list(main_brands.values)
+        if not other_brands.empty:
+            pie_labels.append('Other')
+            pie_values.append(other_brands.sum())
+        summary['brand_pie'] = (pie_labels, pie_values)
+    if 'color_clean' in filtered.columns:
+        summary['color_counts'] = observed_counts(filtered['color_clean'])
+    discounted = (filtered['discount_pct'] > 0).sum()
+    summary['avg_discount'] = filtered.loc[filtered['discount_pct'] > 0, 'discount_pct'].mean() if discounted > 0 else 0
+    summary['pct_discounted'] = (discounted / len(filtered) * 100) if len(filtered) > 0 else 0
+    summary['out_of_stock'] = (filtered['in_stock'] == 0).sum() if 'in_stock' in filtered.columns else 0
+    return summary
+
+def finder_card(prod):
+    """product_grid() card of a Product Finder row: price, discount, colour, brand, stock and link."""
+    lines = [f"€{prod['final_price']:.2f}"]
+    if prod.get('discount_pct', 0) > 0:
+        lines.append((f"-{prod['discount_pct']:.0f}%", 'discount'))
+    if 'color_clean' in prod and pd.notna(prod['color_clean']):
+        lines.append(f"Color: {prod['color_clean']}")
+    lines.append(f"Brand: {prod['brand_clean']}")
+    if 'in_stock' in prod:
+        lines.append(("Out of stock", 'muted') if prod['in_stock'] == 0 else f"In stock: {prod['in_stock']}")
+    return {'image': prod.get('main_image'), 'title': prod['best_name'], 'lines': lines, 'link': prod.get('product_url')}
+
+@st.fragment
+def product_gallery(df, filters, total_products):
+    """
+    Page control, product grid and detail panel of the Product Finder for the
+    finder_rows() `filters`. Runs as a fragment, so paging or closing the
+    details reruns only this part of the page.
     """
-    st.header("Product Finder")
-    # --- Quick Filters ---
-    col1, col2, col3, col4 = st.columns([2,2,2,2])
-    with col1:
-        categories = ['All'] + sorted(df['category_clean'].dropna().unique())
-        selected_category = st.selectbox("Category", categories)
-    with col2:
-        if selected_category != 'All':
-            subcats = ['All'] + sorted(df[df['category_clean'] == selected_category]['specific_category'].dropna().unique())
-        else:
-            subcats = ['All'] + sorted(df['specific_category'].dropna().unique())
-        selected_subcat = st.selectbox("Subcategory", subcats)
-    with col3:
-        brands = ['All'] + sorted(df['brand_clean'].dropna().unique())
-        selected_brand = st.selectbox("Brand", brands)
-    with col4:
-        if 'color_clean' in df.columns:
-            color_options = sorted(df['color_clean'].dropna().unique())
-            selected_colors = st.multiselect("Color(s)", color_options, default=[])
-        else:
-            selected_colors = []
-    # --- Price Range Slider (capped at 60 EUR, 60+ means everything above) ---
-    min_price = float(df['final_price'].min())
-    max_slider = 60.0 if df['final_price'].max() > 60 else float(df['final_price'].max())
-    price_range = st.slider("Price Range (€)", min_value=min_price, max_value=max_slider, value=(min_price, max_slider), step=1.0)
-    filtered = df.copy()
-    if price_range[1] == max_slider and max_slider == 60.0:
-        filtered = filtered[(filtered['final_price'] >= price_range[0])]
-    else:
-        filtered = filtered[(filtered['final_price'] >= price_range[0]) & (filtered['final_price'] <= price_range[1])]
-    # --- Filtering ---
-    if selected_category != 'All':
-        filtered = filtered[filtered['category_clean'] == selected_category]
-    if selected_subcat != 'All':
-        filtered = filtered[filtered['specific_category'] == selected_subcat]
-    if selected_brand != 'All':
-        filtered = filtered[filtered['brand_clean'] == selected_brand]
-    if selected_colors:
-        filtered = filtered[filtered['color_clean'].isin(selected_colors)]
-    # --- Summary Panels ---
-    st.markdown("---")
-    colA, colB, colC = st.columns(3)
-    with colA:
-        st.markdown("**Brand Mix**")
-        brand_counts = filtered['brand_clean'].value_counts()
-        if not brand_counts.empty:
-            # Sort brands by count descending
-            sorted_counts = brand_counts.sort_values(ascending=False)
-            total = sorted_counts.sum()
-            cumsum = sorted_counts.cumsum() / total
-            # Brands to show individually: those before the last 50% of volume
-            main_brands = sorted_counts[cumsum <= 0.5]
-            other_brands = sorted_counts[cumsum > 0.5]
-            pie_labels = list(main_brands.index)
-            pie_values = list(main_brands.values)
-            if not other_brands.empty:
-                pie_labels.append('Other')
-                pie_values.append(other_brands.sum())
-            st.plotly_chart(px.pie(names=pie_labels, values=pie_values, title=None), use_container_width=True)
-        else:
-            st.info("No brands in selection.")
-    with colB:
-        st.markdown("**Color Mix**")
-        if 'color_clean' in filtered.columns:
-            color_counts = filtered['color_clean'].value_counts()
-            if not color_counts.empty and color_counts.shape[0] > 1:
-                st.plotly_chart(px.pie(names=color_counts.index, values=color_counts.values, title=None), use_container_width=True)
-        # else: do not show anything if no color data
-    with colC:
-        st.markdown("**Discounted & Out-of-Stock**")
-        discounted = (filtered['discount_pct'] > 0).sum()
-        total_styles = len(filtered)
-        avg_discount = filtered.loc[filtered['discount_pct'] > 0, 'discount_pct'].mean() if discounted > 0 else 0
-        pct_discounted = (discounted / total_styles * 100) if total_styles > 0 else 0
-        out_of_stock = (filtered['in_stock'] == 0).sum() if 'in_stock' in filtered.columns else 0
-        st.metric("% Discounted", f"{pct_discounted:.1f}%")
-        st.metric("Avg Discount", f"{avg_discount:.1f}%")
-        st.metric("Out of Stock", out_of_stock)
-    st.markdown("---")
     # --- Product Gallery (Paginated Grid) ---
     page_size = 20
-    total_products = len(filtered)
-    page = st.number_input("Page", min_value=1, max_value=max(1, (total_products-1)//page_size+1), value=1, step=1)
+    page = st.number_input("Page", min_value=1, max_value=max(1, (total_products-1)//page_size+1), value=1, step=1, key='viewer_page')
     start = (page-1)*page_size
     end = start+page_size
-    gallery = filtered.iloc[start:end]
-    n_cols = 5
-    for i in range(0, len(gallery), n_cols):
-        row = gallery.iloc[i:i+n_cols]
-        cols = st.columns(n_cols)
-        for j, (_, prod) in enumerate(row.iterrows()):
-            with cols[j]:
-                img_url = prod.get('main_image')
-                if img_url and pd.notna(img_url) and str(img_url).startswith('http'):
-                    st.image(img_url, width=120)
-                else:
-                    st.write("No image")
-                st.markdown(f"**{prod['best_name']}**")
-                st.write(f"€{prod['final_price']:.2f}")
-                if prod.get('discount_pct', 0) > 0:
-                    st.markdown(f"<span style='color:red;font-weight:bold'>-{prod['discount_pct']:.0f}%</span>", unsafe_allow_html=True)
-                if 'color_clean' in prod and pd.notna(prod['color_clean']):
-                    st.write(f"Color: {prod['color_clean']}")
-                st.write(f"Brand: {prod['brand_clean']}")
-                if 'in_stock' in prod:
-                    if prod['in_stock'] == 0:
-                        st.markdown(f"<span style='color:gray'>Out of stock</span>", unsafe_allow_html=True)
-                    else:
-                        st.write(f"In stock: {prod['in_stock']}")
-                if 'product_url' in prod and pd.notna(prod['product_url']):
-                    st.markdown(f"[View on Zalando]({prod['product_url']})", unsafe_allow_html=True)
+    rows = finder_rows(df, *filters)
+    gallery = rows.iloc[start:end]
+    # This page's thumbnails download side by side, the next page's ahead of paging
+    image_cache.prefetch(rows['main_image'].iloc[start:end+page_size])
+    product_grid([finder_card(prod) for prod in gallery.to_dict('records')], columns=5, image_width=120)
     # --- Product Modal ---
     if 'modal_sku' in st.session_state:
         sku = st.session_state['modal_sku']
@@ -741,7 +1426,7 @@ def virtual_shopping_room(df):
         with st.expander(f"Product Details: {prod['best_name']}", expanded=True):
             img_url = prod.get('main_image')
             if img_url and pd.notna(img_url) and str(img_url).startswith('http'):
-                st.image(img_url, width=200)
+                product_image(img_url, width=200)
             st.write(f"Price: €{prod['final_price']:.2f}")
             st.write(f"Discount: {prod['discount_pct']:.1f}%")
             st.write(f"Brand: {prod['brand_clean']}")
@@ -758,11 +1443,67 @@ def virtual_shopping_room(df):
                         st.dataframe(size_df[['size', 'availability']], use_container_width=True)
                 except Exception:
                     pass
-            if st.button("Close Details"):
-                del st.session_state['modal_sku']
+            # Cleared in the callback, before the fragment reruns, so the panel closes on this click
+            st.button("Close Details", on_click=st.session_state.pop, args=('modal_sku', None))
     if total_products == 0:
         st.info("No products match your filters.")
 
+def virtual_shopping_room(df):
+    """
+    Redesigned Product Finder for buyers: quick filters, summary panels, and a product gallery.
+    """
+    st.header("Product Finder")
+    query = st.text_input("Search", placeholder="e.g. lace balconette 75B", key='viewer_search')
+    # --- Quick Filters ---
+    index = finder_index(df)
+    options = index['options']
+    col1, col2, col3, col4 = st.columns([2,2,2,2])
+    with col1:
+        categories = ['All'] + options['category_clean']
+        selected_category = st.selectbox("Category", categories, key='viewer_category')
+    with col2:
+        if selected_category != 'All':
+            subcats = ['All'] + index['subcats_by_category'].get(selected_category, [])
+        else:
+            subcats = ['All'] + options['specific_category']
+        selected_subcat = st.selectbox("Subcategory", subcats, key='viewer_subcat')
+    with col3:
+        brands = ['All'] + options['brand_clean']
+        selected_brand = st.selectbox("Brand", brands, key='viewer_brand')
+    with col4:
+        if 'color_clean' in options:
+            selected_colors = st.multiselect("Color(s)", options['color_clean'], default=[], key='viewer_colors')
+        else:
+            selected_colors = []
+    # --- Price Range Slider (capped at 60 EUR, 60+ means everything above) ---
+    min_price, max_slider = index['price_min'], index['price_cap']
+    price_range = st.slider("Price Range (€)", min_value=min_price, max_value=max_slider, value=(min_price, max_slider), step=1.0, key='viewer_price')
+    summary = finder_summary(df, selected_category, selected_subcat, selected_brand, selected_colors, price_range, query)
+    # --- Summary Panels ---
+    st.markdown("---")
+    colA, colB, colC = st.columns(3)
+    with colA:
+        st.markdown("**Brand Mix**")
+        if summary['brand_pie'] is not None:
+            pie_labels, pie_values = summary['brand_pie']
+            st.plotly_chart(px.pie(names=pie_labels, values=pie_values, title=None), use_container_width=True)
+        else:
+            st.info("No brands in selection.")
+    with colB:
+        st.markdown("**Color Mix**")
+        color_counts = summary['color_counts']
+        if color_counts is not None and not color_counts.empty and color_counts.shape[0] > 1:
+            st.plotly_chart(px.pie(names=color_counts.index, values=color_counts.values, title=None), use_container_width=True)
+        # else: do not show anything if no color data
+    with colC:
+        st.markdown("**Discounted & Out-of-Stock**")
+        st.metric("% Discounted", f"{summary['pct_discounted']:.1f}%")
+        st.metric("Avg Discount", f"{summary['avg_discount']:.1f}%")
+        st.metric("Out of Stock", summary['out_of_stock'])
+    st.markdown("---")
+    product_gallery(df, (selected_category, selected_subcat, selected_brand, selected_colors, price_range, query),
+                    summary['total_products'])
+
 def executive_summary(df):
     """
     Streamlit interface for the Executive Summary.
@@ -780,8 +1521,9 @@ def market_share_by_brand(df):
     Streamlit interface for Market Share by Brand.
     """
     st.header("Market Share by Brand (Top 15 + Dorina)")
-    brand_counts = df['brand_clean'].value_counts().head(15)
-    dorina_count = df[df['brand_clean'].str.lower() == 'dorina'].shape[0]
+    all_brand_counts = cube_rollup(load_cube(), 'brand_clean')['skus'].sort_values(ascending=False)
+    brand_counts = all_brand_counts.head(15)
+    dorina_count = all_brand_counts[all_brand_counts.index.str.lower() == 'dorina'].sum()
     brand_counts = ensure_dorina_in_series(brand_counts, dorina_count)
     # Chart
     fig = px.bar(
@@ -804,13 +1546,14 @@ def average_price_by_brand(df):
     st.header("Average Price by Brand (Top 15 + Dorina)")
     
     # Get top 15 brands by product count
-    top_brands_by_count = df['brand_clean'].value_counts().head(15).index.tolist()
+    by_brand = cube_rollup(load_cube(), 'brand_clean')
+    top_brands_by_count = by_brand['skus'].sort_values(ascending=False).head(15).index.tolist()
     if 'Dorina' not in [b.title() for b in top_brands_by_count]:
         top_brands_by_count.append('Dorina')
 
     # Calculate both pack and item prices
-    brand_prices_pack = df[df['brand_clean'].isin(top_brands_by_count)].groupby('brand_clean')['final_price'].mean()
-    brand_prices_item = df[df['brand_clean'].isin(top_brands_by_count)].groupby('brand_clean')['price_per_item'].mean()
+    brand_prices_pack = by_brand['avg_price']
+    brand_prices_item = by_brand['avg_price_per_item']
     
     # Combine into a single DataFrame for charting
     price_comparison_df = pd.DataFrame({
@@ -840,166 +1583,151 @@ def average_price_by_brand(df):
     # Table
     st.dataframe(smart_style(price_comparison_df.set_index('Brand')), use_container_width=True)
 
-def category_deep_dives(df):
-    st.markdown("---")
-    st.header("Category Deep Dive")
-    categories = sorted(df['category_clean'].dropna().unique())
-    selected_category = st.selectbox("Select a main category to deep dive:", categories, key='cat_deepdive')
-    cat_df = df[df['category_clean'] == selected_category]
-    brands = sorted(cat_df['brand_clean'].dropna().unique())
-    dorina_idx = brands.index('Dorina') if 'Dorina' in brands else 0
-    selected_brand = st.selectbox("Brand to Compare", ['All'] + brands, index=dorina_idx+1 if 'Dorina' in brands else 0, key='cat_brand_compare')
-    if selected_brand != 'All':
-        filtered = cat_df[cat_df['brand_clean'] == selected_brand]
-    else:
-        filtered = cat_df.copy()
-    # --- KPI Tiles ---
+def with_in_stock_pct(df):
+    """Adds in_stock_pct (in-stock sizes as a % of all sizes) when the size counts are there."""
+    if 'in_stock' in df.columns and 'total' in df.columns:
+        return df.assign(in_stock_pct=(df['in_stock'] / df['total'] * 100).round(1))
+    return df
+
+@view_cache
+def deep_dive_summary(df, category, subcat, level, value, brand):
+    """
+    Figures for a deep dive into the rows where `level` == `value` (within the
+    dashboard's category/subcategory filters), comparing `brand` ('All' for
+    every brand) with the whole area.
+    """
+    area_df = dashboard_rows(df, category, subcat)
+    area_df = area_df[area_df[level] == value]
+    filtered = area_df[area_df['brand_clean'] == brand] if brand != 'All' else area_df
     total_skus = len(filtered)
-    n_brands = filtered['brand_clean'].nunique()
-    avg_price = filtered['final_price'].mean()
     discounted = (filtered['discount_pct'] > 0).sum()
-    pct_discounted = (discounted / total_skus * 100) if total_skus > 0 else 0
-    avg_discount = filtered.loc[filtered['discount_pct'] > 0, 'discount_pct'].mean() if discounted > 0 else 0
     in_stock = (filtered['in_stock'] > 0).sum() if 'in_stock' in filtered.columns else 0
-    pct_in_stock = (in_stock / total_skus * 100) if total_skus > 0 else 0
-    top_color = filtered['color_clean'].mode()[0] if 'color_clean' in filtered.columns and not filtered['color_clean'].mode().empty else 'N/A'
-    top_brand = filtered['brand_clean'].mode()[0] if not filtered['brand_clean'].mode().empty else 'N/A'
-    # --- Comparative Visuals ---
-    st.markdown("---")
-    st.subheader("Brand vs. Category Comparison")
-    # --- Average Price by Brand (top 10 + selected) ---
-    brand_counts = cat_df['brand_clean'].value_counts()
-    top_brands = brand_counts.head(10).index.tolist()
-    if selected_brand != 'All' and selected_brand not in top_brands:
-        top_brands.append(selected_brand)
-    avg_price_by_brand = cat_df[cat_df['brand_clean'].isin(top_brands)].groupby('brand_clean')['final_price'].mean().reindex(top_brands)
+    area_in_stock = (area_df['in_stock'] > 0).sum() if 'in_stock' in area_df.columns else 0
+    # Top 10 brands of the area, plus the selected one
+    top_brands = observed_counts(area_df['brand_clean']).head(10).index.tolist()
+    if brand != 'All' and brand not in top_brands:
+        top_brands.append(brand)
+    by_brand = area_df[area_df['brand_clean'].isin(top_brands)].groupby('brand_clean', observed=True)
+    brand_band = pd.cut(filtered['final_price'], bins=PRICE_BINS, labels=PRICE_LABELS, right=False)
+    area_band = pd.cut(area_df['final_price'], bins=PRICE_BINS, labels=PRICE_LABELS, right=False)
+    return {
+        'avg_discount': filtered.loc[filtered['discount_pct'] > 0, 'discount_pct'].mean() if discounted > 0 else 0,
+        'pct_in_stock': (in_stock / total_skus * 100) if total_skus > 0 else 0,
+        'area_avg_discount': area_df.loc[area_df['discount_pct'] > 0, 'discount_pct'].mean(),
+        'area_pct_in_stock': (area_in_stock / len(area_df) * 100) if len(area_df) > 0 else 0,
+        'avg_price_by_brand': by_brand['final_price'].mean().reindex(top_brands),
+        'sku_count_by_brand': by_brand.size().reindex(top_brands),
+        'brand_colors': observed_counts(filtered['color_clean']),
+        'area_colors': observed_counts(area_df['color_clean']),
+        'brand_bands': brand_band.value_counts(normalize=True).reindex(PRICE_LABELS, fill_value=0),
+        'area_bands': area_band.value_counts(normalize=True).reindex(PRICE_LABELS, fill_value=0),
+    }
+
+def brand_bar_charts(summary, selected_brand, key_prefix):
+    """Average price and SKU count of the area's top brands, the selected one highlighted."""
+    avg_price_by_brand = summary['avg_price_by_brand']
     highlight_color = ['#e74c3c' if b == selected_brand else '#3498db' for b in avg_price_by_brand.index]
     fig_price = px.bar(x=avg_price_by_brand.index, y=avg_price_by_brand.values, color=avg_price_by_brand.index,
                       color_discrete_sequence=highlight_color,
                       labels={'x': 'Brand', 'y': 'Avg Price (€)'}, title="Average Price by Brand")
-    st.plotly_chart(fig_price, use_container_width=True)
+    st.plotly_chart(fig_price, use_container_width=True, key=f'{key_prefix}_price')
     # --- SKU Count by Brand (top 10 + selected) ---
-    sku_count_by_brand = cat_df[cat_df['brand_clean'].isin(top_brands)].groupby('brand_clean').size().reindex(top_brands)
+    sku_count_by_brand = summary['sku_count_by_brand']
     fig_count = px.bar(x=sku_count_by_brand.index, y=sku_count_by_brand.values, color=sku_count_by_brand.index,
                       color_discrete_sequence=highlight_color,
                       labels={'x': 'Brand', 'y': 'SKU Count'}, title="SKU Count by Brand")
-    st.plotly_chart(fig_count, use_container_width=True)
+    st.plotly_chart(fig_count, use_container_width=True, key=f'{key_prefix}_count')
+
+def category_deep_dives(df, dashboard_category='All', dashboard_subcat='All'):
+    st.markdown("---")
+    st.header("Category Deep Dive")
+    area_rows = dashboard_rows(df, dashboard_category, dashboard_subcat)
+    categories = sorted(area_rows['category_clean'].dropna().unique())
+    selected_category = st.selectbox("Select a main category to deep dive:", categories, key='cat_deepdive')
+    cat_df = area_rows[area_rows['category_clean'] == selected_category]
+    brands = sorted(cat_df['brand_clean'].dropna().unique())
+    dorina_idx = brands.index('Dorina') if 'Dorina' in brands else 0
+    selected_brand = st.selectbox("Brand to Compare", ['All'] + brands, index=dorina_idx+1 if 'Dorina' in brands else 0, key='cat_brand_compare')
+    summary = deep_dive_summary(df, dashboard_category, dashboard_subcat, 'category_clean', selected_category, selected_brand)
+    # --- Comparative Visuals ---
+    st.markdown("---")
+    st.subheader("Brand vs. Category Comparison")
+    # --- Average Price by Brand (top 10 + selected) ---
+    brand_bar_charts(summary, selected_brand, 'cat')
     # --- Color Mix: Separate Bar Charts, Top 10 Colors by Category/Subcategory ---
     st.markdown("**Color Mix (SKU Count)**")
-    cat_color = cat_df['color_clean'].value_counts().head(10)
+    cat_color = summary['area_colors'].head(10)
     color_order = cat_color.index.tolist()
-    brand_color = filtered['color_clean'].value_counts().reindex(color_order, fill_value=0)
+    brand_color = summary['brand_colors'].reindex(color_order, fill_value=0)
     # Category chart
     fig_cat_color = px.bar(x=color_order, y=cat_color.values,
                           labels={'x': 'Color', 'y': 'SKU Count'}, title="Category Color Mix (Top 10)")
-    st.plotly_chart(fig_cat_color, use_container_width=True)
+    st.plotly_chart(fig_cat_color, use_container_width=True, key='cat_color')
     # Brand chart
     fig_brand_color = px.bar(x=color_order, y=brand_color.values,
                             labels={'x': 'Color', 'y': 'SKU Count'}, title=f"{selected_brand} Color Mix (Top 10)")
-    st.plotly_chart(fig_brand_color, use_container_width=True)
+    st.plotly_chart(fig_brand_color, use_container_width=True, key='cat_brand_color')
     # --- Price Band Mix (side-by-side barchart) ---
     st.markdown("**Price Band Mix**")
-    price_bins = [0, 20, 30, 40, 50, 60, 1e6]
-    price_labels = ['<20€', '20-30€', '30-40€', '40-50€', '50-60€', '60€+']
-    brand_band = pd.cut(filtered['final_price'], bins=price_bins, labels=price_labels, right=False)
-    cat_band = pd.cut(cat_df['final_price'], bins=price_bins, labels=price_labels, right=False)
-    band_df = pd.DataFrame({selected_brand: brand_band.value_counts(normalize=True).reindex(price_labels, fill_value=0),
-                           'Category': cat_band.value_counts(normalize=True).reindex(price_labels, fill_value=0)}, index=price_labels)
+    band_df = pd.DataFrame({selected_brand: summary['brand_bands'], 'Category': summary['area_bands']}, index=PRICE_LABELS)
     fig_band = px.bar(band_df.reset_index(), x='index', y=[selected_brand, 'Category'], barmode='group',
                      labels={'value': 'Share', 'index': 'Price Band'}, title="Price Band Mix: Brand vs. Category")
-    st.plotly_chart(fig_band, use_container_width=True)
+    st.plotly_chart(fig_band, use_container_width=True, key='cat_band')
     # --- Metric Cards for Discount and In-Stock % ---
     st.markdown("---")
     st.subheader("Brand vs. Category Metrics")
-    cat_avg_discount = cat_df.loc[cat_df['discount_pct'] > 0, 'discount_pct'].mean()
-    cat_in_stock = (cat_df['in_stock'] > 0).sum() if 'in_stock' in cat_df.columns else 0
-    cat_pct_in_stock = (cat_in_stock / len(cat_df) * 100) if len(cat_df) > 0 else 0
     col1, col2 = st.columns(2)
-    col1.metric("Avg Discount", f"{avg_discount:.1f}%", delta=f"vs {cat_avg_discount:.1f}% category avg")
-    col2.metric("% In Stock", f"{pct_in_stock:.1f}%", delta=f"vs {cat_pct_in_stock:.1f}% category avg")
+    col1.metric("Avg Discount", f"{summary['avg_discount']:.1f}%", delta=f"vs {summary['area_avg_discount']:.1f}% category avg")
+    col2.metric("% In Stock", f"{summary['pct_in_stock']:.1f}%", delta=f"vs {summary['area_pct_in_stock']:.1f}% category avg")
     # --- Raw Data Table ---
     st.markdown("---")
     st.subheader("Filtered Data Table")
-    st.dataframe(filtered, use_container_width=True)
+    filtered = cat_df[cat_df['brand_clean'] == selected_brand] if selected_brand != 'All' else cat_df
+    paged_table(with_in_stock_pct(filtered), 'cat_table', columns=DATA_TABLE_COLUMNS)
 
-def deep_dive_by_specific_category(df):
+def deep_dive_by_specific_category(df, dashboard_category='All', dashboard_subcat='All'):
     st.markdown("---")
     st.header("Subcategory Deep Dive")
-    subcategories = sorted(df['specific_category'].dropna().unique())
+    area_rows = dashboard_rows(df, dashboard_category, dashboard_subcat)
+    subcategories = sorted(area_rows['specific_category'].dropna().unique())
     selected_subcat = st.selectbox("Select a subcategory to deep dive:", subcategories, key='subcat_deepdive')
-    subcat_df = df[df['specific_category'] == selected_subcat]
+    subcat_df = area_rows[area_rows['specific_category'] == selected_subcat]
     brands = sorted(subcat_df['brand_clean'].dropna().unique())
     dorina_idx = brands.index('Dorina') if 'Dorina' in brands else 0
     selected_brand = st.selectbox("Brand to Compare", ['All'] + brands, index=dorina_idx+1 if 'Dorina' in brands else 0, key='subcat_brand_compare')
-    if selected_brand != 'All':
-        filtered = subcat_df[subcat_df['brand_clean'] == selected_brand]
-    else:
-        filtered = subcat_df.copy()
-    # --- KPI Tiles ---
-    total_skus = len(filtered)
-    n_brands = filtered['brand_clean'].nunique()
-    avg_price = filtered['final_price'].mean()
-    discounted = (filtered['discount_pct'] > 0).sum()
-    pct_discounted = (discounted / total_skus * 100) if total_skus > 0 else 0
-    avg_discount = filtered.loc[filtered['discount_pct'] > 0, 'discount_pct'].mean() if discounted > 0 else 0
-    in_stock = (filtered['in_stock'] > 0).sum() if 'in_stock' in filtered.columns else 0
-    pct_in_stock = (in_stock / total_skus * 100) if total_skus > 0 else 0
-    top_color = filtered['color_clean'].mode()[0] if 'color_clean' in filtered.columns and not filtered['color_clean'].mode().empty else 'N/A'
-    top_brand = filtered['brand_clean'].mode()[0] if not filtered['brand_clean'].mode().empty else 'N/A'
+    summary = deep_dive_summary(df, dashboard_category, dashboard_subcat, 'specific_category', selected_subcat, selected_brand)
     # --- Comparative Visuals ---
     st.markdown("---")
     st.subheader("Brand vs. Subcategory Comparison")
     # --- Average Price by Brand (top 10 + selected) ---
-    brand_counts = subcat_df['brand_clean'].value_counts()
-    top_brands = brand_counts.head(10).index.tolist()
-    if selected_brand != 'All' and selected_brand not in top_brands:
-        top_brands.append(selected_brand)
-    avg_price_by_brand = subcat_df[subcat_df['brand_clean'].isin(top_brands)].groupby('brand_clean')['final_price'].mean().reindex(top_brands)
-    highlight_color = ['#e74c3c' if b == selected_brand else '#3498db' for b in avg_price_by_brand.index]
-    fig_price = px.bar(x=avg_price_by_brand.index, y=avg_price_by_brand.values, color=avg_price_by_brand.index,
-                      color_discrete_sequence=highlight_color,
-                      labels={'x': 'Brand', 'y': 'Avg Price (€)'}, title="Average Price by Brand")
-    st.plotly_chart(fig_price, use_container_width=True)
-    # --- SKU Count by Brand (top 10 + selected) ---
-    sku_count_by_brand = subcat_df[subcat_df['brand_clean'].isin(top_brands)].groupby('brand_clean').size().reindex(top_brands)
-    fig_count = px.bar(x=sku_count_by_brand.index, y=sku_count_by_brand.values, color=sku_count_by_brand.index,
-                      color_discrete_sequence=highlight_color,
-                      labels={'x': 'Brand', 'y': 'SKU Count'}, title="SKU Count by Brand")
-    st.plotly_chart(fig_count, use_container_width=True)
+    brand_bar_charts(summary, selected_brand, 'subcat')
     # --- Color Mix (side-by-side barchart, absolute SKU count) ---
     st.markdown("**Color Mix (SKU Count)**")
-    brand_color = filtered['color_clean'].value_counts()
-    subcat_color = subcat_df['color_clean'].value_counts()
+    brand_color = summary['brand_colors']
+    subcat_color = summary['area_colors']
     color_index = list(set(brand_color.index).union(subcat_color.index))
     color_df = pd.DataFrame({selected_brand: brand_color.reindex(color_index, fill_value=0),
                             'Subcategory': subcat_color.reindex(color_index, fill_value=0)}, index=color_index)
     fig_color = px.bar(color_df.reset_index(), x='index', y=[selected_brand, 'Subcategory'], barmode='group',
                       labels={'value': 'SKU Count', 'index': 'Color'}, title="Color Mix (SKU Count): Brand vs. Subcategory")
-    st.plotly_chart(fig_color, use_container_width=True)
+    st.plotly_chart(fig_color, use_container_width=True, key='subcat_color')
     # --- Price Band Mix (side-by-side barchart) ---
     st.markdown("**Price Band Mix**")
-    price_bins = [0, 20, 30, 40, 50, 60, 1e6]
-    price_labels = ['<20€', '20-30€', '30-40€', '40-50€', '50-60€', '60€+']
-    brand_band = pd.cut(filtered['final_price'], bins=price_bins, labels=price_labels, right=False)
-    subcat_band = pd.cut(subcat_df['final_price'], bins=price_bins, labels=price_labels, right=False)
-    band_df = pd.DataFrame({selected_brand: brand_band.value_counts(normalize=True).reindex(price_labels, fill_value=0),
-                           'Subcategory': subcat_band.value_counts(normalize=True).reindex(price_labels, fill_value=0)}, index=price_labels)
+    band_df = pd.DataFrame({selected_brand: summary['brand_bands'], 'Subcategory': summary['area_bands']}, index=PRICE_LABELS)
     fig_band = px.bar(band_df.reset_index(), x='index', y=[selected_brand, 'Subcategory'], barmode='group',
                      labels={'value': 'Share', 'index': 'Price Band'}, title="Price Band Mix: Brand vs. Subcategory")
-    st.plotly_chart(fig_band, use_container_width=True)
+    st.plotly_chart(fig_band, use_container_width=True, key='subcat_band')
     # --- Metric Cards for Discount and In-Stock % ---
     st.markdown("---")
     st.subheader("Brand vs. Subcategory Metrics")
-    subcat_avg_discount = subcat_df.loc[subcat_df['discount_pct'] > 0, 'discount_pct'].mean()
-    subcat_in_stock = (subcat_df['in_stock'] > 0).sum() if 'in_stock' in subcat_df.columns else 0
-    subcat_pct_in_stock = (subcat_in_stock / len(subcat_df) * 100) if len(subcat_df) > 0 else 0
     col1, col2 = st.columns(2)
-    col1.metric("Avg Discount", f"{avg_discount:.1f}%", delta=f"vs {subcat_avg_discount:.1f}% subcat avg")
-    col2.metric("% In Stock", f"{pct_in_stock:.1f}%", delta=f"vs {subcat_pct_in_stock:.1f}% subcat avg")
+    col1.metric("Avg Discount", f"{summary['avg_discount']:.1f}%", delta=f"vs {summary['area_avg_discount']:.1f}% subcat avg")
+    col2.metric("% In Stock", f"{summary['pct_in_stock']:.1f}%", delta=f"vs {summary['area_pct_in_stock']:.1f}% subcat avg")
     # --- Raw Data Table ---
     st.markdown("---")
     st.subheader("Filtered Data Table")
-    st.dataframe(filtered, use_container_width=True)
+    filtered = subcat_df[subcat_df['brand_clean'] == selected_brand] if selected_brand != 'All' else subcat_df
+    paged_table(with_in_stock_pct(filtered), 'subcat_table', columns=DATA_TABLE_COLUMNS)
 
 def all_dorina_products_table(df):
     """
@@ -1019,11 +1747,7 @@ def all_dorina_products_table(df):
     # Filter dorina_df to only include available columns
     available_columns = [col for col in display_columns if col in dorina_df.columns]
     
-    styled = smart_style(
-        dorina_df[available_columns]
-        .sort_values(['category_clean', 'specific_category'])
-    )
-    st.dataframe(styled, use_container_width=True)
+    paged_table(dorina_df.sort_values(['category_clean', 'specific_category']), 'dorina_table', columns=available_columns)
 
 def download_data(df):
     """
@@ -1045,59 +1769,105 @@ def download_data(df):
         mime="text/csv"
     )
 
+@view_cache
+def zalando_summary(df):
+    """ASP and discount rankings by category, subcategory and brand, and the category x brand discount table."""
+    cube = load_cube()
+    by_category = cube_rollup(cube, 'category_clean')
+    by_subcategory = cube_rollup(cube, 'specific_category')
+    return {
+        'cat_asp': by_category['avg_price'].dropna().rename('final_price').round(2).sort_values(ascending=False),
+        'subcat_asp': by_subcategory['avg_price'].dropna().rename('final_price').round(2).sort_values(ascending=False).head(20),
+        'cat_discount': by_category['avg_discount'].dropna().rename('discount_pct').round(2).sort_values(ascending=False),
+        'brand_discount': cube_rollup(cube, 'brand_clean')['avg_discount'].dropna().rename('discount_pct').round(2).sort_values(ascending=False).head(20),
+        'subcat_discount': by_subcategory['avg_discount'].dropna().rename('discount_pct').round(2).sort_values(ascending=False).head(20),
+        'summary': cube_rollup(cube, ['category_clean', 'brand_clean'])['avg_discount'].dropna().unstack('brand_clean').round(2),
+    }
+
 def zalando_performance_tab(df):
     """
     Streamlit interface for Zalando Performance: ASP and discounts by category, brand, and subcategory.
     """
     st.header("Zalando Performance: ASP & Discounts by Category, Brand, and Subcategory")
     st.markdown("---")
+    results = zalando_summary(df)
     # ASP by Main Category
     st.subheader("Average Selling Price (ASP) by Main Category")
-    cat_asp = df.groupby('category_clean')['final_price'].mean().round(2).sort_values(ascending=False)
+    cat_asp = results['cat_asp']
     st.bar_chart(cat_asp)
     st.dataframe(cat_asp.reset_index().rename(columns={'final_price': 'ASP (€)'}).round(2), use_container_width=True)
     # ASP by Specific Category
     st.subheader("Average Selling Price (ASP) by Specific Category (Top 20)")
-    subcat_asp = df.groupby('specific_category')['final_price'].mean().round(2).sort_values(ascending=False).head(20)
+    subcat_asp = results['subcat_asp']
     st.bar_chart(subcat_asp)
     st.dataframe(subcat_asp.reset_index().rename(columns={'final_price': 'ASP (€)'}).round(2), use_container_width=True)
     st.markdown("---")
     # By Main Category
     st.subheader("Average Discount by Main Category")
-    cat_discount = df.groupby('category_clean')['discount_pct'].mean().round(2).sort_values(ascending=False)
+    cat_discount = results['cat_discount']
     st.bar_chart(cat_discount)
     st.dataframe(cat_discount.reset_index().rename(columns={'discount_pct': 'Avg Discount (%)'}).round(2), use_container_width=True)
     # By Brand
     st.subheader("Average Discount by Brand (Top 20)")
-    brand_discount = df.groupby('brand_clean')['discount_pct'].mean().round(2).sort_values(ascending=False).head(20)
+    brand_discount = results['brand_discount']
     st.bar_chart(brand_discount)
     st.dataframe(brand_discount.reset_index().rename(columns={'discount_pct': 'Avg Discount (%)'}).round(2), use_container_width=True)
     # By Specific Category
     st.subheader("Average Discount by Specific Category (Top 20)")
-    subcat_discount = df.groupby('specific_category')['discount_pct'].mean().round(2).sort_values(ascending=False).head(20)
+    subcat_discount = results['subcat_discount']
     st.bar_chart(subcat_discount)
     st.dataframe(subcat_discount.reset_index().rename(columns={'discount_pct': 'Avg Discount (%)'}).round(2), use_container_width=True)
     # Summary Table
     st.subheader("Discount Summary Table (Category x Brand)")
-    summary = df.pivot_table(index='category_clean', columns='brand_clean', values='discount_pct', aggfunc='mean').round(2)
-    st.dataframe(summary, use_container_width=True)
+    paged_table(results['summary'], 'zalando_summary', max_columns=20)
+
+@view_cache
+def comparison_brands(df):
+    """Brands to choose from, with the default pair: Dorina and its largest competitor."""
+    brands = sorted(df['brand_clean'].dropna().unique())
+    default_brand1 = 'Dorina' if 'Dorina' in brands else brands[0]
+    competitor_counts = observed_counts(df[df['brand_clean'].str.lower() != 'dorina']['brand_clean'])
+    default_brand2 = competitor_counts.index[0] if not competitor_counts.empty else brands[1] if len(brands) > 1 else brands[0]
+    return brands, default_brand1, default_brand2
+
+@view_cache
+def brand_comparison_summary(df, brand1, brand2):
+    """Per-category counts, ASP and discount, top subcategories, size curves and sample products for two brands."""
+    cube = load_cube()
+    comp_cube = cube_rollup(cube, ['category_clean', 'brand_clean'], brand_clean=[brand1, brand2])
+    subcat_counts = cube_rollup(cube, ['specific_category', 'brand_clean'], brand_clean=[brand1, brand2])['skus'].rename('count').reset_index()
+    top_subcats = subcat_counts.groupby('specific_category', observed=True)['count'].sum().sort_values(ascending=False).head(10).index
+    sizes = load_size_table()
+    size_counts1 = size_curve(sizes, df.index[df['brand_clean'] == brand1])
+    size_counts2 = size_curve(sizes, df.index[df['brand_clean'] == brand2])
+    comp_df = df[df['brand_clean'].isin([brand1, brand2])]
+    return {
+        'cat_counts': comp_cube['skus'].rename('count').reset_index(),
+        'subcat_counts': subcat_counts[subcat_counts['specific_category'].isin(top_subcats)],
+        'asp': comp_cube['avg_price'].dropna().rename('final_price').reset_index(),
+        'disc': comp_cube['avg_discount'].dropna().rename('discount_pct').reset_index(),
+        'size_curve': pd.DataFrame({brand1: size_counts1, brand2: size_counts2}).fillna(0),
+        'samples': {brand: comp_df[comp_df['brand_clean'] == brand].head(5) for brand in [brand1, brand2]},
+    }
 
 def brand_comparison_tab(df):
     st.header("Brand Comparison: Dorina vs Competitor")
     st.markdown("---")
+    brand_comparison_body(df)
+
+@st.fragment
+def brand_comparison_body(df):
+    """Brand selectors and comparison charts; a fragment, so changing a brand reruns only this."""
     # Brand selection
-    brands = sorted(df['brand_clean'].dropna().unique())
-    default_brand1 = 'Dorina' if 'Dorina' in brands else brands[0]
-    competitor_counts = df[df['brand_clean'].str.lower() != 'dorina']['brand_clean'].value_counts()
-    default_brand2 = competitor_counts.index[0] if not competitor_counts.empty else brands[1] if len(brands) > 1 else brands[0]
-    brand1 = st.selectbox("Select Brand 1", brands, index=brands.index(default_brand1))
-    brand2 = st.selectbox("Select Brand 2", brands, index=brands.index(default_brand2))
+    brands, default_brand1, default_brand2 = comparison_brands(df)
+    brand1 = st.selectbox("Select Brand 1", brands, index=brands.index(default_brand1), key='compare_brand1')
+    brand2 = st.selectbox("Select Brand 2", brands, index=brands.index(default_brand2), key='compare_brand2')
     st.markdown(f"Comparing **{brand1}** vs **{brand2}**")
-    comp_df = df[df['brand_clean'].isin([brand1, brand2])]
+    summary = brand_comparison_summary(df, brand1, brand2)
 
     # Product Count by Main Category
     st.subheader("Product Count by Main Category")
-    cat_counts = comp_df.groupby(['category_clean', 'brand_clean']).size().reset_index(name='count')
+    cat_counts = summary['cat_counts']
     fig_cat = px.bar(cat_counts, x='category_clean', y='count', color='brand_clean', barmode='group', labels={'count': 'Product Count', 'category_clean': 'Main Category', 'brand_clean': 'Brand'})
     col1, col2 = st.columns(2)
     with col1:
@@ -1107,9 +1877,7 @@ def brand_comparison_tab(df):
 
     # Product Count by Specific Category
     st.subheader("Product Count by Specific Category (Top 10)")
-    subcat_counts = comp_df.groupby(['specific_category', 'brand_clean']).size().reset_index(name='count')
-    top_subcats = subcat_counts.groupby('specific_category')['count'].sum().sort_values(ascending=False).head(10).index
-    subcat_counts = subcat_counts[subcat_counts['specific_category'].isin(top_subcats)]
+    subcat_counts = summary['subcat_counts']
     fig_subcat = px.bar(subcat_counts, x='specific_category', y='count', color='brand_clean', barmode='group', labels={'count': 'Product Count', 'specific_category': 'Specific Category', 'brand_clean': 'Brand'})
     col1, col2 = st.columns(2)
     with col1:
@@ -1119,7 +1887,7 @@ def brand_comparison_tab(df):
 
     # ASP Comparison
     st.subheader("Average Selling Price (ASP) by Main Category")
-    asp = comp_df.groupby(['category_clean', 'brand_clean'])['final_price'].mean().reset_index()
+    asp = summary['asp']
     fig_asp = px.bar(asp, x='category_clean', y='final_price', color='brand_clean', barmode='group', labels={'final_price': 'ASP (€)', 'category_clean': 'Main Category', 'brand_clean': 'Brand'})
     col1, col2 = st.columns(2)
     with col1:
@@ -1129,7 +1897,7 @@ def brand_comparison_tab(df):
 
     # Discount Comparison
     st.subheader("Average Discount (%) by Main Category")
-    disc = comp_df.groupby(['category_clean', 'brand_clean'])['discount_pct'].mean().reset_index()
+    disc = summary['disc']
     fig_disc = px.bar(disc, x='category_clean', y='discount_pct', color='brand_clean', barmode='group', labels={'discount_pct': 'Avg Discount (%)', 'category_clean': 'Main Category', 'brand_clean': 'Brand'})
     col1, col2 = st.columns(2)
     with col1:
@@ -1139,38 +1907,7 @@ def brand_comparison_tab(df):
 
     # Size Curve
     st.subheader("Size Curve (Available Sizes Count)")
-    def get_size_counts(df, brand):
-        size_counter = {}
-        for sizes_json in df[df['brand_clean'] == brand]['sizes'].dropna():
-            try:
-                sizes = json.loads(sizes_json)
-                for s in sizes:
-                    if s.get('availability', True):
-                        size_name = s.get('name', 'Unknown')
-                        # Try to match 'NN/NN' (two digits only) first
-                        match = re.match(r'^([0-9]{2}/[0-9]{2})', size_name)
-                        if not match:
-                            # Then try 'NNL'
-                            match = re.match(r'^([0-9]+[A-Za-z]+)', size_name)
-                        if not match:
-                            # Then try just 'NN'
-                            match = re.match(r'^([0-9]+)', size_name)
-                        if match:
-                            clean_size = match.group(1)
-                            # If it's all digits and longer than 2, take first two digits
-                            if clean_size.isdigit() and len(clean_size) > 2:
-                                clean_size = clean_size[:2]
-                        else:
-                            # Then try any word (e.g., S, M, L, XL, 3XL)
-                            match = re.match(r'^([A-Za-z0-9]+)', size_name)
-                            clean_size = match.group(1) if match else size_name
-                        size_counter[clean_size] = size_counter.get(clean_size, 0) + 1
-            except Exception:
-                continue
-        return pd.Series(size_counter).sort_index()
-    size_counts1 = get_size_counts(df, brand1)
-    size_counts2 = get_size_counts(df, brand2)
-    size_curve_df = pd.DataFrame({brand1: size_counts1, brand2: size_counts2}).fillna(0)
+    size_curve_df = summary['size_curve']
     fig_size = px.bar(size_curve_df, barmode='group', labels={'value': 'Count', 'index': 'Size'})
     col1, col2 = st.columns(2)
     with col1:
@@ -1180,145 +1917,132 @@ def brand_comparison_tab(df):
 
     # Product Images
     st.subheader("Sample Products")
+    for brand in [brand1, brand2]:
+        image_cache.prefetch(summary['samples'][brand].get('main_image', []))
     for brand in [brand1, brand2]:
         st.markdown(f"**{brand}**")
-        brand_products = comp_df[comp_df['brand_clean'] == brand].head(5)
-        cols = st.columns(5)
-        for i, (_, row) in enumerate(brand_products.iterrows()):
-            with cols[i % 5]:
-                img_url = row.get('main_image')
-                if img_url and pd.notna(img_url) and str(img_url).startswith('http'):
-                    st.image(img_url, width=120)
-                st.caption(row['best_name'])
+        product_grid([{'image': row.get('main_image'), 'caption': row['best_name']}
+                      for row in summary['samples'][brand].to_dict('records')], no_image='')
+
+@view_cache
+def brand_performance_summary(df, brand):
+    """Product mix with images, per-SKU in-stock rates, severe discounts and summary stats for one brand."""
+    brand_df = df[df['brand_clean'] == brand]
+    # Product mix: (category, [(subcategory, up to 15 distinct image/name pairs)])
+    mix = []
+    for cat in sorted(brand_df['category_clean'].dropna().unique()):
+        cat_df = brand_df[brand_df['category_clean'] == cat]
+        mix.append((cat, [(subcat, cat_df[cat_df['specific_category'] == subcat][['main_image', 'best_name']].drop_duplicates().head(15))
+                          for subcat in sorted(cat_df['specific_category'].dropna().unique())]))
+
+    sku_instock_df = in_stock_by_row(load_size_table(), brand_df.index).join(
+        brand_df[['best_name', 'main_image', 'final_price', 'discount_pct']].rename(columns={'best_name': 'name'}))
+    # One row per SKU (falling back to the product URL, then the row label); a repeated SKU keeps its last row
+    keys = pd.Series(brand_df.index.astype(str), index=brand_df.index)
+    for key_col in ['product_url', 'sku']:
+        if key_col in brand_df.columns:
+            keys = brand_df[key_col].astype(object).where(brand_df[key_col].notna() & (brand_df[key_col] != ''), keys)
+    sku_instock_df.index = keys.loc[sku_instock_df.index].values
+    sku_instock_df = sku_instock_df[~sku_instock_df.index.duplicated(keep='last')]
+    sku_instock_df = sku_instock_df.sort_values('in_stock_pct', ascending=False)
+
+    def bucket_instock(pct):
+        if pct == 100:
+            return '100%'
+        elif pct > 90:
+            return '>90%'
+        elif pct > 80:
+            return '>80%'
+        elif pct > 70:
+            return '>70%'
+        else:
+            return '<70%'
+    sku_instock_df['instock_bucket'] = sku_instock_df['in_stock_pct'].apply(bucket_instock)
+    return {
+        'mix': mix,
+        'sku_instock': sku_instock_df,
+        'bucket_counts': sku_instock_df['instock_bucket'].value_counts().sort_index(),
+        'low_instock': sku_instock_df[sku_instock_df['in_stock_pct'] < 60].head(10),
+        'severe_discount': brand_df[brand_df['discount_pct'] > 50].sort_values('discount_pct', ascending=False).head(10),
+        'total_products': len(brand_df),
+        'avg_price': brand_df['final_price'].mean(),
+        'avg_discount': brand_df['discount_pct'].mean(),
+        'n_categories': brand_df['category_clean'].nunique(),
+    }
 
 def brand_performance_tab(df):
     st.header("Brand Performance")
     st.markdown("---")
+    brand_performance_body(df)
+
+@st.fragment
+def brand_performance_body(df):
+    """Brand selector and performance sections; a fragment, so changing the brand reruns only this."""
     brands = sorted(df['brand_clean'].dropna().unique())
     default_brand = brands.index('Dorina') if 'Dorina' in brands else 0
-    brand = st.selectbox("Select Brand", brands, index=default_brand)
-    brand_df = df[df['brand_clean'] == brand]
+    brand = st.selectbox("Select Brand", brands, index=default_brand, key='brand_perf_brand')
+    summary = brand_performance_summary(df, brand)
 
     # --- Product Mix by Category and Subcategory with Images ---
     st.subheader(f"{brand} Product Mix by Category & Subcategory")
-    categories = brand_df['category_clean'].dropna().unique()
-    for cat in sorted(categories):
-        cat_df = brand_df[brand_df['category_clean'] == cat]
+    image_cache.prefetch(img_url for _, subcats in summary['mix'] for _, images in subcats for img_url, _ in images.values)
+    for table in [summary['low_instock'], summary['severe_discount']]:
+        image_cache.prefetch(table.get('main_image', []))
+    for cat, subcats in summary['mix']:
         st.markdown(f"### {cat}")
-        subcats = cat_df['specific_category'].dropna().unique()
-        for subcat in sorted(subcats):
-            subcat_df = cat_df[cat_df['specific_category'] == subcat]
+        for subcat, images in subcats:
             st.markdown(f"**{subcat}**")
             # Tile images in a grid (max 5 per row)
-            images = subcat_df[['main_image', 'best_name']].drop_duplicates().head(15)
-            img_cols = st.columns(5)
-            for idx, (img_url, name) in enumerate(images.values):
-                with img_cols[idx % 5]:
-                    if img_url and pd.notna(img_url) and str(img_url).startswith('http'):
-                        st.image(img_url, width=100)
-                    st.caption(str(name)[:40])
+            product_grid([{'image': img_url, 'caption': str(name)[:40]} for img_url, name in images.values],
+                         image_width=100, no_image='')
 
     # 1. In-stock % by SKU (product)
     st.subheader("In-stock % by SKU (Product)")
-    sku_instock = {}
-    for i, row in brand_df.iterrows():
-        sku = row.get('sku') or row.get('SKU') or row.get('product_url') or str(i)
-        sizes_json = row.get('sizes')
-        if not sizes_json or pd.isna(sizes_json):
-            continue
-        try:
-            sizes = json.loads(sizes_json)
-            total = 0
-            in_stock = 0
-            for s in sizes:
-                total += 1
-                if s.get('availability', True):
-                    in_stock += 1
-            if total > 0:
-                sku_instock[sku] = {
-                    'in_stock': in_stock,
-                    'total': total,
-                    'in_stock_pct': round(in_stock / total * 100, 2),
-                    'name': row.get('best_name', sku),
-                    'main_image': row.get('main_image'),
-                    'final_price': row.get('final_price'),
-                    'discount_pct': row.get('discount_pct'),
-                }
-        except Exception:
-            continue
-    sku_instock_df = pd.DataFrame.from_dict(sku_instock, orient='index')
-    sku_instock_df = sku_instock_df.sort_values('in_stock_pct', ascending=False)
+    sku_instock_df = summary['sku_instock']
 
     # Pie chart of in-stock rate buckets
     st.subheader("SKU In-stock Rate Distribution")
-    def bucket_instock(pct):
-        if pct == 100:
-            return '100%'
-        elif pct > 90:
-            return '>90%'
-        elif pct > 80:
-            return '>80%'
-        elif pct > 70:
-            return '>70%'
-        else:
-            return '<70%'
-    sku_instock_df['instock_bucket'] = sku_instock_df['in_stock_pct'].apply(bucket_instock)
-    bucket_counts = sku_instock_df['instock_bucket'].value_counts().sort_index()
-    import plotly.express as px
+    bucket_counts = summary['bucket_counts']
     fig_pie = px.pie(bucket_counts, names=bucket_counts.index, values=bucket_counts.values, title='SKU In-stock Rate Buckets')
     col1, col2 = st.columns(2)
     with col1:
         st.plotly_chart(fig_pie, use_container_width=True)
     with col2:
-        st.dataframe(sku_instock_df[['name', 'in_stock', 'total', 'in_stock_pct', 'instock_bucket', 'final_price', 'discount_pct']], use_container_width=True)
+        paged_table(sku_instock_df, 'brand_perf_sku_table',
+                    columns=['name', 'in_stock', 'total', 'in_stock_pct', 'instock_bucket', 'final_price', 'discount_pct'])
 
     # Images for products with <60% in-stock rate
     st.subheader("Products with <60% In-stock Rate (Most Out of Stock)")
-    low_instock_df = sku_instock_df[sku_instock_df['in_stock_pct'] < 60]
+    low_instock_df = summary['low_instock']
     if not low_instock_df.empty:
-        for i, row in low_instock_df.head(10).iterrows():
-            cols = st.columns([1, 3])
-            with cols[0]:
-                img_url = row.get('main_image')
-                if img_url and pd.notna(img_url) and str(img_url).startswith('http'):
-                    st.image(img_url, width=120)
-                else:
-                    st.write("No image")
-            with cols[1]:
-                st.markdown(f"**{row['name']}**")
-                st.write(f"Price: €{row['final_price']:.2f}")
-                st.write(f"In-stock: {row['in_stock']} / {row['total']} sizes ({row['in_stock_pct']}%)")
-                st.write(f"Discount: {row['discount_pct']:.1f}%")
+        product_grid([{
+            'image': row.get('main_image'), 'title': row['name'],
+            'lines': [f"Price: €{row['final_price']:.2f}",
+                      f"In-stock: {row['in_stock']} / {row['total']} sizes ({row['in_stock_pct']}%)",
+                      f"Discount: {row['discount_pct']:.1f}%"],
+        } for row in low_instock_df.to_dict('records')], columns=1, layout='row')
     else:
         st.info("No products with <60% in-stock rate.")
 
     # 2. Highlight products with severe discounting (>50%)
     st.subheader("Products with Severe Discounting (>50%)")
-    severe_discount_df = brand_df[brand_df['discount_pct'] > 50].sort_values('discount_pct', ascending=False)
+    severe_discount_df = summary['severe_discount']
     if not severe_discount_df.empty:
-        for i, row in severe_discount_df.head(10).iterrows():
-            cols = st.columns([1, 3])
-            with cols[0]:
-                img_url = row.get('main_image')
-                if img_url and pd.notna(img_url) and str(img_url).startswith('http'):
-                    st.image(img_url, width=120)
-                else:
-                    st.write("No image")
-            with cols[1]:
-                st.markdown(f"**{row['best_name']}**")
-                st.write(f"Price: €{row['final_price']:.2f}")
-                st.write(f"Discount: {row['discount_pct']:.1f}%")
-                st.write(f"Category: {row['category_clean']} | Subcategory: {row['specific_category']}")
+        product_grid([{
+            'image': row.get('main_image'), 'title': row['best_name'],
+            'lines': [f"Price: €{row['final_price']:.2f}", f"Discount: {row['discount_pct']:.1f}%",
+                      f"Category: {row['category_clean']} | Subcategory: {row['specific_category']}"],
+        } for row in severe_discount_df.to_dict('records')], columns=1, layout='row')
     else:
         st.info("No products with >50% discount.")
 
     # 3. Summary stats
     st.subheader("Brand Summary Stats")
     col1, col2, col3, col4 = st.columns(4)
-    col1.metric("Total Products", f"{len(brand_df):,}")
-    col2.metric("Avg Price", f"€{brand_df['final_price'].mean():.2f}")
-    col3.metric("Avg Discount", f"{brand_df['discount_pct'].mean():.2f}%")
-    col4.metric("# Categories", f"{brand_df['category_clean'].nunique()}")
+    col1.metric("Total Products", f"{summary['total_products']:,}")
+    col2.metric("Avg Price", f"€{summary['avg_price']:.2f}")
+    col3.metric("Avg Discount", f"{summary['avg_discount']:.2f}%")
+    col4.metric("# Categories", f"{summary['n_categories']}")
 
 def show_user_guide():
     st.markdown("""
@@ -1338,6 +2062,27 @@ def show_user_guide():
     - Hover over charts and tables for more details.
     """)
 
+# --- Views in menu order: label -> (render function, prefixes of its widget keys) ---
+VIEWS = {
+    "🏠 Dashboard": (dashboard_tab, ('dashboard_', 'cat_', 'subcat_')),
+    "📊 Brand Performance": (brand_performance_tab, ('brand_perf_',)),
+    "🤝 Brand Comparison": (brand_comparison_tab, ('compare_',)),
+    "📈 Zalando Performance": (zalando_performance_tab, ('zalando_',)),
+    "🛍️ Product Viewer": (virtual_shopping_room, ('viewer_',)),
+}
+
+def keep_view_state(active_view):
+    """
+    Streamlit drops the state of widgets that weren't drawn in a run. Re-assigning
+    the state of the other views' widgets keeps their selections for when the user
+    switches back.
+    """
+    prefixes = tuple(prefix for label, (_, view_prefixes) in VIEWS.items() if label != active_view
+                     for prefix in view_prefixes)
+    for key in list(st.session_state.keys()):
+        if key.startswith(prefixes):
+            st.session_state[key] = st.session_state[key]
+
 # --- Main App ---
 def main():
     st.set_page_config(
@@ -1383,6 +2128,39 @@ def main():
         background-color: #1f77b4;
         color: white;
     }
+    .product-grid {
+        display: grid;
+        gap: 1rem;
+        align-items: start;
+        margin-bottom: 1rem;
+    }
+    .product-card.row {
+        display: grid;
+        gap: 1rem;
+    }
+    .product-card img {
+        max-width: 100%;
+        height: auto;
+        display: block;
+        margin-bottom: 0.4rem;
+    }
+    .product-card p {
+        margin: 0 0 0.2rem 0;
+    }
+    .product-card .title {
+        font-weight: 600;
+    }
+    .product-card .caption {
+        color: gray;
+        font-size: 0.85rem;
+    }
+    .product-card .muted {
+        color: gray;
+    }
+    .product-card .discount {
+        color: red;
+        font-weight: bold;
+    }
     </style>
     """, unsafe_allow_html=True)
     
@@ -1400,25 +2178,12 @@ def main():
             if st.button("Close Guide"):
                 st.session_state['show_guide'] = False
     df = load_data()
-    # --- Tab order and names ---
-    tab_labels = [
-        "🏠 Dashboard",
-        "📊 Brand Performance",
-        "🤝 Brand Comparison",
-        "📈 Zalando Performance",
-        "🛍️ Product Viewer"
-    ]
-    tabs = st.tabs(tab_labels)
-    with tabs[0]:
-        dashboard_tab(df)
-    with tabs[1]:
-        brand_performance_tab(df)
-    with tabs[2]:
-        brand_comparison_tab(df)
-    with tabs[3]:
-        zalando_performance_tab(df)
-    with tabs[4]:
-        virtual_shopping_room(df)
+    # --- Navigation: only the selected view runs on a rerun ---
+    view = st.radio("View", list(VIEWS), horizontal=True, key='view', label_visibility='collapsed')
+    keep_view_state(view)
+    VIEWS[view][0](df)
+    data_footer()
+    cache_debug_panel()
 
 if __name__ == "__main__":
     main() 
\ No newline at end of file
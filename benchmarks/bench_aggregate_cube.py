@@ -0,0 +1,84 @@
+"""
+Benchmark: dashboard aggregates from the full frame vs. roll-ups of the cube.
+
+Cleans a synthetic raw export, replicates it to each requested size and times
+the Zalando Performance and Brand Comparison aggregates both ways. The frame
+cost grows with the row count; the cube cost depends only on the number of
+cube cells.
+
+    python benchmarks/bench_aggregate_cube.py --rows 50000 200000 1000000
+"""
+import argparse
+import os
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import app  # noqa: E402
+from bench_artefact_load import make_raw  # noqa: E402
+
+
+def frame_queries(df):
+    by_cat = df.groupby('category_clean', observed=True)
+    by_subcat = df.groupby('specific_category', observed=True)
+    comp = df[df['brand_clean'].isin(['Dorina', 'Sloggi'])]
+    return [
+        by_cat['final_price'].mean(), by_subcat['final_price'].mean(),
+        by_cat['discount_pct'].mean(), by_subcat['discount_pct'].mean(),
+        df.groupby('brand_clean', observed=True)['discount_pct'].mean(),
+        df.pivot_table(index='category_clean', columns='brand_clean', values='discount_pct',
+                       aggfunc='mean', observed=True),
+        comp.groupby(['category_clean', 'brand_clean'], observed=True).size(),
+        comp.groupby(['category_clean', 'brand_clean'], observed=True)['final_price'].mean(),
+        comp.groupby(['specific_category', 'brand_clean'], observed=True).size(),
+    ]
+
+
+def cube_queries(cube):
+    by_cat = app.cube_rollup(cube, 'category_clean')
+    by_subcat = app.cube_rollup(cube, 'specific_category')
+    comp = app.cube_rollup(cube, ['category_clean', 'brand_clean'], brand_clean=['Dorina', 'Sloggi'])
+    return [
+        by_cat['avg_price'], by_subcat['avg_price'], by_cat['avg_discount'], by_subcat['avg_discount'],
+        app.cube_rollup(cube, 'brand_clean')['avg_discount'],
+        app.cube_rollup(cube, ['category_clean', 'brand_clean'])['avg_discount'].unstack('brand_clean'),
+        comp['skus'], comp['avg_price'],
+        app.cube_rollup(cube, ['specific_category', 'brand_clean'], brand_clean=['Dorina', 'Sloggi'])['skus'],
+    ]
+
+
+def best_of(func, arg, repeat=5):
+    times = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        func(arg)
+        times.append(time.perf_counter() - started)
+    return min(times)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n\n')[0])
+    parser.add_argument('--rows', type=int, nargs='+', default=[50000, 200000, 1000000])
+    args = parser.parse_args()
+
+    base = app.sort_categories(app.auto_clean_data(make_raw(50000)))
+    for col in app.CATEGORICAL_COLUMNS:
+        if col in base.columns:
+            base[col] = base[col].astype('category')
+    print(f"{'rows':>10} {'cube cells':>11} {'frame':>10} {'cube':>10}")
+    for rows in args.rows:
+        df = pd.concat([base] * (rows // len(base) + 1), ignore_index=True).iloc[:rows]
+        cube = app.build_cube(df)
+        # Same answers both ways
+        for a, b in zip(frame_queries(df), cube_queries(cube)):
+            assert np.allclose(np.asarray(a, dtype=float), np.asarray(b, dtype=float), equal_nan=True)
+        frame_time = best_of(frame_queries, df)
+        cube_time = best_of(cube_queries, cube)
+        print(f"{rows:>10,} {len(cube):>11,} {frame_time * 1000:>8.1f}ms {cube_time * 1000:>8.1f}ms")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,112 @@
+"""
+Benchmark: loading the cleaned data from CSV vs. the typed Parquet artefact.
+
+Cleans a synthetic raw export, writes both cleaned_zalando_data.csv and the
+Parquet artefact to a temporary directory, then loads each in a fresh
+interpreter and reports load time and resident memory growth. Pass --csv/--parquet
+to measure real files instead.
+
+    python benchmarks/bench_artefact_load.py --rows 200000
+"""
+import argparse
+import json
+import os
+import random
+import subprocess
+import sys
+import tempfile
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+BRANDS = ['DORINA', 'Triumph', 'Calvin Klein', 'sloggi', 'Hunkemöller', 'Passionata', 'Wolford', 'Chantelle']
+COLORS = ['Schwarz', 'navy/white', 'Rot - Schwarz', 'beige', 'Nude', 'Pastellrosa', 'black & gold']
+SLUGS = ['womens-clothing-underwear-bras', 'push-up-bras', 'thongs', 'bodies', 'nightwear', 'tights']
+SIZES = ['70A', '70B', '75A', '75B', '75C', '80B', '80C', '80D', '85C', '85D', 'XS', 'S', 'M', 'L', 'XL', '36', '38', '40']
+
+
+def make_raw(rows, seed=11):
+    import pandas as pd
+    rng = random.Random(seed)
+    return pd.DataFrame({
+        'product_name': [f"{rng.choice(BRANDS)} Lace bra {rng.randint(1, 3)} pack {i % 5000}" for i in range(rows)],
+        'brand': [json.dumps({'name': rng.choice(BRANDS)}) for _ in range(rows)],
+        'initial_price': [round(rng.uniform(10, 80), 2) for _ in range(rows)],
+        'final_price': [round(rng.uniform(5, 60), 2) for _ in range(rows)],
+        'in_stock': [rng.randint(0, 8) for _ in range(rows)],
+        'total': [8] * rows,
+        'main_image': [f"https://img01.ztat.net/article/spp-media-p1/{rng.getrandbits(64):x}.jpg" for _ in range(rows)],
+        'color': [rng.choice(COLORS) for _ in range(rows)],
+        # Keyed like the scraper's size entries, which build_size_table reads
+        'sizes': [json.dumps([{'name': s, 'availability': rng.random() < 0.7} for s in rng.sample(SIZES, rng.randint(3, 8))])
+                  for _ in range(rows)],
+        'discovery_input': [json.dumps({'url': f"https://en.zalando.de/{rng.choice(SLUGS)}/"}) for _ in range(rows)],
+        'name': [f"Bra {i % 3000}" for i in range(rows)],
+        'product_url': [f"https://en.zalando.de/product-{i}.html" for i in range(rows)],
+        'sku': [f"DO121{i:07d}" for i in range(rows)],
+        'country_code': [rng.choice(['de', 'at', 'ch']) for _ in range(rows)],
+    })
+
+
+def measure(kind, path):
+    """Runs in a fresh interpreter: load one format and print time and RSS growth as JSON."""
+    import psutil
+    import pandas as pd
+    import app
+    proc = psutil.Process()
+    before = proc.memory_info().rss
+    started = time.perf_counter()
+    if kind == 'csv':
+        df = pd.read_csv(path)
+    else:
+        df = app.read_artefact(path)
+    elapsed = time.perf_counter() - started
+    print(json.dumps({
+        'seconds': elapsed,
+        'rss_mb': (proc.memory_info().rss - before) / 1024 ** 2,
+        'frame_mb': df.memory_usage(deep=True).sum() / 1024 ** 2,
+        'rows': len(df),
+        'columns': len(df.columns),
+    }))
+
+
+def run_measure(kind, path):
+    out = subprocess.run([sys.executable, os.path.abspath(__file__), '--measure', kind, path],
+                         capture_output=True, text=True, check=True, cwd=ROOT)
+    return json.loads(out.stdout.strip().splitlines()[-1])
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n\n')[0])
+    parser.add_argument('--rows', type=int, default=200000)
+    parser.add_argument('--csv')
+    parser.add_argument('--parquet')
+    parser.add_argument('--measure', nargs=2, metavar=('KIND', 'PATH'), help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.measure:
+        measure(*args.measure)
+        return
+
+    with tempfile.TemporaryDirectory() as tmp:
+        csv_path, parquet_path = args.csv, args.parquet
+        if not (csv_path and parquet_path):
+            import app
+            cleaned = app.auto_clean_data(make_raw(args.rows))
+            csv_path = os.path.join(tmp, 'cleaned_zalando_data.csv')
+            parquet_path = os.path.join(tmp, 'cleaned_zalando_data.parquet')
+            cleaned.to_csv(csv_path, index=False)
+            app.write_artefact(cleaned, parquet_path)
+
+        print(f"CSV:     {os.path.getsize(csv_path) / 1024 ** 2:8.1f} MB on disk")
+        print(f"Parquet: {os.path.getsize(parquet_path) / 1024 ** 2:8.1f} MB on disk")
+        for label, kind, path in [('CSV (all columns)', 'csv', csv_path),
+                                  ('Parquet (projected, mmap)', 'parquet', parquet_path)]:
+            r = run_measure(kind, path)
+            print(f"{label:<27} {r['seconds']:6.2f}s  RSS +{r['rss_mb']:7.1f} MB  "
+                  f"frame {r['frame_mb']:7.1f} MB  ({r['rows']:,} rows x {r['columns']} cols)")
+
+
+if __name__ == '__main__':
+    main()
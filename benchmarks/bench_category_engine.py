@@ -0,0 +1,117 @@
+"""
+Benchmark: row-wise category classification vs. the compiled KeywordClassifier.
+
+Builds a synthetic frame shaped like the raw crawl (discovery_input URLs, product
+names, crawl_category slugs), runs the original df.apply implementation and
+clean_category_columns, checks the results are identical and prints timings.
+
+    python benchmarks/bench_category_engine.py --rows 1000000
+"""
+import argparse
+import json
+import os
+import random
+import sys
+import time
+
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from app import MAIN_CATEGORY_MAP, SPECIFIC_CATEGORY_MAP, clean_category_columns  # noqa: E402
+
+BRANDS = ['Calvin Klein', 'DORINA', 'Triumph', 'Hunkemöller', 'Passionata', 'Sloggi', 'Wolford', 'Chantelle']
+NAME_WORDS = ['PUSH-UP', 'Balconette', 'Brazilian', 'String', 'Body', 'Tights', 'Pyjama', 'Bralette',
+              'Lace', 'Seamless', '3 PACK', 'T-shirt-bra', 'Hipster', 'Soft', 'Robe', 'Cotton', 'Set']
+SLUGS = list(MAIN_CATEGORY_MAP) + list(SPECIFIC_CATEGORY_MAP) + ['womens-clothing-underwear', 'lingerie', 'new-in']
+GENERIC = ['womens-clothing-underwear', 'womens clothing underwear', 'lingerie', 'underwear']
+
+
+# --- Original row-wise implementation, kept here as the reference ---
+def legacy_extract(text, category_map):
+    if not isinstance(text, str):
+        return None
+    text_lc = text.lower()
+    for k, v in category_map.items():
+        if k in text_lc:
+            return v
+    text_lc_nohyphen = text_lc.replace('-', ' ')
+    for k, v in category_map.items():
+        if k in text_lc_nohyphen:
+            return v
+    return None
+
+
+def legacy_clean_category_columns(df):
+    def pick(row, category_map):
+        crawl = row.get('crawl_category', None)
+        if isinstance(crawl, str) and crawl not in ('', 'N/A') and legacy_extract(crawl, category_map):
+            return legacy_extract(crawl, category_map)
+        disc = row.get('discovery_input', '')
+        name = row.get('name', '')
+        cat = legacy_extract(disc, category_map)
+        if (not cat) or (disc.lower() in GENERIC):
+            cat = legacy_extract(name, category_map)
+        return cat
+    df['category_clean'] = df.apply(lambda row: pick(row, MAIN_CATEGORY_MAP), axis=1)
+    df['specific_category'] = df.apply(lambda row: pick(row, SPECIFIC_CATEGORY_MAP), axis=1)
+    return df
+
+
+def make_frame(rows, seed=42):
+    rng = random.Random(seed)
+    # A realistic crawl repeats a few thousand products, slugs and names many times over
+    distinct = max(1, min(rows, 20000))
+    names = [f"{rng.choice(BRANDS)} {' '.join(rng.sample(NAME_WORDS, 2))} - {rng.choice(['Black', 'Nude', 'Red'])}"
+             for _ in range(distinct)]
+    discovery = []
+    for _ in range(distinct):
+        slug = rng.choice(SLUGS)
+        form = rng.random()
+        if form < 0.5:
+            discovery.append(json.dumps({'url': f"https://en.zalando.de/{slug}/"}))
+        elif form < 0.8:
+            discovery.append(slug)
+        elif form < 0.9:
+            discovery.append(rng.choice(GENERIC))
+        else:
+            discovery.append(None)
+    crawl = [rng.choice(SLUGS) if rng.random() < 0.3 else rng.choice(['N/A', None]) for _ in range(distinct)]
+
+    picks = [rng.randrange(distinct) for _ in range(rows)]
+    return pd.DataFrame({
+        'name': [names[i] if i % 50 else None for i in picks],
+        'discovery_input': [discovery[i] for i in picks],
+        'crawl_category': [crawl[i] for i in picks],
+    })
+
+
+def timed(label, func, df):
+    started = time.perf_counter()
+    result = func(df.copy())
+    elapsed = time.perf_counter() - started
+    print(f"{label:<28} {elapsed:8.2f}s  ({len(df) / elapsed:,.0f} rows/s)")
+    return result, elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n\n')[0])
+    parser.add_argument('--rows', type=int, default=1_000_000)
+    args = parser.parse_args()
+
+    df = make_frame(args.rows)
+    print(f"Synthetic frame: {len(df):,} rows, {df['name'].nunique():,} distinct names, "
+          f"{df['discovery_input'].nunique():,} distinct discovery inputs")
+
+    legacy, legacy_time = timed('row-wise df.apply', legacy_clean_category_columns, df)
+    engine, engine_time = timed('KeywordClassifier', clean_category_columns, df)
+
+    for col in ['category_clean', 'specific_category']:
+        mismatches = sum(a != b for a, b in zip(legacy[col].tolist(), engine[col].tolist()))
+        print(f"{col}: {mismatches} mismatches")
+        if mismatches:
+            sys.exit(1)
+    print(f"Speed-up: {legacy_time / engine_time:.1f}x")
+
+
+if __name__ == '__main__':
+    main()
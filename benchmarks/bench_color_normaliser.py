@@ -0,0 +1,92 @@
+"""
+Benchmark: per-row colour mapping vs. the memoised categorical normaliser.
+
+Times the original Series.apply(map_color) implementation against
+clean_color_column, cold (empty mapping cache) and warm (mapping reused from a
+previous run), and checks the clean colours are identical.
+
+    python benchmarks/bench_color_normaliser.py --rows 18000 --distinct 3000
+"""
+import argparse
+import os
+import random
+import re
+import sys
+import time
+
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import app  # noqa: E402
+
+LEGACY_PATTERNS = [r'/', r'-', r',', r' & ', r' und ', r'\+', r'\s+mit\s+', r'\s+and\s+', r'\s*\+\s*']
+EXTRA_WORDS = ['melange', 'lace', 'light', 'dark', 'nude', 'skin', 'rose gold', 'leo', 'dot', 'stripe']
+
+
+# --- Original per-row implementation, kept here as the reference ---
+def legacy_map_color(raw_color):
+    if pd.isna(raw_color):
+        return 'Unknown'
+    raw_color = str(raw_color).lower().strip()
+    for pat in LEGACY_PATTERNS:
+        if re.search(pat, raw_color):
+            parts = re.split(pat, raw_color)
+            mapped = [app.BASIC_COLOR_MAP.get(p.strip(), None) for p in parts]
+            mapped = [m for m in mapped if m]
+            if len(set(mapped)) == 1:
+                return mapped[0]
+            elif mapped:
+                return 'Multicolor'
+    if raw_color in app.BASIC_COLOR_MAP:
+        return app.BASIC_COLOR_MAP[raw_color]
+    for part in re.split(r'[ ,/\-]+', raw_color):
+        if part in app.BASIC_COLOR_MAP:
+            return app.BASIC_COLOR_MAP[part]
+    return raw_color.split()[0].capitalize() if raw_color else 'Unknown'
+
+
+def make_colors(rows, distinct, seed=7):
+    rng = random.Random(seed)
+    words = list(app.BASIC_COLOR_MAP) + EXTRA_WORDS
+    separators = ['/', ' - ', ', ', ' & ', ' und ', '+', ' mit ', ' ']
+    pool = set()
+    while len(pool) < distinct:
+        parts = rng.sample(words, rng.randint(1, 3))
+        color = rng.choice(separators).join(parts)
+        pool.add(color.title() if rng.random() < 0.5 else color)
+    pool = sorted(pool) + [None]
+    return pd.DataFrame({'color': [rng.choice(pool) for _ in range(rows)]})
+
+
+def timed(label, func, df, rows):
+    started = time.perf_counter()
+    result = func(df.copy())
+    elapsed = time.perf_counter() - started
+    print(f"{label:<30} {elapsed * 1000:9.1f} ms  ({rows / elapsed:,.0f} rows/s)")
+    return result, elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n\n')[0])
+    parser.add_argument('--rows', type=int, default=18000)
+    parser.add_argument('--distinct', type=int, default=3000)
+    args = parser.parse_args()
+
+    df = make_colors(args.rows, args.distinct)
+    print(f"Synthetic colours: {len(df):,} rows, {df['color'].nunique():,} distinct")
+
+    legacy, legacy_time = timed('before: Series.apply', lambda d: d['color'].apply(legacy_map_color), df, args.rows)
+    app.COLOR_MAPPING_CACHE.clear()
+    cold, cold_time = timed('after: normaliser (cold cache)', app.clean_color_column, df, args.rows)
+    warm, warm_time = timed('after: normaliser (warm cache)', app.clean_color_column, df, args.rows)
+
+    for label, result in [('cold', cold), ('warm', warm)]:
+        mismatches = int((result['color_clean'].astype(object) != legacy).sum())
+        print(f"{label}: {mismatches} mismatches, dtype {result['color_clean'].dtype}")
+        if mismatches:
+            sys.exit(1)
+    print(f"Speed-up: {legacy_time / cold_time:.1f}x cold, {legacy_time / warm_time:.1f}x warm")
+
+
+if __name__ == '__main__':
+    main()
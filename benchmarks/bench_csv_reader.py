@@ -0,0 +1,91 @@
+"""
+Benchmark: untyped pd.read_csv vs. the schema-declared csv_reader.
+
+Writes a synthetic raw export to a temporary directory, then reads it in a
+fresh interpreter per case and reports read time and resident memory growth:
+the old preprocess.py read, the schema read with each engine, and a projected
+read of the four columns analyze_csv_quality uses. Pass --csv to measure a real
+raw export instead.
+
+    python benchmarks/bench_csv_reader.py --rows 200000
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+QUALITY_COLUMNS = ['final_price', 'name', 'brand_name', 'sizes']
+
+
+def measure(case, path):
+    """Runs in a fresh interpreter: one read, printed as JSON."""
+    import psutil
+    import pandas as pd
+    import csv_reader
+    from preprocess import ESSENTIAL_COLUMNS
+    proc = psutil.Process()
+    before = proc.memory_info().rss
+    started = time.perf_counter()
+    if case == 'legacy':
+        df = pd.read_csv(path, usecols=lambda c: c in ESSENTIAL_COLUMNS, low_memory=False)
+    elif case == 'legacy-quality':
+        df = pd.read_csv(path)
+    elif case == 'quality':
+        df = csv_reader.read_csv(path, csv_reader.RAW_EXPORT_SCHEMA, columns=QUALITY_COLUMNS)
+    else:
+        df = csv_reader.read_csv(path, csv_reader.RAW_EXPORT_SCHEMA, columns=ESSENTIAL_COLUMNS, engine=case)
+    elapsed = time.perf_counter() - started
+    print(json.dumps({
+        'seconds': elapsed,
+        'rss_mb': (proc.memory_info().rss - before) / 1024 ** 2,
+        'frame_mb': df.memory_usage(deep=True).sum() / 1024 ** 2,
+        'columns': len(df.columns),
+    }))
+
+
+def run_measure(case, path):
+    out = subprocess.run([sys.executable, os.path.abspath(__file__), '--measure', case, path],
+                         capture_output=True, text=True, check=True, cwd=ROOT)
+    return json.loads(out.stdout.strip().splitlines()[-1])
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n\n')[0])
+    parser.add_argument('--rows', type=int, default=200000)
+    parser.add_argument('--csv')
+    parser.add_argument('--measure', nargs=2, metavar=('CASE', 'PATH'), help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.measure:
+        measure(*args.measure)
+        return
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = args.csv
+        if not path:
+            from bench_artefact_load import make_raw
+            path = os.path.join(tmp, 'raw_export.csv')
+            make_raw(args.rows).to_csv(path, index=False)
+        print(f"Raw export: {os.path.getsize(path) / 1024 ** 2:.1f} MB on disk, {os.cpu_count()} CPUs")
+        # Warm the page cache so the first case isn't charged for disk reads
+        with open(path, 'rb') as f:
+            while f.read(1 << 24):
+                pass
+        for label, case in [('pd.read_csv, inferred', 'legacy'),
+                            ('schema, C parser', 'c'),
+                            ('schema, pyarrow', 'pyarrow'),
+                            ('quality check: whole file', 'legacy-quality'),
+                            ('quality check: 4 columns', 'quality')]:
+            r = run_measure(case, path)
+            print(f"{label:<28} {r['seconds']:6.2f}s  RSS +{r['rss_mb']:7.1f} MB  "
+                  f"frame {r['frame_mb']:7.1f} MB  ({r['columns']} cols)")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,86 @@
+"""
+Benchmark: Product Finder selections by chained boolean filters vs. the bitmap index.
+
+Cleans a synthetic raw export, builds the filter index once, then runs the
+same random filter selections (category, subcategory, brand, colours, price
+range) through the old finder_rows (successive boolean masks on the frame,
+option lists from sorted(unique())) and through app.finder_positions plus
+one take. Checks every result is identical and prints the median times.
+
+    python benchmarks/bench_finder_index.py --rows 200000 --selections 200
+"""
+import argparse
+import os
+import random
+import statistics
+import sys
+import time
+
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import app  # noqa: E402
+from bench_artefact_load import make_raw  # noqa: E402
+
+
+def filtered_rows(df, category, subcat, brand, colors, price_range):
+    """finder_rows before the index, with the option lists the view recomputed every rerun."""
+    for col in app.FINDER_COLUMNS:
+        sorted(df[col].dropna().unique())
+    max_slider = 60.0 if df['final_price'].max() > 60 else float(df['final_price'].max())
+    if price_range[1] == max_slider and max_slider == 60.0:
+        filtered = df[(df['final_price'] >= price_range[0])]
+    else:
+        filtered = df[(df['final_price'] >= price_range[0]) & (df['final_price'] <= price_range[1])]
+    if category != 'All':
+        filtered = filtered[filtered['category_clean'] == category]
+    if subcat != 'All':
+        filtered = filtered[filtered['specific_category'] == subcat]
+    if brand != 'All':
+        filtered = filtered[filtered['brand_clean'] == brand]
+    if colors:
+        filtered = filtered[filtered['color_clean'].isin(colors)]
+    return filtered
+
+
+def random_selection(rng, index):
+    options = index['options']
+    category = rng.choice(['All'] + options['category_clean'])
+    subcats = index['subcats_by_category'].get(category, []) if category != 'All' else options['specific_category']
+    subcat = rng.choice(['All'] * 3 + subcats)
+    brand = rng.choice(['All'] * 2 + options['brand_clean'])
+    colors = rng.sample(options['color_clean'], rng.choice([0, 0, 1, 2, 3]))
+    low = float(rng.randint(int(index['price_min']), 40))
+    high = rng.choice([index['price_cap'], float(rng.randint(int(low), 60))])
+    return category, subcat, brand, colors, (max(low, index['price_min']), high)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n\n')[0])
+    parser.add_argument('--rows', type=int, default=200000)
+    parser.add_argument('--selections', type=int, default=200)
+    args = parser.parse_args()
+
+    df = app.auto_clean_data(make_raw(args.rows))
+    started = time.perf_counter()
+    index = app.build_finder_index(df)
+    print(f"{len(df):,} rows, index built in {time.perf_counter() - started:.2f}s")
+
+    rng = random.Random(5)
+    old, new = [], []
+    for _ in range(args.selections):
+        selection = random_selection(rng, index)
+        started = time.perf_counter()
+        expected = filtered_rows(df, *selection)
+        old.append(time.perf_counter() - started)
+        started = time.perf_counter()
+        result = df.take(app.finder_positions(index, *selection))
+        new.append(time.perf_counter() - started)
+        pd.testing.assert_frame_equal(expected, result)
+    print(f"{'boolean filters':<16} {statistics.median(old) * 1000:8.2f} ms per selection")
+    print(f"{'bitmap index':<16} {statistics.median(new) * 1000:8.2f} ms per selection  "
+          f"({statistics.median(old) / statistics.median(new):.1f}x, {args.selections} selections identical)")
+
+
+if __name__ == '__main__':
+    main()
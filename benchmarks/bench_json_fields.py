@@ -0,0 +1,100 @@
+"""
+Benchmark: per-row JSON/regex cleaning of brand and name columns vs. the
+batched decoder in clean_brand_column / clean_name_columns.
+
+    python benchmarks/bench_json_fields.py --rows 1000000
+"""
+import argparse
+import json
+import os
+import random
+import re
+import sys
+import time
+
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import app  # noqa: E402
+
+BRANDS = ['Calvin Klein', 'DORINA', 'Triumph', 'Hunkemöller', 'Passionata', 'sloggi', 'Wolford', 'Chantelle',
+          'Marks & Spencer', 'LASCANA', "Victoria's Secret", 'Anna Field']
+NAME_WORDS = ['PUSH-UP', 'Balconette', 'Brazilian', 'String', 'Body', 'Tights', 'Pyjama', 'Bralette',
+              'Lace', 'Seamless', '3 PACK', 'Soft', 'Robe', 'Cotton', 'Set', 'Underwired']
+
+
+# --- Original per-row implementation, kept here as the reference ---
+def legacy_extract(value, keys, title):
+    if pd.isna(value) or not isinstance(value, str):
+        return 'Unknown'
+    value = value.strip()
+    if value.startswith('{') and value.endswith('}'):
+        try:
+            parsed = json.loads(value)
+            for key in keys:
+                if key in parsed and isinstance(parsed[key], str):
+                    return parsed[key].strip().title() if title else parsed[key].strip()
+            for v in parsed.values():
+                if isinstance(v, str):
+                    return v.strip().title() if title else v.strip()
+        except Exception:
+            pass
+    cleaned = re.sub(r'\s+', ' ', value).strip()
+    return cleaned.title() if title else cleaned
+
+
+def legacy_clean(df):
+    df['brand_clean'] = df['brand'].fillna(df.get('brand_name', '')).apply(
+        lambda v: legacy_extract(v, app.BRAND_JSON_KEYS, True))
+    df['product_name_clean'] = df['product_name'].apply(lambda v: legacy_extract(v, app.NAME_JSON_KEYS, False))
+    df['name_clean'] = df['name'].apply(lambda v: legacy_extract(v, app.NAME_JSON_KEYS, False))
+    return df
+
+
+def batched_clean(df):
+    return app.clean_name_columns(app.clean_brand_column(df))
+
+
+def make_frame(rows, seed=3):
+    rng = random.Random(seed)
+    # The HTML extractor writes json.dumps({"name": brand}); the JSON extractor writes plain text
+    brand_cells = [json.dumps({'name': b}) for b in BRANDS] + BRANDS + [f"  {b.lower()}  " for b in BRANDS]
+    brand_cells += ['{"brand": {"id": 1}, "label": " Odd  Brand "}', '{broken json}', None, 12]
+    names = [f"{rng.choice(BRANDS)} {' '.join(rng.sample(NAME_WORDS, 3))}  -  Black" for _ in range(5000)]
+    name_cells = names + [json.dumps({'title': n}) for n in names[:500]] + [None]
+    return pd.DataFrame({
+        'brand': [rng.choice(brand_cells) for _ in range(rows)],
+        'brand_name': [rng.choice(BRANDS) for _ in range(rows)],
+        'product_name': [rng.choice(name_cells) for _ in range(rows)],
+        'name': [rng.choice(name_cells) for _ in range(rows)],
+    })
+
+
+def timed(label, func, df):
+    started = time.perf_counter()
+    result = func(df.copy())
+    elapsed = time.perf_counter() - started
+    print(f"{label:<22} {elapsed:8.2f}s  ({len(df) / elapsed:,.0f} rows/s)")
+    return result, elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n\n')[0])
+    parser.add_argument('--rows', type=int, default=1_000_000)
+    args = parser.parse_args()
+
+    df = make_frame(args.rows)
+    print(f"Synthetic frame: {len(df):,} rows (JSON backend: {app.json_loads.__module__})")
+    legacy, legacy_time = timed('before: per-row apply', legacy_clean, df)
+    batched, batched_time = timed('after: batched decoder', batched_clean, df)
+
+    for col in ['brand_clean', 'product_name_clean', 'name_clean']:
+        mismatches = sum(a != b for a, b in zip(legacy[col].tolist(), batched[col].tolist()))
+        print(f"{col}: {mismatches} mismatches")
+        if mismatches:
+            sys.exit(1)
+    print(f"Speed-up: {legacy_time / batched_time:.1f}x")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,116 @@
+"""
+Benchmark: full-frame st.dataframe vs. app.paged_table on the biggest tables.
+
+Cleans a synthetic raw export and renders each table headless with Streamlit's
+AppTest, the old way and with paged_table, reporting the bytes sent to the
+browser per rerun and the rerun time:
+- the deep-dive data table (every row and column of the filtered frame)
+- the Dorina products table (smart_style's pandas Styler over the Dorina rows)
+- the Zalando category x brand discount pivot, with --brands brand columns
+
+    python benchmarks/bench_paged_table.py --rows 100000 --brands 300 --repeat 3
+"""
+import argparse
+import os
+import statistics
+import sys
+import tempfile
+import time
+
+import numpy as np
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+# Columns of the Dorina products view (all_dorina_products_table)
+DORINA_COLUMNS = ['best_name', 'category_clean', 'specific_category', 'final_price', 'price_per_item', 'pack_size',
+                  'discount_pct', 'inventory', 'country_code']
+
+SETUP = f"""
+import sys
+sys.path.insert(0, {ROOT!r})
+import pandas as pd
+import streamlit as st
+import app
+DORINA_COLUMNS = {DORINA_COLUMNS!r}
+df = pd.read_parquet('data.parquet')
+dorina_df = df[df['brand_clean'].str.contains('Dorina', case=False, na=False)]
+dorina_columns = [col for col in DORINA_COLUMNS if col in df.columns]
+"""
+
+CASES = [
+    ('deep-dive data table',
+     "st.dataframe(app.with_in_stock_pct(df), use_container_width=True)",
+     "app.paged_table(app.with_in_stock_pct(df), 'cat_table', columns=app.DATA_TABLE_COLUMNS)"),
+    ('Dorina products table',
+     "st.dataframe(app.smart_style(dorina_df[dorina_columns].sort_values(['category_clean', 'specific_category'])), "
+     "use_container_width=True)",
+     "app.paged_table(dorina_df.sort_values(['category_clean', 'specific_category']), 'dorina_table', "
+     "columns=dorina_columns)"),
+    ('category x brand pivot',
+     "st.dataframe(pd.read_parquet('pivot.parquet'), use_container_width=True)",
+     "app.paged_table(pd.read_parquet('pivot.parquet'), 'zalando_summary', max_columns=20)"),
+]
+
+
+def measure(script, repeat):
+    import streamlit.testing.v1.local_script_runner as local_script_runner
+    from streamlit.testing.v1 import AppTest
+    sent = {}
+    parse = local_script_runner.parse_tree_from_messages
+
+    def counting_parse(msgs):
+        sent['bytes'] = sum(msg.ByteSize() for msg in msgs if msg.WhichOneof('type') == 'delta')
+        return parse(msgs)
+
+    local_script_runner.parse_tree_from_messages = counting_parse
+    try:
+        at = AppTest.from_file(script, default_timeout=600).run()
+        assert not at.exception, at.exception
+        times = []
+        for _ in range(repeat):
+            started = time.perf_counter()
+            at.run()
+            times.append(time.perf_counter() - started)
+    finally:
+        local_script_runner.parse_tree_from_messages = parse
+    return sent['bytes'], statistics.median(times)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n\n')[0])
+    parser.add_argument('--rows', type=int, default=100000)
+    parser.add_argument('--brands', type=int, default=300)
+    parser.add_argument('--repeat', type=int, default=3)
+    args = parser.parse_args()
+
+    import app
+    from bench_artefact_load import make_raw
+    with tempfile.TemporaryDirectory() as tmp:
+        os.chdir(tmp)
+        df = app.auto_clean_data(make_raw(args.rows))
+        df.to_parquet('data.parquet')
+        # The real export has hundreds of brands; spread the rows over --brands of them
+        rng = np.random.default_rng(3)
+        wide = df.assign(brand_clean=[f"Brand {i:03d}" for i in rng.integers(0, args.brands, len(df))])
+        cube = app.build_cube(wide)
+        pivot = app.cube_rollup(cube, ['category_clean', 'brand_clean'])['avg_discount'].unstack('brand_clean').round(2)
+        pivot.columns = pivot.columns.astype(str)
+        pivot.to_parquet('pivot.parquet')
+
+        print(f"{len(df):,} rows; pivot {pivot.shape[0]} x {pivot.shape[1]}; median of {args.repeat} reruns")
+        print(f"{'':<24} {'st.dataframe':>22} {'paged_table':>22}")
+        for label, old, new in CASES:
+            results = []
+            for source in [old, new]:
+                script = os.path.join(tmp, 'table.py')
+                with open(script, 'w', encoding='utf-8') as f:
+                    f.write(SETUP + source + '\n')
+                results.append(measure(script, args.repeat))
+            (old_bytes, old_time), (new_bytes, new_time) = results
+            print(f"{label:<24} {old_bytes / 1024:>10.1f} KB {old_time:>7.2f}s "
+                  f"{new_bytes / 1024:>10.1f} KB {new_time:>7.2f}s")
+
+
+if __name__ == '__main__':
+    main()
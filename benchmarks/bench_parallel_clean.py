@@ -0,0 +1,48 @@
+"""
+Benchmark: serial auto_clean_data vs. preprocess.clean_data on a process pool.
+
+Cleans the same synthetic raw export with 1, 2, 4, 8 and 16 workers, checks
+every result is identical to the serial one and prints time and speed-up.
+Scaling is bounded by the cores on the machine.
+
+    python benchmarks/bench_parallel_clean.py --rows 500000 --workers 1 2 4 8 16
+"""
+import argparse
+import os
+import sys
+import time
+
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import app  # noqa: E402
+import preprocess  # noqa: E402
+from bench_artefact_load import make_raw  # noqa: E402
+
+
+def timed(func, *args):
+    # Every run starts from an empty colour cache so none gets a head start
+    app.COLOR_MAPPING_CACHE.clear()
+    started = time.perf_counter()
+    result = func(*args)
+    return result, time.perf_counter() - started
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n\n')[0])
+    parser.add_argument('--rows', type=int, default=500000)
+    parser.add_argument('--workers', type=int, nargs='+', default=[1, 2, 4, 8, 16])
+    args = parser.parse_args()
+
+    raw = make_raw(args.rows)
+    print(f"Synthetic raw export: {len(raw):,} rows, {os.cpu_count()} CPUs")
+    serial, serial_time = timed(app.auto_clean_data, raw.copy())
+    print(f"{'serial':>10} {serial_time:8.2f}s")
+    for workers in args.workers:
+        result, elapsed = timed(preprocess.clean_data, raw.copy(), workers)
+        pd.testing.assert_frame_equal(serial, result)
+        print(f"{workers:>3} workers {elapsed:8.2f}s  speed-up {serial_time / elapsed:5.2f}x  (identical)")
+
+
+if __name__ == '__main__':
+    main()
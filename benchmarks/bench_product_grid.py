@@ -0,0 +1,120 @@
+"""
+Benchmark: product cards as separate Streamlit elements vs. one HTML grid.
+
+Renders the same Product Finder page (20 cards, thumbnails from the stand-in
+image server in benchmarks/image_server.py) headless with Streamlit's AppTest,
+once with the old per-card st.columns / st.image / st.markdown / st.write
+calls and once with app.product_grid, and reports the deltas and bytes sent
+to the browser per rerun and the rerun time.
+
+    python benchmarks/bench_product_grid.py --rows 2000 --repeat 5
+"""
+import argparse
+import os
+import statistics
+import sys
+import tempfile
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+SETUP = f"""
+import sys
+sys.path.insert(0, {ROOT!r})
+import pandas as pd
+import streamlit as st
+import app
+gallery = pd.read_parquet('gallery.parquet')
+"""
+
+COLUMNS_SCRIPT = SETUP + """
+n_cols = 5
+for i in range(0, len(gallery), n_cols):
+    row = gallery.iloc[i:i+n_cols]
+    cols = st.columns(n_cols)
+    for j, (_, prod) in enumerate(row.iterrows()):
+        with cols[j]:
+            img_url = prod.get('main_image')
+            if img_url and pd.notna(img_url) and str(img_url).startswith('http'):
+                app.product_image(img_url, width=120)
+            else:
+                st.write("No image")
+            st.markdown(f"**{prod['best_name']}**")
+            st.write(f"€{prod['final_price']:.2f}")
+            if prod.get('discount_pct', 0) > 0:
+                st.markdown(f"<span style='color:red;font-weight:bold'>-{prod['discount_pct']:.0f}%</span>", unsafe_allow_html=True)
+            if 'color_clean' in prod and pd.notna(prod['color_clean']):
+                st.write(f"Color: {prod['color_clean']}")
+            st.write(f"Brand: {prod['brand_clean']}")
+            if 'in_stock' in prod:
+                if prod['in_stock'] == 0:
+                    st.markdown(f"<span style='color:gray'>Out of stock</span>", unsafe_allow_html=True)
+                else:
+                    st.write(f"In stock: {prod['in_stock']}")
+            if 'product_url' in prod and pd.notna(prod['product_url']):
+                st.markdown(f"[View on Zalando]({prod['product_url']})", unsafe_allow_html=True)
+"""
+
+GRID_SCRIPT = SETUP + """
+app.product_grid([app.finder_card(prod) for prod in gallery.to_dict('records')], columns=5, image_width=120)
+"""
+
+
+def measure(script, repeat):
+    import streamlit.testing.v1.local_script_runner as local_script_runner
+    from streamlit.testing.v1 import AppTest
+    sent = {}
+    parse = local_script_runner.parse_tree_from_messages
+
+    def counting_parse(msgs):
+        deltas = [msg for msg in msgs if msg.WhichOneof('type') == 'delta']
+        sent['deltas'], sent['bytes'] = len(deltas), sum(msg.ByteSize() for msg in deltas)
+        return parse(msgs)
+
+    local_script_runner.parse_tree_from_messages = counting_parse
+    try:
+        at = AppTest.from_file(script, default_timeout=300).run()
+        assert not at.exception, at.exception
+        times = []
+        for _ in range(repeat):
+            started = time.perf_counter()
+            at.run()
+            times.append(time.perf_counter() - started)
+    finally:
+        local_script_runner.parse_tree_from_messages = parse
+    return sent['deltas'], sent['bytes'], statistics.median(times)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n\n')[0])
+    parser.add_argument('--rows', type=int, default=2000)
+    parser.add_argument('--repeat', type=int, default=5)
+    args = parser.parse_args()
+
+    import app
+    from bench_artefact_load import make_raw
+    from image_server import serve
+    server, _, base = serve()
+    with tempfile.TemporaryDirectory() as tmp:
+        os.chdir(tmp)
+        df = app.auto_clean_data(make_raw(args.rows))
+        gallery = df.iloc[:20].copy()
+        gallery['main_image'] = [f"{base}article/{i}.jpg" for i in range(len(gallery))]
+        gallery.to_parquet('gallery.parquet')
+        # Both layouts read the same cached thumbnails
+        for url in gallery['main_image']:
+            app.image_cache.thumbnail(url, wait=30)
+        print(f"One Product Finder page of {len(gallery)} cards, median of {args.repeat} reruns")
+        print(f"{'':<22} {'deltas':>7} {'KB sent':>9} {'rerun':>9}")
+        for label, source in [('st.columns per card', COLUMNS_SCRIPT), ('product_grid', GRID_SCRIPT)]:
+            script = os.path.join(tmp, 'page.py')
+            with open(script, 'w', encoding='utf-8') as f:
+                f.write(source)
+            deltas, sent, rerun = measure(script, args.repeat)
+            print(f"{label:<22} {deltas:>7} {sent / 1024:>9.1f} {rerun * 1000:>7.1f}ms")
+    server.shutdown()
+
+
+if __name__ == '__main__':
+    main()
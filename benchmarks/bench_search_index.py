@@ -0,0 +1,85 @@
+"""
+Benchmark: product search by str.contains over best_name vs. the inverted index.
+
+Cleans a synthetic raw export, builds its size table and the search index,
+then times a set of queries both ways: a case-insensitive str.contains per
+term over best_name (what a naive search box would do on every keystroke)
+and app.search_positions. The index results are checked against a
+brute-force scan of the same tokens; prints build time and per-query latency.
+
+    python benchmarks/bench_search_index.py --rows 200000
+"""
+import argparse
+import os
+import statistics
+import sys
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import app  # noqa: E402
+from bench_artefact_load import make_raw  # noqa: E402
+
+QUERIES = ['lace', 'lace bra', 'triumph push', 'push-up', 'bra 3 pack', 'dorina bl', 'calvin klein body',
+           'nude thong 75b', '80c', 'lace xl', 'b', 'no such product']
+
+
+def brute_force(df, sizes, query):
+    """Rows where every query term prefixes some token of the searched fields; the reference result."""
+    terms = app.search_tokens(query)
+    row_tokens = [set() for _ in range(len(df))]
+    for col in app.SEARCH_FIELDS:
+        for row, value in enumerate(df[col].tolist()):
+            row_tokens[row].update(app.search_tokens(value) if isinstance(value, str) else [])
+    for row, size in zip(sizes['row_id'].tolist(), sizes['size'].astype(str).tolist()):
+        row_tokens[row].update(app.search_tokens(size))
+    return {row for row, tokens in enumerate(row_tokens)
+            if all(any(token.startswith(term) for token in tokens) for term in terms)}
+
+
+def timed(func, *args, repeat=5):
+    times = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        result = func(*args)
+        times.append(time.perf_counter() - started)
+    return result, statistics.median(times)
+
+
+def contains_search(df, query):
+    mask = np.ones(len(df), dtype=bool)
+    for term in query.split():
+        mask &= df['best_name'].str.contains(term, case=False, regex=False).to_numpy()
+    return np.flatnonzero(mask)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n\n')[0])
+    parser.add_argument('--rows', type=int, default=200000)
+    parser.add_argument('--check-rows', type=int, default=20000,
+                        help='rows checked against the brute-force scan (it is slow)')
+    args = parser.parse_args()
+
+    df = app.auto_clean_data(make_raw(args.rows))
+    sizes = app.build_size_table(df)
+    index, build_time = timed(app.build_search_index, df, sizes, repeat=1)
+    print(f"{len(df):,} rows, {len(index['tokens']):,} tokens, {len(index['postings']):,} postings, "
+          f"built in {build_time:.2f}s")
+
+    head = df.iloc[:args.check_rows]
+    head_sizes = sizes[sizes['row_id'] < len(head)]
+    head_index = app.build_search_index(head, head_sizes)
+    for query in QUERIES:
+        assert set(app.search_positions(head_index, query)) == brute_force(head, head_sizes, query), query
+    print(f"results match a brute-force scan on the first {len(head):,} rows")
+
+    print(f"{'query':<22} {'str.contains':>13} {'index':>9} {'hits':>8}")
+    for query in QUERIES:
+        _, contains_time = timed(contains_search, df, query)
+        hits, index_time = timed(app.search_positions, index, query)
+        print(f"{query:<22} {contains_time * 1000:10.1f} ms {index_time * 1000:6.2f} ms {len(hits):>8,}")
+
+
+if __name__ == '__main__':
+    main()
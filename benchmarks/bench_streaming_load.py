@@ -0,0 +1,146 @@
+"""
+Benchmark: buffered download-then-parse vs. streaming to disk and parsing the file.
+
+Serves a cleaned CSV and the Parquet artefact from a local HTTP server, then
+loads each in a fresh interpreter both ways and reports load time and peak
+memory growth during the load: the old load_data (response.text wrapped in
+StringIO, response.content for Parquet) and data_source.fetch() followed by a
+read of the disk copy. Also checks that an upstream change whose disk copy
+can't be replaced (as on Windows while the file is memory-mapped) keeps the
+previous copy and is picked up by the next revalidation.
+
+    python benchmarks/bench_streaming_load.py --rows 200000
+"""
+import argparse
+import functools
+import http.server
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+
+class QuietHandler(http.server.SimpleHTTPRequestHandler):
+    def log_message(self, *args):
+        pass
+
+
+def measure(case, url, cache_dir):
+    """Runs in a fresh interpreter: one load, printed as JSON."""
+    import io
+    import requests
+    import app
+    import csv_reader
+    import data_source
+    started = time.perf_counter()
+    with data_source.track_peak_memory() as memory:
+        if case == 'csv-buffered':
+            text = requests.get(url).text
+            df = csv_reader.read_csv(io.StringIO(text), csv_reader.CLEANED_SCHEMA, columns=app.DASHBOARD_COLUMNS)
+        elif case == 'parquet-buffered':
+            df = app.read_artefact(requests.get(url).content)
+        elif case == 'csv-streamed':
+            df = csv_reader.read_csv(data_source.fetch(url, cache_dir=cache_dir), csv_reader.CLEANED_SCHEMA,
+                                     columns=app.DASHBOARD_COLUMNS)
+        else:
+            df = app.read_artefact(data_source.fetch(url, cache_dir=cache_dir))
+    print(json.dumps({
+        'seconds': time.perf_counter() - started,
+        'peak_mb': memory['peak_mb'],
+        'frame_mb': df.memory_usage(deep=True).sum() / 1024 ** 2,
+        'rows': len(df),
+    }))
+
+
+def check_failed_replace(base, served, cache_dir):
+    """A failing os.replace of the body leaves the previous disk copy and metadata; the next revalidation succeeds."""
+    import data_source
+    path = os.path.join(served, 'check.csv')
+    url = base + 'check.csv'
+    with open(path, 'w', encoding='utf-8') as f:
+        f.write('sku\nA\n')
+    body_path = data_source.fetch(url, cache_dir=cache_dir)
+    before = data_source.read_meta(url, cache_dir)
+
+    with open(path, 'w', encoding='utf-8') as f:
+        f.write('sku\nA\nB\n')
+    # Past the copy's Last-Modified, so the server doesn't answer 304
+    os.utime(path, (time.time() + 60, time.time() + 60))
+    replace = data_source.os.replace
+
+    def locked_replace(src, dst):
+        if dst == body_path:
+            raise PermissionError(13, 'The process cannot access the file', dst)
+        return replace(src, dst)
+
+    data_source.os.replace = locked_replace
+    try:
+        assert data_source.revalidate(url, cache_dir=cache_dir) is False
+    finally:
+        data_source.os.replace = replace
+    with open(body_path, encoding='utf-8') as f:
+        assert f.read() == 'sku\nA\n'
+    assert data_source.read_meta(url, cache_dir) == before
+    assert not [name for name in os.listdir(cache_dir) if name.endswith('.tmp')]
+
+    assert data_source.revalidate(url, cache_dir=cache_dir) is True
+    with open(body_path, encoding='utf-8') as f:
+        assert f.read() == 'sku\nA\nB\n'
+    print("Failed replace: previous disk copy kept, picked up by the next revalidation")
+
+
+def run_measure(case, url, cache_dir):
+    out = subprocess.run([sys.executable, os.path.abspath(__file__), '--measure', case, url, cache_dir],
+                         capture_output=True, text=True, check=True, cwd=ROOT)
+    return json.loads(out.stdout.strip().splitlines()[-1])
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n\n')[0])
+    parser.add_argument('--rows', type=int, default=200000)
+    parser.add_argument('--measure', nargs=3, metavar=('CASE', 'URL', 'CACHE_DIR'), help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.measure:
+        measure(*args.measure)
+        return
+
+    import app
+    from bench_artefact_load import make_raw
+    with tempfile.TemporaryDirectory() as tmp:
+        served = os.path.join(tmp, 'served')
+        os.makedirs(served)
+        cleaned = app.auto_clean_data(make_raw(args.rows))
+        cleaned.to_csv(os.path.join(served, 'cleaned_zalando_data.csv'), index=False)
+        app.write_artefact(cleaned, os.path.join(served, 'cleaned_zalando_data.parquet'))
+        del cleaned
+
+        handler = functools.partial(QuietHandler, directory=served)
+        server = http.server.ThreadingHTTPServer(('127.0.0.1', 0), handler)
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        base = f"http://127.0.0.1:{server.server_port}/"
+        try:
+            for name in ['cleaned_zalando_data.csv', 'cleaned_zalando_data.parquet']:
+                print(f"{name}: {os.path.getsize(os.path.join(served, name)) / 1024 ** 2:.1f} MB")
+            kind = {'csv': 'cleaned_zalando_data.csv', 'parquet': 'cleaned_zalando_data.parquet'}
+            for label, case in [('CSV, buffered', 'csv-buffered'), ('CSV, streamed to disk', 'csv-streamed'),
+                                ('Parquet, buffered', 'parquet-buffered'),
+                                ('Parquet, streamed to disk', 'parquet-streamed')]:
+                # A fresh cache dir each time, so the streamed cases include the download
+                cache_dir = tempfile.mkdtemp(dir=tmp)
+                r = run_measure(case, base + kind[case.split('-')[0]], cache_dir)
+                print(f"{label:<26} {r['seconds']:6.2f}s  peak +{r['peak_mb']:7.1f} MB  "
+                      f"frame {r['frame_mb']:7.1f} MB  ({r['rows']:,} rows)")
+            check_failed_replace(base, served, tempfile.mkdtemp(dir=tmp))
+        finally:
+            server.shutdown()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,134 @@
+"""
+Benchmark: product images straight from the CDN vs. through image_cache.
+
+Serves stand-in product photos from benchmarks/image_server.py with a fixed
+latency and renders gallery pages of 20 images the way the views do:
+- remote: every session downloads every full-size image (what st.image(url)
+  costs the browsers), one request per image per session
+- cached: image_cache.thumbnail() after prefetching the page, from a cold
+  cache, then warm, with several sessions asking at once
+Reports time per page, requests to the image server and bytes sent to
+browsers, checks LRU eviction keeps the cache under its cap, and checks that
+app.image_src answers at once with the remote URL for a slow, missing or
+broken image instead of waiting for (or failing on) its fetch.
+
+    python benchmarks/bench_thumbnail_cache.py --pages 5 --sessions 4 --delay 0.05
+"""
+import argparse
+import os
+import sys
+import tempfile
+import threading
+import time
+
+import requests
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import image_cache  # noqa: E402
+from image_server import serve  # noqa: E402
+
+PAGE_SIZE = 20
+# Seconds a session waits for a page's thumbnails in this benchmark (views never wait)
+PAGE_WAIT = 30
+# image_src must answer well within this many seconds even when the image server is slow
+RENDER_BUDGET = 0.2
+
+
+def page_urls(base, page):
+    return [f"{base}article/{page:03d}-{i:02d}.jpg" for i in range(PAGE_SIZE)]
+
+
+def remote_page(urls):
+    return sum(len(requests.get(url, timeout=30).content) for url in urls)
+
+
+def cached_page(urls, cache_dir, next_urls=()):
+    image_cache.prefetch(urls, cache_dir)
+    image_cache.prefetch(next_urls, cache_dir)
+    paths = [image_cache.thumbnail(url, wait=PAGE_WAIT, cache_dir=cache_dir) for url in urls]
+    assert all(paths), 'thumbnail fetch failed'
+    return sum(os.path.getsize(path) for path in paths)
+
+
+def in_sessions(sessions, func, *args):
+    """Runs func(*args) in `sessions` threads at once; returns (seconds, total of results)."""
+    results = []
+    threads = [threading.Thread(target=lambda: results.append(func(*args))) for _ in range(sessions)]
+    started = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return time.perf_counter() - started, sum(results)
+
+
+def check_render_never_waits(delay=2.0):
+    """image_src of slow, missing and broken images returns the remote URL at once and never raises."""
+    import app
+    server, _, base = serve(delay=delay)
+    try:
+        urls = [f"{base}slow/{time.time_ns()}.jpg", f"{base}missing.png", f"{base}broken/{time.time_ns()}.jpg"]
+        for url in urls:
+            started = time.perf_counter()
+            src = app.image_src(url)
+            elapsed = time.perf_counter() - started
+            assert src == url and elapsed < RENDER_BUDGET, (url, src, elapsed)
+        # The fetches finish (or fail) in the background; the slow one is served from the cache afterwards
+        failed = image_cache.STATS['failed']
+        deadline = time.time() + delay + 10
+        while image_cache.STATS['failed'] < failed + 2 and time.time() < deadline:
+            time.sleep(0.1)
+        while image_cache.cached_path(urls[0]) is None and time.time() < deadline:
+            time.sleep(0.1)
+        assert image_cache.cached_path(urls[0]) and image_cache.STATS['failed'] >= failed + 2
+        for url in urls:
+            app.image_src(url)
+    finally:
+        server.shutdown()
+    print(f"Render path: slow ({delay:.0f}s), missing and broken images answered in under "
+          f"{RENDER_BUDGET * 1000:.0f} ms each with the remote URL")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n\n')[0])
+    parser.add_argument('--pages', type=int, default=5)
+    parser.add_argument('--sessions', type=int, default=4)
+    parser.add_argument('--delay', type=float, default=0.05, help='image server latency, seconds')
+    args = parser.parse_args()
+
+    server, handler, base = serve(delay=args.delay)
+    try:
+        with tempfile.TemporaryDirectory() as cache_dir:
+            print(f"{args.pages} pages of {PAGE_SIZE} images, {args.sessions} sessions, "
+                  f"{args.delay * 1000:.0f} ms image latency")
+            print(f"{'':<26} {'s/page':>8} {'server reqs':>12} {'MB to browsers':>15}")
+            for label, run in [
+                ('remote, full size', lambda page: in_sessions(args.sessions, remote_page, page_urls(base, page))),
+                ('cached, cold', lambda page: in_sessions(args.sessions, cached_page, page_urls(base, page), cache_dir,
+                                                          page_urls(base, page + 1) if page + 1 < args.pages else [])),
+                ('cached, warm', lambda page: in_sessions(args.sessions, cached_page, page_urls(base, page),
+                                                          cache_dir)),
+            ]:
+                handler.requests_served = 0
+                times, sent = [], 0
+                for page in range(args.pages):
+                    seconds, page_bytes = run(page)
+                    times.append(seconds)
+                    sent += page_bytes
+                print(f"{label:<26} {sum(times) / len(times):8.3f} {handler.requests_served:>12,} "
+                      f"{sent / 1024 ** 2:>15.1f}")
+
+            stored = sum(entry.stat().st_size for entry in os.scandir(os.path.join(cache_dir, 'blobs')))
+            cap = stored // 2
+            image_cache.evict(cap, cache_dir)
+            left = sum(entry.stat().st_size for entry in os.scandir(os.path.join(cache_dir, 'blobs')))
+            assert left <= cap * 0.9
+            print(f"LRU eviction: {stored / 1024:.0f} KB -> {left / 1024:.0f} KB under a {cap / 1024:.0f} KB cap "
+                  f"({image_cache.STATS['evicted']} thumbnails evicted)")
+    finally:
+        server.shutdown()
+    check_render_never_waits()
+
+
+if __name__ == '__main__':
+    main()
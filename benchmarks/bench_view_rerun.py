@@ -0,0 +1,107 @@
+"""
+Benchmark: rerun latency with all five views in st.tabs vs. only the selected view.
+
+Writes the artefacts for a synthetic dataset to a temporary directory and drives
+the app headless with Streamlit's AppTest. For each view it changes one of that
+view's widgets and times the rerun, once with the old layout (every view runs
+inside st.tabs on every rerun) and once with the view navigation in app.main().
+
+    python benchmarks/bench_view_rerun.py --rows 20000 --repeat 5
+"""
+import argparse
+import os
+import statistics
+import sys
+import tempfile
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+TABS_SCRIPT = f"""
+import sys
+sys.path.insert(0, {ROOT!r})
+import streamlit as st
+import app
+df = app.load_data()
+tabs = st.tabs(list(app.VIEWS))
+for tab, (render, _) in zip(tabs, app.VIEWS.values()):
+    with tab:
+        render(df)
+"""
+
+VIEW_SCRIPT = f"""
+import sys
+sys.path.insert(0, {ROOT!r})
+import streamlit as st
+import app
+df = app.load_data()
+view = st.radio("View", list(app.VIEWS), horizontal=True, key='view', label_visibility='collapsed')
+app.keep_view_state(view)
+app.VIEWS[view][0](df)
+"""
+
+# One widget per view to change, by key
+INTERACTIONS = [
+    ("🏠 Dashboard", 'dashboard_category'),
+    ("📊 Brand Performance", 'brand_perf_brand'),
+    ("🤝 Brand Comparison", 'compare_brand2'),
+    ("🛍️ Product Viewer", 'viewer_brand'),
+]
+
+
+def time_reruns(script, repeat):
+    from streamlit.testing.v1 import AppTest
+    at = AppTest.from_file(script, default_timeout=600)
+    started = time.perf_counter()
+    at.run()
+    first = time.perf_counter() - started
+    assert not at.exception, at.exception
+    results = {}
+    for view, key in INTERACTIONS:
+        if at.radio:
+            at.radio(key='view').set_value(view).run()
+        times = []
+        for i in range(repeat):
+            widget = at.selectbox(key=key)
+            widget.set_value(widget.options[(i + 1) % len(widget.options)])
+            started = time.perf_counter()
+            at.run()
+            times.append(time.perf_counter() - started)
+            assert not at.exception, at.exception
+        results[view] = statistics.median(times)
+    return first, results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n\n')[0])
+    parser.add_argument('--rows', type=int, default=20000)
+    parser.add_argument('--repeat', type=int, default=5)
+    args = parser.parse_args()
+
+    import app
+    from bench_artefact_load import make_raw
+    with tempfile.TemporaryDirectory() as tmp:
+        os.chdir(tmp)
+        cleaned = app.auto_clean_data(make_raw(args.rows))
+        app.write_artefact(cleaned, app.CLEANED_PARQUET)
+        app.write_size_table(app.build_size_table(cleaned))
+        app.write_cube(app.build_cube(app.read_artefact(app.CLEANED_PARQUET)))
+        scripts = {}
+        for name, source in [('tabs', TABS_SCRIPT), ('view', VIEW_SCRIPT)]:
+            scripts[name] = os.path.join(tmp, f"{name}.py")
+            with open(scripts[name], 'w', encoding='utf-8') as f:
+                f.write(source)
+
+        tabs_first, tabs = time_reruns(scripts['tabs'], args.repeat)
+        view_first, views = time_reruns(scripts['view'], args.repeat)
+        print(f"{args.rows:,} rows, median of {args.repeat} reruns")
+        print(f"{'':<30} {'all tabs':>10} {'active view':>12}")
+        print(f"{'first run':<30} {tabs_first:>9.2f}s {view_first:>11.2f}s")
+        for view, _ in INTERACTIONS:
+            label = 'change in ' + view.split(' ', 1)[1]
+            print(f"{label:<30} {tabs[view]:>9.2f}s {views[view]:>11.2f}s")
+
+
+if __name__ == '__main__':
+    main()
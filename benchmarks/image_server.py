@@ -0,0 +1,79 @@
+"""
+Local stand-in for the Zalando image CDN.
+
+Answers GET /<anything>.jpg with a deterministic full-size JPEG (a solid colour
+derived from the path, 1200x1600 like the product photos) after an optional
+delay, and counts the requests it served. Paths under /broken/ get a body that
+isn't an image. Point main_image URLs at it to
+exercise image_cache without the network:
+
+    python benchmarks/image_server.py --port 8765 --delay 0.05
+"""
+import argparse
+import hashlib
+import http.server
+import io
+import threading
+import time
+
+from PIL import Image
+
+IMAGE_SIZE = (1200, 1600)
+
+
+def render(path, size=IMAGE_SIZE):
+    """JPEG bytes of the stand-in image for `path`."""
+    r, g, b = hashlib.md5(path.encode('utf-8')).digest()[:3]
+    out = io.BytesIO()
+    Image.new('RGB', size, (r, g, b)).save(out, format='JPEG', quality=90)
+    return out.getvalue()
+
+
+class ImageHandler(http.server.BaseHTTPRequestHandler):
+    delay = 0.0
+    requests_served = 0
+    bytes_served = 0
+    _lock = threading.Lock()
+
+    def do_GET(self):
+        if not self.path.endswith('.jpg'):
+            self.send_error(404)
+            return
+        time.sleep(self.delay)
+        body = b'not an image' if self.path.startswith('/broken/') else render(self.path)
+        with self._lock:
+            type(self).requests_served += 1
+            type(self).bytes_served += len(body)
+        self.send_response(200)
+        self.send_header('Content-Type', 'image/jpeg')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+def serve(port=0, delay=0.0):
+    """Starts the server on a daemon thread; returns (server, handler class, base URL)."""
+    handler = type('Handler', (ImageHandler,), {'delay': delay, 'requests_served': 0, 'bytes_served': 0})
+    server = http.server.ThreadingHTTPServer(('127.0.0.1', port), handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, handler, f"http://127.0.0.1:{server.server_port}/"
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n\n')[0])
+    parser.add_argument('--port', type=int, default=8765)
+    parser.add_argument('--delay', type=float, default=0.0, help='seconds before each response')
+    args = parser.parse_args()
+    server, _, base = serve(args.port, args.delay)
+    print(f"🖼️ Serving stand-in images at {base}<name>.jpg")
+    try:
+        threading.Event().wait()
+    except KeyboardInterrupt:
+        server.shutdown()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,68 @@
+"""
+Vectorised keyword classification for the cleaning pipeline.
+
+A keyword map (keyword -> label, first matching keyword in dict order wins) is
+compiled once into a single alternation regex. Columns are classified by
+factorising them and running the regex only on the distinct values, so a
+million rows with a few thousand distinct slugs cost a few thousand scans.
+"""
+import re
+from typing import Callable, Dict, Optional
+
+import numpy as np
+import pandas as pd
+
+
+def map_unique(values, func: Callable, default=None) -> np.ndarray:
+    """
+    Applies func once per distinct value of `values` and maps the results back
+    to every row. Missing values get `default`. Returns an object array.
+    """
+    codes, uniques = pd.factorize(pd.Series(values, dtype=object), use_na_sentinel=True)
+    results = np.empty(len(uniques) + 1, dtype=object)
+    results[:len(uniques)] = [func(value) for value in uniques]
+    # factorize codes missing values as -1, which picks up the trailing default
+    results[-1] = default
+    return results[codes]
+
+
+class KeywordClassifier:
+    """
+    Substring classifier with the same semantics as scanning
+    `for keyword, label in keyword_map.items(): if keyword in text.lower()`.
+    """
+    def __init__(self, keyword_map: Dict[str, str]):
+        self.keywords = list(keyword_map)
+        self.labels = [keyword_map[k] for k in self.keywords]
+        self.priority = {k: i for i, k in enumerate(self.keywords)}
+        # The lookahead reports a match at every position, even overlapping ones, and
+        # at each position the alternation picks the earliest keyword in dict order.
+        # The smallest index over all positions is therefore the first keyword
+        # in dict order that occurs anywhere in the text.
+        self.pattern = re.compile('(?=(' + '|'.join(re.escape(k) for k in self.keywords) + '))')
+        # Replacing '-' with ' ' can only create new matches for keywords containing a space
+        self.needs_space_pass = any(' ' in k for k in self.keywords)
+
+    def _first_match(self, text: str) -> Optional[str]:
+        best = None
+        for match in self.pattern.finditer(text):
+            index = self.priority[match.group(1)]
+            if best is None or index < best:
+                best = index
+                if best == 0:
+                    break
+        return self.labels[best] if best is not None else None
+
+    def classify(self, text) -> Optional[str]:
+        """Label of the first keyword (in dict order) found in text, else None."""
+        if not isinstance(text, str):
+            return None
+        text_lc = text.lower()
+        label = self._first_match(text_lc)
+        if label is None and self.needs_space_pass:
+            label = self._first_match(text_lc.replace('-', ' '))
+        return label
+
+    def classify_values(self, values) -> np.ndarray:
+        """Classifies a column, scanning each distinct value only once."""
+        return map_unique(values, self.classify)
@@ -0,0 +1,147 @@
+"""
+Schema-declared CSV reading for the crawl and dashboard files.
+
+Each file the pipeline reads has a declared schema (column -> dtype), so pandas
+doesn't have to sniff types, and callers list just the columns they need
+instead of loading the whole file. 'N/A', the placeholder the
+scrapers write for missing fields, is read as a null everywhere. Columns not in
+a schema are still read, with inferred types.
+"""
+import io
+from typing import Dict, Iterator, List, Optional
+
+import numpy as np
+import pandas as pd
+
+try:
+    import pyarrow as pa
+    import pyarrow.csv as pacsv
+except ImportError:
+    pa = None
+
+# pandas' C parser by default; engine='pyarrow' parses on all cores, which pays off
+# on large files on multi-core machines (see benchmarks/bench_csv_reader.py)
+DEFAULT_ENGINE = 'c'
+ENGINES = ['c', 'pyarrow']
+
+# Read as missing values; every other string (e.g. a brand called "None") is kept as is
+NULL_TOKENS = ['', 'N/A', 'NaN', 'nan', 'null']
+
+# --- Scraper output (scraper.py category crawl, also product_scraper.py's input) ---
+CLEANED_DATA_COLUMNS = [
+    'domain','country_code','url','sku','condition','gender','product_name','brand','description','manufacturer',
+    'badges','initial_price','final_price','discount','currency','inventory','is_sale','in_stock','delivery',
+    'root_category','category_tree','main_image','image_count','image_urls','rating','reviews_count','best_rating',
+    'worst_rating','rating_count','review_count','top_reviews','product_url','name','SKU','other_attributes','color',
+    'colors','sizes','similar_products','people_bought_together','related_products','has_sellback','brand_name',
+    'timestamp','input','discovery_input','error','error_code','warning','warning_code','crawl_category'
+]
+SCRAPER_NUMERIC_COLUMNS = ['initial_price', 'final_price', 'discount', 'image_count', 'rating', 'reviews_count']
+# in_stock is 'True' / a size count depending on the extractor, so it stays text here
+SCRAPER_OUTPUT_SCHEMA = {
+    col: 'float64' if col in SCRAPER_NUMERIC_COLUMNS else str for col in CLEANED_DATA_COLUMNS
+}
+
+# --- Raw BrightData-style export (preprocess.py input) ---
+RAW_EXPORT_SCHEMA = {
+    **{col: str for col in [
+        'sku', 'product_name', 'brand', 'brand_name', 'name', 'color', 'colors', 'sizes', 'main_image',
+        'product_url', 'discovery_input', 'crawl_category', 'country_code', 'inventory'
+    ]},
+    # Prices stay text so one malformed cell (e.g. '12,99 €') can't fail the read;
+    # app.clean_price_columns coerces them to numbers, bad cells to NaN
+    'initial_price': str,
+    'final_price': str,
+    # in_stock / total are size counts in some exports and booleans in others, so they are inferred
+}
+
+# --- Cleaned dashboard file (preprocess.py output) ---
+# Low-cardinality labels load as categoricals, prices as float32, the rest as text
+CATEGORICAL_COLUMNS = ['brand_clean', 'category_clean', 'specific_category', 'color_clean', 'country_code']
+FLOAT32_COLUMNS = ['initial_price', 'final_price', 'discount_pct', 'price_per_item']
+TEXT_COLUMNS = [
+    'sku', 'product_name', 'brand', 'brand_name', 'name', 'color', 'colors', 'sizes', 'main_image',
+    'product_url', 'discovery_input', 'crawl_category', 'product_name_clean', 'name_clean', 'best_name'
+]
+CLEANED_SCHEMA = {
+    **{col: 'category' for col in CATEGORICAL_COLUMNS},
+    **{col: 'float32' for col in FLOAT32_COLUMNS},
+    **{col: str for col in TEXT_COLUMNS},
+    'in_stock': 'float32',
+    'total': 'float32',
+    'pack_size': 'int8',
+    'inventory': str,
+}
+
+
+def csv_columns(source) -> List[str]:
+    """Header of a CSV file (path or open buffer) without reading any rows."""
+    if hasattr(source, 'seek'):
+        position = source.tell()
+        columns = pd.read_csv(source, nrows=0).columns.tolist()
+        source.seek(position)
+        return columns
+    return pd.read_csv(source, nrows=0).columns.tolist()
+
+
+def _read_options(source, schema: Dict, columns: Optional[List[str]]) -> Dict:
+    header = csv_columns(source)
+    usecols = [col for col in header if col in columns] if columns is not None else header
+    return {
+        'usecols': usecols,
+        'dtype': {col: schema[col] for col in usecols if col in schema},
+        'na_values': NULL_TOKENS,
+        'keep_default_na': False,
+    }
+
+
+def _arrow_type(dtype):
+    if dtype is str:
+        return pa.string()
+    if dtype == 'category':
+        return pa.dictionary(pa.int32(), pa.string())
+    return pa.from_numpy_dtype(np.dtype(dtype))
+
+
+def _read_pyarrow(source, options: Dict) -> pd.DataFrame:
+    # pandas' engine='pyarrow' infers types before applying dtype, which turns e.g. the
+    # SKU '00123' into '123'; declaring the Arrow column types up front avoids that
+    if isinstance(source, io.StringIO):
+        source = io.BytesIO(source.getvalue().encode('utf-8'))
+    convert = pacsv.ConvertOptions(
+        include_columns=options['usecols'],
+        column_types={col: _arrow_type(dtype) for col, dtype in options['dtype'].items()},
+        null_values=options['na_values'],
+        strings_can_be_null=True,
+    )
+    df = pacsv.read_csv(source, convert_options=convert).to_pandas()
+    # Missing text comes back as None; use NaN like the C parser
+    for col in df.select_dtypes(include='object').columns:
+        df[col] = df[col].where(df[col].notna(), np.nan)
+    return df
+
+
+def read_csv(source, schema: Dict, columns: Optional[List[str]] = None, engine: Optional[str] = None
+             ) -> pd.DataFrame:
+    """
+    Reads a CSV with the dtypes declared in `schema`. `columns` projects the read
+    to those columns (ones missing from the file are skipped); by default every
+    column is read. `engine` is 'c' or 'pyarrow' (default: DEFAULT_ENGINE).
+    """
+    engine = engine or DEFAULT_ENGINE
+    options = _read_options(source, schema, columns)
+    if engine == 'pyarrow':
+        if pa is None:
+            raise ImportError("engine='pyarrow' needs the pyarrow package")
+        return _read_pyarrow(source, options)
+    # Type inference needs the whole file tokenised at once to be consistent; when every
+    # column is declared the parser can work through it in chunks, at about half the peak memory
+    low_memory = all(col in options['dtype'] for col in options['usecols'])
+    return pd.read_csv(source, engine='c', low_memory=low_memory, **options)
+
+
+def read_csv_chunks(source, schema: Dict, columns: Optional[List[str]] = None,
+                    chunksize: int = 20000) -> Iterator[pd.DataFrame]:
+    """Like read_csv, in chunks of `chunksize` rows (C parser; pyarrow can't stream through pandas)."""
+    options = _read_options(source, schema, columns)
+    return pd.read_csv(source, chunksize=chunksize, engine='c', **options)
@@ -0,0 +1,235 @@
+"""
+On-disk copy of the published dashboard files, revalidated in the background.
+
+The dashboard used to download its data from GitHub whenever the Streamlit cache
+was cold, with no timeout and no local copy. Here every URL is kept on disk with
+its ETag / Last-Modified and a SHA-256 of its content. Reads are served from the
+disk copy; only a file that has never been fetched blocks on the network. A
+background thread revalidates the copies with conditional requests every
+REVALIDATE_INTERVAL seconds; bodies are streamed to disk in CHUNK_SIZE blocks
+and readers parse the disk copy by path. data_version() is derived from the content
+hashes, so it only changes when the bytes upstream actually do.
+"""
+import hashlib
+import json
+import os
+import threading
+import time
+from contextlib import contextmanager
+from typing import Dict, List, Optional
+
+import psutil
+import requests
+
+CACHE_DIR = 'data_cache'
+
+# (connect, read) seconds for every request
+REQUEST_TIMEOUT = (5, 30)
+
+# Bytes per read when streaming a response body to disk
+CHUNK_SIZE = 1 << 20
+
+# Seconds between background revalidations of the watched URLs
+REVALIDATE_INTERVAL = 300
+
+# How the last cold load went, for the app footer: seconds, source, version, peak_mb, loaded_at
+LOAD_STATS: Dict = {}
+
+_WATCHED: List[str] = []
+_REVALIDATOR: Optional[threading.Thread] = None
+_LOCK = threading.Lock()
+# path -> (mtime_ns, size, sha256), so local files are only re-hashed when they change
+_FILE_HASHES: Dict[str, tuple] = {}
+
+
+def _paths(url: str, cache_dir: str = CACHE_DIR):
+    key = hashlib.sha1(url.encode('utf-8')).hexdigest()[:16]
+    name = os.path.basename(url.split('?')[0]) or 'index'
+    base = os.path.join(cache_dir, f"{key}-{name}")
+    return base, base + '.json'
+
+
+def _write_atomic(path: str, data: bytes):
+    tmp = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+    with open(tmp, 'wb') as f:
+        f.write(data)
+    os.replace(tmp, path)
+
+
+def read_meta(url: str, cache_dir: str = CACHE_DIR) -> Optional[Dict]:
+    """Validators, content hash and timestamps of the disk copy of `url`, or None if there is none."""
+    body_path, meta_path = _paths(url, cache_dir)
+    try:
+        with open(meta_path, encoding='utf-8') as f:
+            meta = json.load(f)
+    except (OSError, ValueError):
+        return None
+    return meta if os.path.exists(body_path) else None
+
+
+def revalidate(url: str, timeout=REQUEST_TIMEOUT, cache_dir: str = CACHE_DIR) -> bool:
+    """
+    Brings the disk copy of `url` up to date with a conditional GET. Returns True
+    if the content changed (or was fetched for the first time). Raises
+    requests.exceptions.RequestException if the request fails. If the new body
+    can't replace the disk copy (e.g. Windows refuses to replace a file the app
+    has memory-mapped), the previous copy and its metadata are kept, so the next
+    revalidation downloads it again, and False is returned.
+    """
+    os.makedirs(cache_dir, exist_ok=True)
+    body_path, meta_path = _paths(url, cache_dir)
+    meta = read_meta(url, cache_dir) or {}
+    headers = {}
+    if meta.get('etag'):
+        headers['If-None-Match'] = meta['etag']
+    if meta.get('last_modified'):
+        headers['If-Modified-Since'] = meta['last_modified']
+
+    with requests.get(url, headers=headers, timeout=timeout, stream=True) as response:
+        now = time.time()
+        if response.status_code == 304 and meta:
+            meta['checked_at'] = now
+            _write_atomic(meta_path, json.dumps(meta).encode('utf-8'))
+            return False
+        response.raise_for_status()
+
+        # Stream the body to disk, hashing it on the way, so it is never held in memory
+        digest = hashlib.sha256()
+        size = 0
+        tmp = f"{body_path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        try:
+            with open(tmp, 'wb') as f:
+                for block in response.iter_content(CHUNK_SIZE):
+                    digest.update(block)
+                    size += len(block)
+                    f.write(block)
+            sha256 = digest.hexdigest()
+            changed = sha256 != meta.get('sha256')
+            if changed:
+                try:
+                    os.replace(tmp, body_path)
+                except OSError as e:
+                    print(f"⚠️ Could not replace the disk copy of {url}, keeping the previous one: {e}")
+                    return False
+        finally:
+            if os.path.exists(tmp):
+                os.remove(tmp)
+        response_headers = response.headers
+
+    meta = {
+        'url': url,
+        'etag': response_headers.get('ETag'),
+        'last_modified': response_headers.get('Last-Modified'),
+        'sha256': sha256,
+        'size': size,
+        'fetched_at': now if changed else meta.get('fetched_at', now),
+        'checked_at': now,
+    }
+    _write_atomic(meta_path, json.dumps(meta).encode('utf-8'))
+    return changed
+
+
+def fetch(url: str, timeout=REQUEST_TIMEOUT, cache_dir: str = CACHE_DIR) -> str:
+    """
+    Path of the disk copy of `url`, downloading it first if there is none (the
+    background revalidator keeps it fresh). The URL is added to the
+    revalidator's watch list either way, also when the first download fails
+    (e.g. a 404 for a file not published yet), so it is tried again later.
+    """
+    watch(url)
+    if read_meta(url, cache_dir) is None:
+        revalidate(url, timeout, cache_dir)
+    return _paths(url, cache_dir)[0]
+
+
+@contextmanager
+def track_peak_memory(interval: float = 0.005):
+    """
+    Samples the process RSS on a thread while the block runs; afterwards the
+    yielded dict holds 'peak_mb', the peak growth over the RSS at entry.
+    """
+    proc = psutil.Process()
+    start = proc.memory_info().rss
+    peak = [start]
+    done = threading.Event()
+
+    def sample():
+        while not done.wait(interval):
+            peak[0] = max(peak[0], proc.memory_info().rss)
+
+    sampler = threading.Thread(target=sample, daemon=True)
+    sampler.start()
+    result = {}
+    try:
+        yield result
+    finally:
+        done.set()
+        sampler.join()
+        result['peak_mb'] = (max(peak[0], proc.memory_info().rss) - start) / 1024 ** 2
+
+
+def data_version(urls: List[str], cache_dir: str = CACHE_DIR) -> str:
+    """Short key over the content hashes of the disk copies of `urls`; URLs without a copy count as missing."""
+    digest = hashlib.sha256()
+    for url in urls:
+        meta = read_meta(url, cache_dir)
+        digest.update(f"{url}={meta['sha256'] if meta else '-'}\n".encode('utf-8'))
+    return digest.hexdigest()[:16]
+
+
+def file_version(paths: List[str]) -> str:
+    """Like data_version() for local files; each file is only re-hashed when its mtime or size changes."""
+    digest = hashlib.sha256()
+    for path in paths:
+        try:
+            stat = os.stat(path)
+        except OSError:
+            digest.update(f"{path}=-\n".encode('utf-8'))
+            continue
+        cached = _FILE_HASHES.get(path)
+        if not cached or cached[:2] != (stat.st_mtime_ns, stat.st_size):
+            file_digest = hashlib.sha256()
+            with open(path, 'rb') as f:
+                for block in iter(lambda: f.read(CHUNK_SIZE), b''):
+                    file_digest.update(block)
+            cached = (stat.st_mtime_ns, stat.st_size, file_digest.hexdigest())
+            _FILE_HASHES[path] = cached
+        digest.update(f"{path}={cached[2]}\n".encode('utf-8'))
+    return digest.hexdigest()[:16]
+
+
+def last_checked(urls: List[str], cache_dir: str = CACHE_DIR) -> Optional[float]:
+    """Oldest revalidation time among the disk copies of `urls`, or None if none are cached."""
+    times = [meta['checked_at'] for meta in (read_meta(url, cache_dir) for url in urls) if meta]
+    return min(times) if times else None
+
+
+def record_load(seconds: float, source: str, version: str, peak_mb: Optional[float] = None):
+    LOAD_STATS.update({'seconds': seconds, 'source': source, 'version': version, 'peak_mb': peak_mb,
+                       'loaded_at': time.time()})
+
+
+def _revalidate_loop(interval: float, cache_dir: str):
+    while True:
+        time.sleep(interval)
+        with _LOCK:
+            urls = list(_WATCHED)
+        for url in urls:
+            try:
+                if revalidate(url, cache_dir=cache_dir):
+                    print(f"🔄 New upstream content for {url}")
+            except (requests.exceptions.RequestException, OSError) as e:
+                # Keep serving the copy we have; try again next round
+                print(f"⚠️ Could not revalidate {url}: {e}")
+
+
+def watch(url: str, interval: float = REVALIDATE_INTERVAL, cache_dir: str = CACHE_DIR):
+    """Adds `url` to the background revalidation list, starting the revalidator thread once per process."""
+    global _REVALIDATOR
+    with _LOCK:
+        if url not in _WATCHED:
+            _WATCHED.append(url)
+        if _REVALIDATOR is None or not _REVALIDATOR.is_alive():
+            _REVALIDATOR = threading.Thread(target=_revalidate_loop, args=(interval, cache_dir),
+                                            name='data-source-revalidator', daemon=True)
+            _REVALIDATOR.start()
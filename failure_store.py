@@ -0,0 +1,183 @@
+"""
+Structured store of crawl failures with retry scheduling.
+
+Each failed entity (brand, leaf category, listing page, product URL) is kept
+once per stage with its error class, attempt count and the time it next becomes
+eligible, so a `retry-failed` run re-drives only what is due instead of
+re-running the whole crawl.
+"""
+import json
+import sqlite3
+import time
+from typing import Dict, List, Optional
+
+import rate_limiter
+import retry_policy
+
+FAILURE_DB = rate_limiter.STATE_DB
+
+# Attempts after which a failure is parked as 'dead' and no longer retried
+MAX_ATTEMPTS = 5
+
+# Seconds before a failure is eligible again, doubled for every further attempt
+RETRY_BASE_DELAY = {
+    retry_policy.TRANSIENT: 600,
+    retry_policy.DEAD_SESSION: 300,
+    retry_policy.BLOCKED: 3600,
+    retry_policy.PERMANENT: 86400,
+}
+MAX_RETRY_DELAY = 7 * 86400
+
+
+def _connect(db_path: str = FAILURE_DB) -> sqlite3.Connection:
+    conn = sqlite3.connect(db_path, timeout=30, isolation_level=None)
+    conn.execute("PRAGMA journal_mode=WAL")
+    conn.execute("""
+        CREATE TABLE IF NOT EXISTS failures (
+            entity TEXT NOT NULL,
+            stage TEXT NOT NULL,
+            error_class TEXT NOT NULL,
+            last_error TEXT,
+            attempts INTEGER NOT NULL DEFAULT 0,
+            first_failed_at REAL NOT NULL,
+            last_failed_at REAL NOT NULL,
+            next_eligible_at REAL NOT NULL,
+            status TEXT NOT NULL DEFAULT 'pending',
+            context TEXT,
+            PRIMARY KEY (entity, stage)
+        )
+    """)
+    return conn
+
+
+def next_eligible_time(error_class: str, attempts: int, now: Optional[float] = None) -> float:
+    """When a failure with the given class and attempt count may be retried."""
+    now = now or time.time()
+    base = RETRY_BASE_DELAY.get(error_class, RETRY_BASE_DELAY[retry_policy.TRANSIENT])
+    return now + min(MAX_RETRY_DELAY, base * 2 ** max(0, attempts - 1))
+
+
+def record_failure(entity: str, stage: str, error_class: str, error: str = '',
+                   context: Optional[Dict] = None, delay: Optional[float] = None, db_path: str = FAILURE_DB):
+    """
+    Records (or updates) a failure and schedules its next retry, after `delay`
+    seconds if given, otherwise by the backoff for its error class.
+    """
+    now = time.time()
+    try:
+        conn = _connect(db_path)
+        try:
+            conn.execute("BEGIN IMMEDIATE")
+            row = conn.execute(
+                "SELECT attempts, context, status FROM failures WHERE entity = ? AND stage = ?", (entity, stage)
+            ).fetchone()
+            # An entity that failed again after being resolved starts a fresh attempt count
+            attempts = (row[0] if row and row[2] != 'resolved' else 0) + 1
+            # Keep the context we already have if the caller has none this time
+            context_json = json.dumps(context) if context is not None else (row[1] if row else None)
+            status = 'dead' if attempts >= MAX_ATTEMPTS else 'pending'
+            next_eligible_at = now + delay if delay is not None else next_eligible_time(error_class, attempts, now)
+            conn.execute("""
+                INSERT INTO failures (entity, stage, error_class, last_error, attempts, first_failed_at,
+                                      last_failed_at, next_eligible_at, status, context)
+                VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+                ON CONFLICT (entity, stage) DO UPDATE SET
+                    error_class = excluded.error_class, last_error = excluded.last_error,
+                    attempts = excluded.attempts, last_failed_at = excluded.last_failed_at,
+                    next_eligible_at = excluded.next_eligible_at, status = excluded.status,
+                    context = excluded.context
+            """, (entity, stage, error_class, str(error)[:500], attempts, now, now,
+                  next_eligible_at, status, context_json))
+            conn.execute("COMMIT")
+        finally:
+            conn.close()
+    except sqlite3.Error as e:
+        print(f"!!! CRITICAL: Could not record failure for '{entity}' ({stage}). Reason: {e}")
+
+
+def record_success(entity: str, stage: str, db_path: str = FAILURE_DB):
+    """Marks a previously failed entity as resolved (no-op if it never failed)."""
+    try:
+        conn = _connect(db_path)
+        try:
+            conn.execute(
+                "UPDATE failures SET status = 'resolved' WHERE entity = ? AND stage = ? AND status != 'resolved'",
+                (entity, stage)
+            )
+        finally:
+            conn.close()
+    except sqlite3.Error as e:
+        print(f"  ⚠️ Could not mark '{entity}' ({stage}) as resolved: {e}")
+
+
+def get_eligible(stages: Optional[List[str]] = None, limit: Optional[int] = None,
+                 db_path: str = FAILURE_DB) -> List[Dict]:
+    """Returns pending failures whose next-eligible time has passed, oldest first."""
+    query = "SELECT entity, stage, error_class, last_error, attempts, context FROM failures WHERE status = 'pending' AND next_eligible_at <= ?"
+    params = [time.time()]
+    if stages:
+        query += f" AND stage IN ({', '.join('?' for _ in stages)})"
+        params.extend(stages)
+    query += " ORDER BY next_eligible_at"
+    if limit:
+        query += " LIMIT ?"
+        params.append(limit)
+
+    conn = _connect(db_path)
+    try:
+        rows = conn.execute(query, params).fetchall()
+    finally:
+        conn.close()
+
+    return [{
+        'entity': entity,
+        'stage': stage,
+        'error_class': error_class,
+        'last_error': last_error,
+        'attempts': attempts,
+        'context': json.loads(context) if context else None
+    } for entity, stage, error_class, last_error, attempts, context in rows]
+
+
+def print_summary(db_path: str = FAILURE_DB):
+    """Prints failure counts by stage, status and error class."""
+    conn = _connect(db_path)
+    try:
+        rows = conn.execute("""
+            SELECT stage, status, error_class, COUNT(*) FROM failures
+            GROUP BY stage, status, error_class ORDER BY stage, status
+        """).fetchall()
+    finally:
+        conn.close()
+
+    print("\n🗂️ FAILURE STORE:")
+    if not rows:
+        print("   No failures recorded")
+        return
+    for stage, status, error_class, count in rows:
+        print(f"   {stage} / {status} / {error_class}: {count}")
+
+
+def import_failed_brands_file(filename: str = 'failed_brands.txt', db_path: str = FAILURE_DB) -> int:
+    """
+    One-off migration of the old plain-text brand log into the store. Duplicate
+    names collapse into a single failure. Returns the number of distinct brands.
+    """
+    try:
+        with open(filename, 'r', encoding='utf-8') as f:
+            brand_names = list(dict.fromkeys(line.strip() for line in f if line.strip()))
+    except FileNotFoundError:
+        return 0
+
+    conn = _connect(db_path)
+    try:
+        existing = {row[0] for row in conn.execute("SELECT entity FROM failures WHERE stage = 'brand'")}
+    finally:
+        conn.close()
+
+    for brand_name in brand_names:
+        if brand_name not in existing:
+            record_failure(brand_name, 'brand', retry_policy.PERMANENT, 'Imported from failed_brands.txt',
+                           delay=0, db_path=db_path)
+    print(f"📥 Imported {len(brand_names)} distinct brands from {filename}")
+    return len(brand_names)
@@ -0,0 +1,197 @@
+"""
+Thumbnail proxy for the product images.
+
+The views used to hand every main_image URL straight to st.image, so every
+browser session downloaded every full-size Zalando image itself. Here each URL
+is fetched once, on a small thread pool, shrunk to fit THUMBNAIL_SIZE and
+stored in CACHE_DIR under the SHA-256 of the original image, so a picture
+behind several URLs is kept once. Views reference the local file rather than
+the remote URL. The cache is kept under CACHE_MAX_BYTES by evicting the least
+recently used thumbnails; every hit refreshes the file's mtime.
+
+Rendering never waits for a download: a view that asks for a thumbnail not
+cached yet gets None back (and shows the remote URL) while the fetch runs in
+the background, and gets the local file on a later rerun.
+"""
+import hashlib
+import io
+import os
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Dict, Iterable, Optional
+
+import requests
+from PIL import Image
+
+# Under static/ next to the app, not the working directory, so Streamlit's static file
+# serving (.streamlit/config.toml) can hand the thumbnails to browsers as app/static/thumbnails/...
+CACHE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'static', 'thumbnails')
+
+# Bounding box of a thumbnail; the views show images at most 200 px wide
+THUMBNAIL_SIZE = (400, 400)
+JPEG_QUALITY = 85
+
+# Thumbnails are evicted, oldest use first, down to 90% of this
+CACHE_MAX_BYTES = 256 * 1024 ** 2
+
+# (connect, read) seconds per image request
+REQUEST_TIMEOUT = (5, 20)
+
+# Seconds before a URL that failed to fetch is tried again
+FAILURE_TTL = 300
+
+PREFETCH_WORKERS = 8
+
+# Counters for this process: hits, fetched, failed, evicted
+STATS = {'hits': 0, 'fetched': 0, 'failed': 0, 'evicted': 0}
+
+_POOL = ThreadPoolExecutor(PREFETCH_WORKERS, thread_name_prefix='thumbnail')
+_LOCK = threading.Lock()
+# (cache_dir, url) -> in-flight fetch, so concurrent sessions share one download
+_PENDING: Dict[tuple, Future] = {}
+# (cache_dir, url) -> time of the last failed fetch
+_FAILED: Dict[tuple, float] = {}
+# cache_dir -> bytes of thumbnails stored, counted on first use
+_CACHE_BYTES: Dict[str, int] = {}
+
+
+def _ref_path(url: str, cache_dir: str) -> str:
+    return os.path.join(cache_dir, 'refs', hashlib.sha1(url.encode('utf-8')).hexdigest()[:16])
+
+
+def _write_atomic(path: str, data: bytes):
+    tmp = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+    with open(tmp, 'wb') as f:
+        f.write(data)
+    os.replace(tmp, path)
+
+
+def _blob_bytes(cache_dir: str) -> int:
+    blob_dir = os.path.join(cache_dir, 'blobs')
+    if cache_dir not in _CACHE_BYTES:
+        _CACHE_BYTES[cache_dir] = sum(entry.stat().st_size for entry in os.scandir(blob_dir)) \
+            if os.path.isdir(blob_dir) else 0
+    return _CACHE_BYTES[cache_dir]
+
+
+def cached_path(url: str, cache_dir: str = CACHE_DIR) -> Optional[str]:
+    """Path of the stored thumbnail of `url`, marked as just used, or None if it isn't cached."""
+    try:
+        with open(_ref_path(url, cache_dir), encoding='utf-8') as f:
+            path = os.path.join(cache_dir, 'blobs', f.read().strip())
+        os.utime(path)
+    except OSError:
+        return None
+    return path
+
+
+def make_thumbnail(data: bytes) -> bytes:
+    """JPEG bytes of the image in `data`, shrunk to fit THUMBNAIL_SIZE. Raises OSError if it isn't an image."""
+    image = Image.open(io.BytesIO(data))
+    image.thumbnail(THUMBNAIL_SIZE)
+    out = io.BytesIO()
+    image.convert('RGB').save(out, format='JPEG', quality=JPEG_QUALITY)
+    return out.getvalue()
+
+
+def _fetch(url: str, cache_dir: str) -> str:
+    response = requests.get(url, timeout=REQUEST_TIMEOUT)
+    response.raise_for_status()
+    name = hashlib.sha256(response.content).hexdigest()[:32] + '.jpg'
+    path = os.path.join(cache_dir, 'blobs', name)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    os.makedirs(os.path.dirname(_ref_path(url, cache_dir)), exist_ok=True)
+    if not os.path.exists(path):
+        thumb = make_thumbnail(response.content)
+        _write_atomic(path, thumb)
+        with _LOCK:
+            _CACHE_BYTES[cache_dir] = _blob_bytes(cache_dir) + len(thumb)
+            over = _CACHE_BYTES[cache_dir] > CACHE_MAX_BYTES
+        if over:
+            evict(cache_dir=cache_dir)
+    _write_atomic(_ref_path(url, cache_dir), name.encode('utf-8'))
+    STATS['fetched'] += 1
+    return path
+
+
+def _fetch_in_background(url: str, cache_dir: str) -> Optional[str]:
+    # Runs on the pool: any error (network, a bad URL, an image PIL can't or won't
+    # decode) marks the URL as failed instead of surfacing in a view
+    try:
+        return _fetch(url, cache_dir)
+    except Exception as e:
+        with _LOCK:
+            _FAILED[(cache_dir, url)] = time.time()
+            STATS['failed'] += 1
+        print(f"⚠️ Could not fetch thumbnail for {url}: {e}")
+        return None
+
+
+def _done(key: tuple, future: Future):
+    with _LOCK:
+        _PENDING.pop(key, None)
+
+
+def _submit(url: str, cache_dir: str) -> Optional[Future]:
+    key = (cache_dir, url)
+    with _LOCK:
+        if key in _PENDING:
+            return _PENDING[key]
+        if time.time() - _FAILED.get(key, 0) < FAILURE_TTL:
+            return None
+        future = _PENDING[key] = _POOL.submit(_fetch_in_background, url, cache_dir)
+    future.add_done_callback(lambda f: _done(key, f))
+    return future
+
+
+def prefetch(urls: Iterable, cache_dir: str = CACHE_DIR):
+    """Starts fetching the thumbnails of those `urls` not cached yet, in the background."""
+    for url in urls:
+        if isinstance(url, str) and url.startswith('http') and cached_path(url, cache_dir) is None:
+            _submit(url, cache_dir)
+
+
+def thumbnail(url: str, wait: float = 0, cache_dir: str = CACHE_DIR) -> Optional[str]:
+    """
+    Path of the cached thumbnail of `url`. If it isn't cached yet, its fetch is
+    started in the background and None is returned at once, so the caller can
+    fall back to the URL itself; likewise if the fetch failed within the last
+    FAILURE_TTL seconds. Only offline callers (warm-up, benchmarks) should pass
+    `wait` to block up to that many seconds for the fetch.
+    """
+    path = cached_path(url, cache_dir)
+    if path:
+        STATS['hits'] += 1
+        return path
+    if not isinstance(url, str) or not url.startswith('http'):
+        return None
+    future = _submit(url, cache_dir)
+    if future is None or wait <= 0:
+        return None
+    try:
+        return future.result(timeout=wait)
+    except TimeoutError:
+        # The fetch carries on in the background
+        return None
+
+
+def evict(max_bytes: int = CACHE_MAX_BYTES, cache_dir: str = CACHE_DIR):
+    """Deletes the least recently used thumbnails until they take at most 90% of `max_bytes`."""
+    blob_dir = os.path.join(cache_dir, 'blobs')
+    if not os.path.isdir(blob_dir):
+        return
+    with _LOCK:
+        entries = sorted((entry.stat().st_mtime_ns, entry.stat().st_size, entry.path)
+                         for entry in os.scandir(blob_dir) if entry.name.endswith('.jpg'))
+        total = sum(size for _, size, _ in entries)
+        for _, size, path in entries:
+            if total <= max_bytes * 0.9:
+                break
+            try:
+                os.remove(path)
+            except OSError:
+                continue
+            total -= size
+            STATS['evicted'] += 1
+        _CACHE_BYTES[cache_dir] = total
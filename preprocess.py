@@ -1,64 +1,407 @@
+import argparse
+import itertools
+import multiprocessing
+import os
+import time
+from collections import deque
+from multiprocessing import Pool
+
 import pandas as pd
-from app import auto_clean_data
+import psutil
+import pyarrow.parquet as pq
+
+import app
+import csv_reader
+from app import (auto_clean_data, load_color_mapping, save_color_mapping, COLOR_MAPPING_FILE, CLEANED_PARQUET,
+                 CLEANED_SIZES_PARQUET, CLEANED_CUBE_PARQUET)
 
-print("--- Starting pre-processing script ---")
+RAW_FILE = 'bd_20250708_131602_0.csv'
+OUTPUT_FILE = 'cleaned_zalando_data.csv'
+ARTEFACT_FILE = CLEANED_PARQUET
+SIZES_FILE = CLEANED_SIZES_PARQUET
+CUBE_FILE = CLEANED_CUBE_PARQUET
+
+# Incremental mode: cleaned rows from the last run, keyed by sku + raw-row hash
+ROW_CACHE_FILE = 'cleaned_row_cache.pkl'
+ROW_HASH_COLUMN = '_row_hash'
 
 # Define the complete list of columns that are essential for the dashboard
 ESSENTIAL_COLUMNS = [
-    'product_name', 'brand', 'brand_name', 'initial_price', 'final_price', 'in_stock', 
+    'product_name', 'brand', 'brand_name', 'initial_price', 'final_price', 'in_stock',
     'main_image', 'color', 'colors', 'sizes', 'discovery_input', 'name', 'product_url',
-    'total', 'sku', 'inventory', 'country_code'
+    'total', 'sku', 'inventory', 'country_code', 'crawl_category'
 ]
-print(f"1. Defined {len(ESSENTIAL_COLUMNS)} essential columns.")
-
-# Load only the essential columns from the correct raw data file
-try:
-    print("2. Attempting to load `bd_20250708_131602_0.csv`...")
-    raw_df = pd.read_csv(
-        'bd_20250708_131602_0.csv', 
-        usecols=lambda c: c in ESSENTIAL_COLUMNS,
-        low_memory=False
-    )
-    print("   - Success! Loaded the following columns:")
-    print(f"     {raw_df.columns.tolist()}")
-
-except Exception as e:
-    print(f"   - FAILED to load CSV: {e}")
-    exit()
-
-# Clean the data
-try:
-    print("3. Running the data cleaning and processing pipeline...")
-    cleaned_df = auto_clean_data(raw_df)
-    print("   - Data cleaning complete.")
-except Exception as e:
-    print(f"   - FAILED during data cleaning: {e}")
-    exit()
-
-
-# Verification Step
-print("4. Verifying final columns...")
-final_columns = cleaned_df.columns.tolist()
-print(f"   - Final columns are: {final_columns}")
-
-if 'price_per_item' in final_columns and 'pack_size' in final_columns:
-    print("   - SUCCESS! `price_per_item` and `pack_size` columns are present.")
-else:
+
+# Streaming mode: rows per chunk, and chunks in flight per worker (bounds peak memory)
+CHUNK_SIZE = 20000
+CHUNKS_IN_FLIGHT_PER_WORKER = 2
+
+# Parallel cleaning (full/incremental with --workers): partitions per worker, for load balancing
+PARTITIONS_PER_WORKER = 2
+# Frame being cleaned in parallel; forked workers inherit it, so partitions aren't pickled
+_PARTITION_SOURCE = None
+
+
+def optimise_dtypes(df):
+    """Downcast numeric types to save memory."""
+    for col in df.select_dtypes(include=['float64']).columns:
+        df[col] = pd.to_numeric(df[col], downcast='float')
+    for col in df.select_dtypes(include=['int64']).columns:
+        df[col] = pd.to_numeric(df[col], downcast='integer')
+    return df
+
+
+def has_required_columns(df):
+    final_columns = df.columns.tolist()
+    print(f"   - Final columns are: {final_columns}")
+    if 'price_per_item' in final_columns and 'pack_size' in final_columns:
+        print("   - SUCCESS! `price_per_item` and `pack_size` columns are present.")
+        return True
     print("   - FAILED! `price_per_item` or `pack_size` column is MISSING.")
-    exit()
+    return False
+
+
+def run_full(raw_file=RAW_FILE, output_file=OUTPUT_FILE, artefact_file=ARTEFACT_FILE, sizes_file=SIZES_FILE,
+             cube_file=CUBE_FILE, engine=None, workers=1):
+    """Original in-memory preprocess: load everything, clean, downcast, save."""
+    print("--- Starting pre-processing script ---")
+    print(f"1. Defined {len(ESSENTIAL_COLUMNS)} essential columns.")
+
+    # Load only the essential columns from the correct raw data file
+    try:
+        print(f"2. Attempting to load `{raw_file}`...")
+        raw_df = csv_reader.read_csv(raw_file, csv_reader.RAW_EXPORT_SCHEMA, columns=ESSENTIAL_COLUMNS,
+                                     engine=engine)
+        print("   - Success! Loaded the following columns:")
+        print(f"     {raw_df.columns.tolist()}")
+
+    except Exception as e:
+        print(f"   - FAILED to load CSV: {e}")
+        return False
+
+    # Clean the data
+    try:
+        print("3. Running the data cleaning and processing pipeline...")
+        known_colors = load_color_mapping()
+        print(f"   - Reusing {known_colors} colour mappings from `{COLOR_MAPPING_FILE}`.")
+        cleaned_df = clean_data(raw_df, workers)
+        save_color_mapping()
+        print("   - Data cleaning complete.")
+    except Exception as e:
+        print(f"   - FAILED during data cleaning: {e}")
+        return False
+
+    return save_cleaned(cleaned_df, output_file, artefact_file, sizes_file, cube_file)
+
+
+def save_cleaned(cleaned_df, output_file=OUTPUT_FILE, artefact_file=ARTEFACT_FILE, sizes_file=SIZES_FILE,
+                 cube_file=CUBE_FILE):
+    """Verifies, downcasts and writes the cleaned frame as CSV, the typed artefact, its size table and cube."""
+    # Verification Step
+    print("4. Verifying final columns...")
+    if not has_required_columns(cleaned_df):
+        return False
+
+    print("5. Optimizing memory usage...")
+    cleaned_df = optimise_dtypes(cleaned_df)
+    print("   - Memory optimization complete.")
+
+    # Save the optimized and cleaned data to a new file
+    print(f"6. Saving the final `{output_file}` file...")
+    cleaned_df.to_csv(output_file, index=False)
+    print(f"7. Saving the typed `{artefact_file}` artefact...")
+    app.write_artefact(cleaned_df, artefact_file)
+    print(f"8. Saving the `{sizes_file}` size table...")
+    sizes = app.build_size_table(cleaned_df)
+    app.write_size_table(sizes, sizes_file)
+    print(f"   - {len(sizes):,} sizes over {sizes['size'].nunique()} size codes.")
+    print(f"9. Saving the `{cube_file}` aggregate cube...")
+    cube = app.build_cube(cleaned_df)
+    app.write_cube(cube, cube_file)
+    print(f"   - {len(cube):,} cells for {len(cleaned_df):,} rows.")
+
+    print("\n--- Pre-processing finished successfully! ---")
+    print(f"You can now upload `{output_file}`, `{artefact_file}`, `{sizes_file}` and `{cube_file}` to GitHub.")
+    return True
+
+
+def row_hashes(raw_df):
+    """64-bit hash of each raw row over its essential columns."""
+    return pd.util.hash_pandas_object(raw_df[sorted(raw_df.columns)], index=False)
+
+
+def load_row_cache(cache_file=ROW_CACHE_FILE):
+    """Previously cleaned rows, or None if there are none or they were cleaned under other rules."""
+    if not os.path.exists(cache_file):
+        return None
+    cache = pd.read_pickle(cache_file)
+    if cache.get('rules') != app.CLEANING_RULES_FINGERPRINT:
+        print("   - Cleaning rules changed since the last run; rebuilding every row.")
+        return None
+    return cache['rows']
+
+
+def run_incremental(raw_file=RAW_FILE, output_file=OUTPUT_FILE, artefact_file=ARTEFACT_FILE,
+                    cache_file=ROW_CACHE_FILE, sizes_file=SIZES_FILE, cube_file=CUBE_FILE, engine=None, workers=1):
+    """
+    Like run_full, but rows whose sku and raw-row hash match the previous run are
+    taken from the cleaned-row cache; only new or changed rows go through
+    auto_clean_data.
+    """
+    print("--- Starting incremental pre-processing ---")
+    try:
+        print(f"1. Loading `{raw_file}`...")
+        raw_df = csv_reader.read_csv(raw_file, csv_reader.RAW_EXPORT_SCHEMA, columns=ESSENTIAL_COLUMNS,
+                                     engine=engine)
+    except Exception as e:
+        print(f"   - FAILED to load CSV: {e}")
+        return False
+    if 'sku' not in raw_df.columns:
+        print("   - No `sku` column; falling back to a full rebuild.")
+        return run_full(raw_file, output_file, artefact_file, sizes_file, cube_file, engine, workers)
+
+    try:
+        print("2. Matching rows against the cleaned-row cache...")
+        raw_df[ROW_HASH_COLUMN] = row_hashes(raw_df)
+        raw_df['_row_key'] = raw_df['sku'].astype(str) + ':' + raw_df[ROW_HASH_COLUMN].astype(str)
+        cache = load_row_cache(cache_file)
+        if cache is not None:
+            cache = cache.drop_duplicates('_row_key').set_index('_row_key')
+            is_cached = raw_df['_row_key'].isin(cache.index)
+        else:
+            is_cached = pd.Series(False, index=raw_df.index)
+        print(f"   - {is_cached.sum():,} unchanged rows reused, {(~is_cached).sum():,} new or changed rows to clean.")
+
+        print("3. Cleaning new and changed rows...")
+        load_color_mapping()
+        parts = []
+        if is_cached.any():
+            cached = cache.loc[raw_df.loc[is_cached, '_row_key']].reset_index()
+            cached.index = raw_df.index[is_cached]
+            parts.append(cached)
+        if (~is_cached).any():
+            parts.append(clean_data(raw_df[~is_cached].copy(), workers))
+        save_color_mapping()
+        # Back in raw file order, so the output matches a full rebuild
+        cleaned_df = pd.concat(parts).sort_index()[parts[-1].columns]
+        pd.to_pickle({'rules': app.CLEANING_RULES_FINGERPRINT, 'rows': cleaned_df}, cache_file)
+        cleaned_df = cleaned_df.drop(columns=[ROW_HASH_COLUMN, '_row_key'])
+    except Exception as e:
+        print(f"   - FAILED during incremental cleaning: {e}")
+        return False
+
+    return save_cleaned(cleaned_df, output_file, artefact_file, sizes_file, cube_file)
+
+
+def _init_worker():
+    # Each worker starts from the saved colour mapping
+    load_color_mapping()
+
+
+def clean_partition(task):
+    """
+    Pool task: clean rows [start, stop) of the frame. Forked workers slice the
+    inherited _PARTITION_SOURCE; otherwise the partition itself is the task.
+    Only the columns cleaning adds or changes are sent back, with the colour
+    mappings this worker learnt.
+    """
+    if isinstance(task, pd.DataFrame):
+        partition = task
+    else:
+        start, stop = task
+        partition = _PARTITION_SOURCE.iloc[start:stop]
+    known = len(app.COLOR_MAPPING_CACHE)
+    cleaned = auto_clean_data(partition.copy())
+    new_colors = dict(itertools.islice(app.COLOR_MAPPING_CACHE.items(), known, None))
+    changed = [col for col in cleaned.columns
+               if col not in partition.columns or cleaned[col].dtype != partition[col].dtype]
+    return cleaned.columns.tolist(), cleaned[changed], new_colors
+
+
+def _serial_color_order(raw_df, color_clean):
+    # normalise_colors orders categories by first appearance over non-missing raw
+    # colours, with 'Unknown' for missing ones last; each partition only saw its own rows
+    raw = raw_df['color'] if 'color' in raw_df.columns else raw_df['colors']
+    color_clean = color_clean.astype('category')
+    order = list(pd.unique(color_clean[raw.notna()].astype(object)))
+    if 'Unknown' in color_clean.cat.categories and 'Unknown' not in order:
+        order.append('Unknown')
+    return color_clean.cat.set_categories(order)
+
+
+def clean_data(raw_df, workers=1):
+    """
+    auto_clean_data, optionally split into partitions cleaned on a process pool.
+    Every cleaning step is row-local, so the result is the same frame the serial
+    call returns.
+    """
+    global _PARTITION_SOURCE
+    workers = workers or os.cpu_count() or 1
+    if workers <= 1 or len(raw_df) < 2:
+        return auto_clean_data(raw_df)
+    partitions = min(len(raw_df), workers * PARTITIONS_PER_WORKER)
+    bounds = [len(raw_df) * i // partitions for i in range(partitions + 1)]
+    ranges = list(zip(bounds[:-1], bounds[1:]))
+    forked = multiprocessing.get_start_method() == 'fork'
+    tasks = ranges if forked else [raw_df.iloc[start:stop] for start, stop in ranges]
+
+    _PARTITION_SOURCE = raw_df if forked else None
+    try:
+        with Pool(workers, initializer=_init_worker) as pool:
+            results = pool.map(clean_partition, tasks, chunksize=1)
+    finally:
+        _PARTITION_SOURCE = None
+
+    columns = results[0][0]
+    derived = []
+    for _, part, new_colors in results:
+        app.COLOR_MAPPING_CACHE.update(new_colors)
+        derived.append(part)
+    # Partitions have their own colour categories, so concat falls back to object
+    derived = pd.concat(derived)
+    if 'color_clean' in derived.columns and ('color' in raw_df.columns or 'colors' in raw_df.columns):
+        derived['color_clean'] = _serial_color_order(raw_df, derived['color_clean'])
+    kept = raw_df.drop(columns=[col for col in derived.columns if col in raw_df.columns])
+    return pd.concat([kept, derived], axis=1)[columns]
+
+
+def clean_chunk(chunk):
+    """
+    Pool task: clean one raw chunk. auto_clean_data only looks at one row at a
+    time, so chunks can be cleaned independently. The chunk is also rendered to
+    CSV and to an Arrow table here, since formatting costs more than cleaning and
+    would otherwise run serially in the parent. Returns the columns, row count,
+    CSV text, Arrow table, the chunk's size table (row ids relative to the chunk),
+    its aggregate cube and the colour mappings this worker learnt, for the
+    parent to save.
+    """
+    known = len(app.COLOR_MAPPING_CACHE)
+    cleaned = optimise_dtypes(auto_clean_data(chunk))
+    new_colors = dict(itertools.islice(app.COLOR_MAPPING_CACHE.items(), known, None))
+    table = app.to_artefact_table(cleaned)
+    sizes = app.build_size_table(cleaned)
+    return (cleaned.columns.tolist(), len(cleaned), cleaned.to_csv(index=False, header=False), table, sizes,
+            app.build_cube(cleaned), new_colors)
+
+
+def _rss_mb(proc):
+    """Resident memory of a process and its children (the pool workers), in MB."""
+    total = proc.memory_info().rss
+    for child in proc.children(recursive=True):
+        try:
+            total += child.memory_info().rss
+        except psutil.NoSuchProcess:
+            pass
+    return total / 1024 ** 2
+
+
+def run_streaming(raw_file=RAW_FILE, output_file=OUTPUT_FILE, workers=None, chunk_size=CHUNK_SIZE,
+                  artefact_file=ARTEFACT_FILE, sizes_file=SIZES_FILE, cube_file=CUBE_FILE):
+    """
+    Streams the raw file in chunks through a process pool and appends each
+    cleaned chunk to the output in file order. Only a few chunks per worker
+    are held in memory at once, so peak memory depends on the chunk size and the
+    worker count, not the file size.
+    """
+    workers = workers or os.cpu_count() or 2
+    max_in_flight = workers * CHUNKS_IN_FLIGHT_PER_WORKER
+    print("--- Starting streaming pre-processing ---")
+    print(f"1. Streaming `{raw_file}` in chunks of {chunk_size} rows on {workers} workers...")
+
+    started = time.perf_counter()
+    me = psutil.Process()
+    peak_rss = _rss_mb(me)
+    total_rows = 0
+    chunks_written = 0
+    artefact_writer = None
+    sizes_writer = None
+    # Chunk cubes are small; they are merged once at the end
+    cubes = []
+    load_color_mapping()
+
+    try:
+        reader = csv_reader.read_csv_chunks(raw_file, csv_reader.RAW_EXPORT_SCHEMA, columns=ESSENTIAL_COLUMNS,
+                                            chunksize=chunk_size)
+        with Pool(workers, initializer=_init_worker) as pool, \
+                open(output_file, 'w', encoding='utf-8', newline='') as out:
+            pending = deque()
+
+            def write_next():
+                nonlocal total_rows, chunks_written, peak_rss, artefact_writer, sizes_writer
+                columns, rows, csv_text, table, sizes, cube, new_colors = pending.popleft().get()
+                app.COLOR_MAPPING_CACHE.update(new_colors)
+                if chunks_written == 0:
+                    print("2. Verifying final columns on the first chunk...")
+                    if not has_required_columns(pd.DataFrame(columns=columns)):
+                        raise ValueError("cleaned chunk is missing required columns")
+                    print("3. Writing cleaned chunks...")
+                    out.write(pd.DataFrame(columns=columns).to_csv(index=False))
+                    artefact_writer = pq.ParquetWriter(artefact_file, table.schema)
+                    sizes_writer = pq.ParquetWriter(sizes_file, app.to_size_arrow(sizes).schema)
+                out.write(csv_text)
+                # Columns without a declared type may be inferred differently per chunk
+                artefact_writer.write_table(table.cast(artefact_writer.schema))
+                # Size row ids are chunk positions; shift them to positions in the whole file
+                sizes['row_id'] += total_rows
+                sizes_writer.write_table(app.to_size_arrow(sizes))
+                cubes.append(cube)
+                chunks_written += 1
+                total_rows += rows
+                peak_rss = max(peak_rss, _rss_mb(me))
+                elapsed = time.perf_counter() - started
+                print(f"   - Chunk {chunks_written}: {total_rows:,} rows, "
+                      f"{total_rows / elapsed:,.0f} rows/s, peak RSS {peak_rss:,.0f} MB")
+
+            # Keep at most max_in_flight chunks queued; write results in file order
+            for chunk in reader:
+                if len(pending) >= max_in_flight:
+                    write_next()
+                pending.append(pool.apply_async(clean_chunk, (chunk,)))
+            while pending:
+                write_next()
+        print(f"4. Saving the `{cube_file}` aggregate cube...")
+        app.write_cube(app.combine_cubes(cubes), cube_file)
+    except Exception as e:
+        print(f"   - FAILED during streaming pre-processing: {e}")
+        return False
+    finally:
+        if artefact_writer is not None:
+            artefact_writer.close()
+        if sizes_writer is not None:
+            sizes_writer.close()
 
+    save_color_mapping()
+    elapsed = time.perf_counter() - started
+    print("\n--- Streaming pre-processing finished successfully! ---")
+    print(f"   Rows: {total_rows:,} in {elapsed:.1f}s ({total_rows / max(elapsed, 1e-9):,.0f} rows/s)")
+    print(f"   Peak RSS (parent + workers): {peak_rss:,.0f} MB")
+    print(f"You can now upload `{output_file}`, `{artefact_file}`, `{sizes_file}` and `{cube_file}` to GitHub.")
+    return True
 
-# Downcast numeric types to save memory
-print("5. Optimizing memory usage...")
-for col in cleaned_df.select_dtypes(include=['float64']).columns:
-    cleaned_df[col] = pd.to_numeric(cleaned_df[col], downcast='float')
-for col in cleaned_df.select_dtypes(include=['int64']).columns:
-    cleaned_df[col] = pd.to_numeric(cleaned_df[col], downcast='integer')
-print("   - Memory optimization complete.")
 
-# Save the optimized and cleaned data to a new file
-print("6. Saving the final `cleaned_zalando_data.csv` file...")
-cleaned_df.to_csv('cleaned_zalando_data.csv', index=False)
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Clean the raw Zalando export for the dashboard.")
+    parser.add_argument('mode', nargs='?', choices=['full', 'stream', 'incremental'], default='full',
+                        help="'full' loads the whole file; 'stream' cleans chunks on a process pool; "
+                             "'incremental' only re-cleans rows that changed since the last run")
+    parser.add_argument('--input', default=RAW_FILE)
+    parser.add_argument('--output', default=OUTPUT_FILE)
+    parser.add_argument('--artefact', default=ARTEFACT_FILE, help="typed Parquet artefact read by the dashboard")
+    parser.add_argument('--sizes', default=SIZES_FILE, help="long-format size table read by the dashboard")
+    parser.add_argument('--cube', default=CUBE_FILE, help="aggregate cube the dashboard tabs roll up")
+    parser.add_argument('--workers', type=int, default=None,
+                        help="worker processes; stream mode defaults to all cores, full/incremental to 1 (serial)")
+    parser.add_argument('--engine', choices=csv_reader.ENGINES, default=csv_reader.DEFAULT_ENGINE,
+                        help="full/incremental mode: CSV parser ('pyarrow' parses on all cores)")
+    parser.add_argument('--chunk-size', type=int, default=CHUNK_SIZE, help="stream mode: rows per chunk")
+    args = parser.parse_args()
 
-print("\n--- Pre-processing finished successfully! ---")
-print("You can now upload `cleaned_zalando_data.csv` to GitHub.") 
\ No newline at end of file
+    if args.mode == 'stream':
+        ok = run_streaming(args.input, args.output, args.workers, args.chunk_size, args.artefact, args.sizes, args.cube)
+    elif args.mode == 'incremental':
+        ok = run_incremental(args.input, args.output, args.artefact, sizes_file=args.sizes, cube_file=args.cube,
+                             engine=args.engine, workers=args.workers or 1)
+    else:
+        ok = run_full(args.input, args.output, args.artefact, args.sizes, args.cube, args.engine, args.workers or 1)
+    if not ok:
+        exit()
@@ -1,10 +1,8 @@
 import pandas as pd
 import requests
 import json
-import re
-import time
 import os
-from multiprocessing import Pool, Manager
+import sys
 from typing import List, Dict, Optional
 from urllib.parse import urlparse, urljoin
 from bs4 import BeautifulSoup
@@ -13,15 +11,24 @@ from selenium import webdriver
 from selenium.webdriver.common.by import By
 from selenium.webdriver.support.ui import WebDriverWait
 from selenium.webdriver.support import expected_conditions as EC
-from selenium.common.exceptions import TimeoutException, WebDriverException
+
+import failure_store
+import rate_limiter
+import retry_policy
+import supervisor
+from csv_reader import SCRAPER_OUTPUT_SCHEMA, csv_columns, read_csv
 
 # --- Configuration ---
 INPUT_CSV = 'zalando_underwear_category.csv'
 OUTPUT_CSV = 'zalando_product_details.csv'
-PROCESS_COUNT = 2  # Reduced to avoid overwhelming the server
+PROCESS_COUNT = os.cpu_count() or 2  # Request rate is capped by rate_limiter, not by worker count
 URL_COLUMN = 'url'
 REQUEST_TIMEOUT = 30  # Increased timeout
-MAX_RETRIES = 1  # Reduced retries to speed up fallback
+HTTP_RETRY_POLICY = retry_policy.HTTP_POLICY  # Transient errors only; blocks go straight to Selenium
+SELENIUM_RETRY_POLICY = retry_policy.SELENIUM_POLICY
+RETRY_PROCESS_COUNT = 2  # retry-failed mode re-drives only a handful of URLs
+OUTPUT_COLUMNS = ['url', 'name', 'brand', 'description', 'price', 'image_urls', 'extraction_method', 'status']
+OUTPUT_SCHEMA = {col: str for col in OUTPUT_COLUMNS}
 
 # User agents to rotate for requests
 USER_AGENTS = [
@@ -228,81 +235,97 @@ def extract_from_html_elements(soup: BeautifulSoup, url: str) -> Dict:
     }
 
 
+def failed_product(url: str, name: str, error_class: str) -> Dict:
+    """Result row for a product that could not be scraped."""
+    return {
+        'url': url,
+        'name': name,
+        'brand': 'N/A',
+        'description': 'N/A',
+        'price': 'N/A',
+        'image_urls': '[]',
+        'extraction_method': 'Failed',
+        'status': 'error',
+        'error_class': error_class
+    }
+
+
+def fetch_product_html(session, url: str) -> str:
+    """Fetch a product page over HTTP, raising HTTPStatusError for any non-200 response."""
+    rate_limiter.acquire(url)
+    response = session.get(url, timeout=REQUEST_TIMEOUT)
+    if response.status_code == 200:
+        return response.text
+    if response.status_code in [429, 503] or 'Retry-After' in response.headers:
+        rate_limiter.honour_retry_after(url, response)
+    raise retry_policy.HTTPStatusError(response.status_code, url)
+
+
 def scrape_product_requests(url: str) -> Dict:
     """Scrape product using requests library."""
     try:
         session = get_session()
         
-        for attempt in range(MAX_RETRIES):
-            try:
-                response = session.get(url, timeout=REQUEST_TIMEOUT)
-                
-                if response.status_code == 200:
-                    product_data = extract_product_data_from_html(response.text, url)
-                    product_data['url'] = url
-                    product_data['status'] = 'success'
-                    return product_data
-                    
-                elif response.status_code in [403, 429]:
-                    print(f"  -> Blocked (HTTP {response.status_code}), will try Selenium fallback")
-                    break
-                    
-                else:
-                    print(f"  -> HTTP {response.status_code}, retrying...")
-                    time.sleep(2)
-                    
-            except requests.RequestException as e:
-                print(f"  -> Request failed (attempt {attempt + 1}): {e}")
-                if attempt < MAX_RETRIES - 1:
-                    time.sleep(2)
+        try:
+            html = retry_policy.retry_call(fetch_product_html, session, url, policy=HTTP_RETRY_POLICY, url=url)
+            product_data = extract_product_data_from_html(html, url)
+            product_data['url'] = url
+            product_data['status'] = 'success'
+            return product_data
+        except Exception as e:
+            error_class = retry_policy.classify_error(e)
+            if error_class == retry_policy.PERMANENT:
+                # e.g. 404 - the product is gone, a browser won't find it either
+                print(f"  -> Permanent failure ({e}), skipping Selenium fallback")
+                return failed_product(url, f'ERROR: {type(e).__name__}', error_class)
+            print(f"  -> Requests failed ({error_class}: {e}), will try Selenium fallback")
         
         # If requests failed, try Selenium
         return scrape_product_selenium(url)
         
     except Exception as e:
-        return {
-            'url': url,
-            'name': f'ERROR: {type(e).__name__}',
-            'brand': 'N/A',
-            'description': 'N/A',
-            'price': 'N/A',
-            'image_urls': '[]',
-            'extraction_method': 'Failed',
-            'status': 'error'
-        }
+        return failed_product(url, f'ERROR: {type(e).__name__}', retry_policy.classify_error(e))
 
 
-def scrape_product_selenium(url: str) -> Dict:
-    """Fallback scraping using Selenium."""
+def create_selenium_driver():
+    """Create a headless Chrome configured for product page fallback scraping."""
+    chrome_options = webdriver.ChromeOptions()
+    chrome_options.add_argument("--headless")
+    chrome_options.add_argument("--disable-gpu")
+    chrome_options.add_argument("--no-sandbox")
+    chrome_options.add_argument("--disable-dev-shm-usage")
+    chrome_options.add_argument("--disable-logging")
+    chrome_options.add_argument("--log-level=3")
+    chrome_options.add_argument("--silent")
+    chrome_options.add_argument("--disable-extensions")
+    chrome_options.add_argument("--disable-images")
+    chrome_options.add_argument("--disable-blink-features=AutomationControlled")
+    chrome_options.add_argument("--disable-dev-shm-usage")
+    chrome_options.add_experimental_option('excludeSwitches', ['enable-logging', 'enable-automation'])
+    chrome_options.add_experimental_option('useAutomationExtension', False)
+    chrome_options.add_argument("--disable-web-security")
+    chrome_options.add_argument("--allow-running-insecure-content")
+    chrome_options.add_argument("--disable-features=VizDisplayCompositor")
+    chrome_options.prefs = {"profile.managed_default_content_settings.images": 2}
+    chrome_options.add_argument(f"user-agent={random.choice(USER_AGENTS)}")
+    
+    driver = webdriver.Chrome(options=chrome_options)
+    driver.set_page_load_timeout(45)  # Increased timeout
+    # Let the supervisor kill this browser if it hangs
+    supervisor.register_browser(driver)
+    
+    # Add stealth settings
+    driver.execute_script("Object.defineProperty(navigator, 'webdriver', {get: () => undefined})")
+    return driver
+
+
+def fetch_page_source_selenium(url: str) -> str:
+    """Load a product page in a fresh browser and return its source."""
     driver = None
     try:
-        # Configure Chrome options
-        chrome_options = webdriver.ChromeOptions()
-        chrome_options.add_argument("--headless")
-        chrome_options.add_argument("--disable-gpu")
-        chrome_options.add_argument("--no-sandbox")
-        chrome_options.add_argument("--disable-dev-shm-usage")
-        chrome_options.add_argument("--disable-logging")
-        chrome_options.add_argument("--log-level=3")
-        chrome_options.add_argument("--silent")
-        chrome_options.add_argument("--disable-extensions")
-        chrome_options.add_argument("--disable-images")
-        chrome_options.add_argument("--disable-blink-features=AutomationControlled")
-        chrome_options.add_argument("--disable-dev-shm-usage")
-        chrome_options.add_experimental_option('excludeSwitches', ['enable-logging', 'enable-automation'])
-        chrome_options.add_experimental_option('useAutomationExtension', False)
-        chrome_options.add_argument("--disable-web-security")
-        chrome_options.add_argument("--allow-running-insecure-content")
-        chrome_options.add_argument("--disable-features=VizDisplayCompositor")
-        chrome_options.prefs = {"profile.managed_default_content_settings.images": 2}
-        chrome_options.add_argument(f"user-agent={random.choice(USER_AGENTS)}")
-        
-        driver = webdriver.Chrome(options=chrome_options)
-        driver.set_page_load_timeout(45)  # Increased timeout
-        
-        # Add stealth settings
-        driver.execute_script("Object.defineProperty(navigator, 'webdriver', {get: () => undefined})")
+        driver = create_selenium_driver()
         
+        rate_limiter.acquire(url)
         driver.get(url)
         
         # Wait for page to load
@@ -310,24 +333,9 @@ def scrape_product_selenium(url: str) -> Dict:
             EC.presence_of_element_located((By.TAG_NAME, "body"))
         )
         
-        # Extract data from page source
-        product_data = extract_product_data_from_html(driver.page_source, url)
-        product_data['url'] = url
-        product_data['status'] = 'success_selenium'
-        
-        return product_data
-        
-    except Exception as e:
-        return {
-            'url': url,
-            'name': f'ERROR: Selenium failed - {type(e).__name__}',
-            'brand': 'N/A',
-            'description': 'N/A',
-            'price': 'N/A',
-            'image_urls': '[]',
-            'extraction_method': 'Failed',
-            'status': 'error'
-        }
+        if retry_policy.looks_blocked(driver.title, driver.page_source):
+            raise retry_policy.BlockedError(f"Block page served for {url}")
+        return driver.page_source
     finally:
         if driver:
             try:
@@ -336,91 +344,110 @@ def scrape_product_selenium(url: str) -> Dict:
                 pass
 
 
-def worker(url_batch: List[str], temp_file_path: str):
-    """Worker process for scraping a batch of URLs."""
-    results = []
-    
-    for i, url in enumerate(url_batch):
-        print(f"  -> Processing {i+1}/{len(url_batch)}: {url}")
+def scrape_product_selenium(url: str) -> Dict:
+    """Fallback scraping using Selenium."""
+    try:
+        page_source = retry_policy.retry_call(fetch_page_source_selenium, url, policy=SELENIUM_RETRY_POLICY, url=url)
         
-        # Add random delay to avoid being blocked
-        time.sleep(random.uniform(2, 5))  # Increased delay
+        # Extract data from page source
+        product_data = extract_product_data_from_html(page_source, url)
+        product_data['url'] = url
+        product_data['status'] = 'success_selenium'
         
-        result = scrape_product_requests(url)
-        results.append(result)
+        return product_data
         
-        # Show success message
-        if result['status'].startswith('success'):
-            method = result.get('extraction_method', 'Unknown')
-            print(f"     ✓ Extracted: {result['name']} (via {method})")
-        else:
-            print(f"     ✗ Failed: {result['name']}")
+    except Exception as e:
+        return failed_product(url, f'ERROR: Selenium failed - {type(e).__name__}', retry_policy.classify_error(e))
+
+
+def scrape_product(url: str) -> Dict:
+    """Supervised task: scrape a single product URL and report the outcome."""
+    supervisor.beat()
     
-    # Save results to temporary file
-    if results:
-        df = pd.DataFrame(results)
-        df.to_csv(temp_file_path, index=False)
+    # Politeness is handled by the shared rate limiter inside the scrape functions
+    result = scrape_product_requests(url)
+    
+    # Show success message
+    if result['status'].startswith('success'):
+        method = result.get('extraction_method', 'Unknown')
+        print(f"     ✓ Extracted: {result['name']} (via {method})")
+    else:
+        print(f"     ✗ Failed: {result['name']}")
+    return result
+
+
+def scrape_products(urls: List[str], processes: int) -> List[Dict]:
+    """Scrapes urls on supervised workers and records each outcome in the failure store."""
+    all_results = []
+    crawl = supervisor.Supervisor(scrape_product, processes)
+    for i, (url, result) in enumerate(crawl.run(urls)):
+        print(f"  -> Finished {i+1}/{len(urls)}: {url}")
+        if result is None:
+            result = failed_product(url, 'ERROR: Worker stalled', retry_policy.TRANSIENT)
+        if result['status'] == 'error':
+            failure_store.record_failure(url, 'product', result['error_class'], result['name'])
+        else:
+            failure_store.record_success(url, 'product')
+        all_results.append(result)
+    return all_results
 
 
-def main():
-    """Main function to orchestrate the scraping process."""
+def main(retry_failed: bool = False, processes: int = PROCESS_COUNT):
+    """
+    Main function to orchestrate the scraping process. With retry_failed, only the
+    product URLs from the failure store that are due are scraped, and their rows
+    replace the old ones in OUTPUT_CSV.
+    """
     print("🚀 Starting Zalando Product Scraper...")
     
-    # Read URLs from input file
-    try:
-        df_urls = pd.read_csv(INPUT_CSV)
-        if URL_COLUMN not in df_urls.columns:
-            print(f"❌ Column '{URL_COLUMN}' not found in {INPUT_CSV}")
-            print(f"Available columns: {list(df_urls.columns)}")
+    if retry_failed:
+        urls = [failure['entity'] for failure in failure_store.get_eligible(['product'])]
+        print(f"🔁 Found {len(urls)} failed URLs due for a retry")
+        if not urls:
+            failure_store.print_summary()
             return
+    else:
+        # Read URLs from input file
+        try:
+            input_columns = csv_columns(INPUT_CSV)
+            if URL_COLUMN not in input_columns:
+                print(f"❌ Column '{URL_COLUMN}' not found in {INPUT_CSV}")
+                print(f"Available columns: {input_columns}")
+                return
             
-        urls = df_urls[URL_COLUMN].dropna().unique().tolist()
-        print(f"📋 Found {len(urls)} unique URLs to process")
+            df_urls = read_csv(INPUT_CSV, SCRAPER_OUTPUT_SCHEMA, columns=[URL_COLUMN])
+            urls = df_urls[URL_COLUMN].dropna().unique().tolist()
+            print(f"📋 Found {len(urls)} unique URLs to process")
         
-    except FileNotFoundError:
-        print(f"❌ Input file '{INPUT_CSV}' not found")
-        return
-    except Exception as e:
-        print(f"❌ Error reading input file: {e}")
-        return
-    
-    # Split URLs into batches for multiprocessing
-    url_chunks = [urls[i::PROCESS_COUNT] for i in range(PROCESS_COUNT)]
-    temp_files = [f"temp_worker_{i}.csv" for i in range(PROCESS_COUNT)]
-    
-    # Clean up any existing temp files
-    for temp_file in temp_files:
-        if os.path.exists(temp_file):
-            os.remove(temp_file)
-    
-    print(f"🔧 Starting {PROCESS_COUNT} worker processes...")
+        except FileNotFoundError:
+            print(f"❌ Input file '{INPUT_CSV}' not found")
+            return
+        except Exception as e:
+            print(f"❌ Error reading input file: {e}")
+            return
     
-    # Run workers in parallel
-    with Pool(PROCESS_COUNT) as pool:
-        pool.starmap(worker, zip(url_chunks, temp_files))
+    # Pick up any robots.txt Crawl-delay before the workers start
+    if urls:
+        rate_limiter.load_crawl_delay(urls[0])
+    retry_policy.reset_stats()
     
-    # Combine results from all workers
-    print("📊 Combining results from all workers...")
-    all_results = []
+    print(f"🔧 Starting {processes} supervised worker processes...")
     
-    for temp_file in temp_files:
-        if os.path.exists(temp_file):
-            try:
-                df = pd.read_csv(temp_file)
-                all_results.append(df)
-                os.remove(temp_file)
-            except Exception as e:
-                print(f"⚠️  Error reading {temp_file}: {e}")
+    # Run workers in parallel; a hung browser or worker is killed and its URL requeued
+    all_results = scrape_products(urls, processes)
     
     if all_results:
-        # Combine all dataframes
-        final_df = pd.concat(all_results, ignore_index=True)
+        # Combine all results
+        final_df = pd.DataFrame(all_results)
         
         # Add summary columns
-        final_df = final_df.reindex(columns=[
-            'url', 'name', 'brand', 'description', 'price', 'image_urls', 
-            'extraction_method', 'status'
-        ])
+        final_df = final_df.reindex(columns=OUTPUT_COLUMNS)
+        
+        # A retry run only covers the failed URLs, so merge them over the previous results
+        if retry_failed and os.path.exists(OUTPUT_CSV):
+            previous_df = read_csv(OUTPUT_CSV, OUTPUT_SCHEMA)
+            previous_df = previous_df[~previous_df['url'].isin(final_df['url'])]
+            final_df = pd.concat([previous_df, final_df], ignore_index=True)
         
         # Save final results
         final_df.to_csv(OUTPUT_CSV, index=False)
@@ -440,10 +467,17 @@ def main():
         print(f"\n📊 Extraction methods used:")
         for method, count in method_counts.items():
             print(f"   {method}: {count}")
+        
+        retry_policy.report()
+        failure_store.print_summary()
             
     else:
         print("❌ No results to save")
 
 
 if __name__ == "__main__":
-    main() 
\ No newline at end of file
+    # `python product_scraper.py retry-failed [processes]` only re-scrapes stored failures that are due
+    if len(sys.argv) > 1 and sys.argv[1] == 'retry-failed':
+        main(retry_failed=True, processes=int(sys.argv[2]) if len(sys.argv) > 2 else RETRY_PROCESS_COUNT)
+    else:
+        main() 
\ No newline at end of file
@@ -0,0 +1,200 @@
+"""
+Cross-process token-bucket rate limiter shared by all crawlers.
+
+Every worker consults the same small SQLite file before it sends a request, so
+adding processes never pushes the request rate for a host above its configured
+budget. Blocks signalled by the site (Retry-After) and the robots.txt
+Crawl-delay are stored in the same table and apply to every process.
+"""
+import random
+import sqlite3
+import time
+from email.utils import parsedate_to_datetime
+from typing import Optional
+from urllib.parse import urlparse
+from urllib.robotparser import RobotFileParser
+
+import supervisor
+
+STATE_DB = 'crawler_state.db'
+
+# Sustained requests per second and burst size per host
+HOST_BUDGETS = {
+    'en.zalando.de': {'rate': 0.5, 'burst': 2},
+}
+DEFAULT_BUDGET = {'rate': 0.5, 'burst': 1}
+
+# Extra random wait so workers released at the same time don't fire in lockstep
+JITTER_SECONDS = 0.25
+
+# Used when a 429/503 arrives without a usable Retry-After header
+DEFAULT_RETRY_AFTER = 60
+
+# Long waits are slept in slices so supervised workers keep sending heartbeats
+MAX_SLEEP_SLICE = 5
+
+
+def _connect(db_path: str = STATE_DB) -> sqlite3.Connection:
+    """Open the shared state database, creating the bucket table if needed."""
+    conn = sqlite3.connect(db_path, timeout=30, isolation_level=None)
+    conn.execute("PRAGMA journal_mode=WAL")
+    conn.execute("""
+        CREATE TABLE IF NOT EXISTS rate_buckets (
+            host TEXT PRIMARY KEY,
+            tokens REAL NOT NULL,
+            updated_at REAL NOT NULL,
+            blocked_until REAL NOT NULL DEFAULT 0,
+            crawl_delay REAL NOT NULL DEFAULT 0
+        )
+    """)
+    return conn
+
+
+def get_host(url_or_host: str) -> str:
+    """Returns the host of a URL, or the value itself if it is already a host."""
+    return urlparse(url_or_host).netloc or url_or_host
+
+
+def get_budget(host: str, crawl_delay: float = 0) -> dict:
+    """Returns the rate/burst budget for a host, tightened by any crawl-delay."""
+    budget = dict(HOST_BUDGETS.get(host, DEFAULT_BUDGET))
+    if crawl_delay > 0:
+        budget['rate'] = min(budget['rate'], 1.0 / crawl_delay)
+    return budget
+
+
+def _try_take(conn: sqlite3.Connection, host: str) -> float:
+    """
+    Refills the host bucket and takes one token if available.
+    Returns 0 on success, otherwise the number of seconds to wait before retrying.
+    """
+    now = time.time()
+    conn.execute("BEGIN IMMEDIATE")
+    try:
+        row = conn.execute(
+            "SELECT tokens, updated_at, blocked_until, crawl_delay FROM rate_buckets WHERE host = ?",
+            (host,)
+        ).fetchone()
+        if row is None:
+            tokens, updated_at, blocked_until, crawl_delay = get_budget(host)['burst'], now, 0.0, 0.0
+        else:
+            tokens, updated_at, blocked_until, crawl_delay = row
+
+        budget = get_budget(host, crawl_delay)
+        if blocked_until > now:
+            wait = blocked_until - now
+        else:
+            tokens = min(budget['burst'], tokens + (now - updated_at) * budget['rate'])
+            if tokens >= 1:
+                tokens -= 1
+                wait = 0.0
+            else:
+                wait = (1 - tokens) / budget['rate']
+
+        conn.execute(
+            "INSERT OR REPLACE INTO rate_buckets (host, tokens, updated_at, blocked_until, crawl_delay) VALUES (?, ?, ?, ?, ?)",
+            (host, tokens, now, blocked_until, crawl_delay)
+        )
+        conn.execute("COMMIT")
+        return wait
+    except Exception:
+        conn.execute("ROLLBACK")
+        raise
+
+
+def acquire(url_or_host: str, db_path: str = STATE_DB) -> float:
+    """
+    Blocks until the shared budget allows one more request to the host.
+    Returns the number of seconds spent waiting.
+    """
+    host = get_host(url_or_host)
+    waited = 0.0
+    conn = _connect(db_path)
+    try:
+        while True:
+            wait = _try_take(conn, host)
+            if wait <= 0:
+                return waited
+            wait = min(wait, MAX_SLEEP_SLICE) + random.uniform(0, JITTER_SECONDS)
+            time.sleep(wait)
+            waited += wait
+            supervisor.beat()
+    finally:
+        conn.close()
+
+
+def penalize(url_or_host: str, seconds: float, db_path: str = STATE_DB):
+    """Blocks all requests to the host, from every process, for the given number of seconds."""
+    host = get_host(url_or_host)
+    blocked_until = time.time() + seconds
+    conn = _connect(db_path)
+    try:
+        conn.execute("BEGIN IMMEDIATE")
+        conn.execute(
+            "INSERT OR IGNORE INTO rate_buckets (host, tokens, updated_at) VALUES (?, 0, ?)",
+            (host, time.time())
+        )
+        conn.execute(
+            "UPDATE rate_buckets SET tokens = 0, blocked_until = MAX(blocked_until, ?) WHERE host = ?",
+            (blocked_until, host)
+        )
+        conn.execute("COMMIT")
+    finally:
+        conn.close()
+    print(f"  ⏸️ Pausing all requests to {host} for {seconds:.0f}s")
+
+
+def parse_retry_after(value: Optional[str]) -> Optional[float]:
+    """Parses a Retry-After header given either as seconds or as an HTTP date."""
+    if not value:
+        return None
+    value = value.strip()
+    if value.isdigit():
+        return float(value)
+    try:
+        retry_at = parsedate_to_datetime(value)
+        return max(0.0, retry_at.timestamp() - time.time())
+    except (TypeError, ValueError):
+        return None
+
+
+def honour_retry_after(url: str, response, db_path: str = STATE_DB) -> float:
+    """Pauses the host for as long as the response's Retry-After asks (or a default)."""
+    seconds = parse_retry_after(response.headers.get('Retry-After'))
+    if seconds is None:
+        seconds = DEFAULT_RETRY_AFTER
+    penalize(url, seconds, db_path)
+    return seconds
+
+
+def load_crawl_delay(base_url: str, user_agent: str = '*', db_path: str = STATE_DB) -> float:
+    """
+    Reads the Crawl-delay for the host from robots.txt and stores it so every
+    process slows down to it. Returns the delay (0 when none is set or robots.txt
+    cannot be fetched).
+    """
+    parsed = urlparse(base_url)
+    host = parsed.netloc
+    delay = 0.0
+    try:
+        robots = RobotFileParser(f"{parsed.scheme}://{host}/robots.txt")
+        robots.read()
+        delay = float(robots.crawl_delay(user_agent) or 0)
+    except Exception as e:
+        print(f"  - Could not read robots.txt for {host}: {e}")
+
+    conn = _connect(db_path)
+    try:
+        conn.execute("BEGIN IMMEDIATE")
+        conn.execute(
+            "INSERT OR IGNORE INTO rate_buckets (host, tokens, updated_at) VALUES (?, ?, ?)",
+            (host, get_budget(host)['burst'], time.time())
+        )
+        conn.execute("UPDATE rate_buckets SET crawl_delay = ? WHERE host = ?", (delay, host))
+        conn.execute("COMMIT")
+    finally:
+        conn.close()
+
+    if delay:
+        print(f"  - Honouring robots.txt Crawl-delay of {delay:.1f}s for {host}")
+    return delay
@@ -0,0 +1,221 @@
+"""
+One retry policy for every crawler entry point, Selenium and HTTP alike.
+
+Errors are classified as transient, blocked, dead session or permanent. Retries
+use jittered exponential backoff, a circuit breaker pauses the whole crawler
+through the shared rate limiter when the block rate spikes, and retry counts and
+time lost per error class are aggregated across processes in the crawler state DB.
+"""
+import random
+import sqlite3
+import time
+from collections import deque
+from typing import Callable, Optional
+
+import requests
+from selenium.common.exceptions import (
+    InvalidSessionIdException, NoSuchWindowException, StaleElementReferenceException,
+    TimeoutException, WebDriverException
+)
+
+import rate_limiter
+import supervisor
+
+TRANSIENT = 'transient'
+BLOCKED = 'blocked'
+DEAD_SESSION = 'dead_session'
+PERMANENT = 'permanent'
+ERROR_CLASSES = [TRANSIENT, BLOCKED, DEAD_SESSION, PERMANENT]
+
+# Message fragments WebDriver uses when the browser behind a session is gone
+DEAD_SESSION_MARKERS = ['invalid session id', 'chrome not reachable', 'disconnected', 'no such window', 'session deleted']
+# urllib3 errors when the local chromedriver itself is gone, e.g. killed by the supervisor
+DRIVER_CONNECTION_MARKERS = ['connection refused', 'max retries exceeded']
+LOCAL_DRIVER_HOSTS = ["host='localhost'", "host='127.0.0.1'"]
+
+# Page title/source fragments that mean we were served a block or captcha page
+BLOCK_PAGE_MARKERS = ['access denied', 'captcha', 'px-captcha', 'request blocked', 'too many requests']
+
+
+class HTTPStatusError(Exception):
+    """Raised by HTTP fetchers for a non-200 response so the status can be classified."""
+    def __init__(self, status_code: int, url: str):
+        super().__init__(f"HTTP {status_code} for {url}")
+        self.status_code = status_code
+        self.url = url
+
+
+class BlockedError(Exception):
+    """Raised when a page was served but is a block or captcha page."""
+
+
+class RetryPolicy:
+    """Attempt budget, backoff shape and which error classes are worth retrying."""
+    def __init__(self, max_attempts=3, base_delay=1.0, max_delay=60.0, retry_on=(TRANSIENT, DEAD_SESSION)):
+        self.max_attempts = max_attempts
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.retry_on = tuple(retry_on)
+
+    def delay(self, attempt: int) -> float:
+        """Full-jitter exponential backoff: a random wait up to base * 2^attempt, capped."""
+        return random.uniform(0, min(self.max_delay, self.base_delay * 2 ** attempt))
+
+
+# Selenium pages are expensive, so only a couple of attempts; the browser is replaced on a dead session
+SELENIUM_POLICY = RetryPolicy(max_attempts=3, base_delay=2.0, max_delay=30.0, retry_on=(TRANSIENT, DEAD_SESSION))
+# Plain HTTP is cheap to retry, but a block is left to the Selenium fallback
+HTTP_POLICY = RetryPolicy(max_attempts=3, base_delay=1.0, max_delay=20.0, retry_on=(TRANSIENT,))
+
+
+def classify_error(error: Optional[BaseException] = None, status_code: Optional[int] = None) -> str:
+    """Maps an exception and/or HTTP status code to one of ERROR_CLASSES."""
+    if status_code is None and isinstance(error, HTTPStatusError):
+        status_code = error.status_code
+    if status_code is not None:
+        if status_code in (403, 429):
+            return BLOCKED
+        if status_code == 408 or status_code >= 500:
+            return TRANSIENT
+        if 400 <= status_code < 500:
+            return PERMANENT
+
+    if error is None:
+        return TRANSIENT
+    if isinstance(error, BlockedError):
+        return BLOCKED
+    message = str(error).lower()
+    if isinstance(error, (InvalidSessionIdException, NoSuchWindowException)) or any(m in message for m in DEAD_SESSION_MARKERS):
+        return DEAD_SESSION
+    if any(m in message for m in DRIVER_CONNECTION_MARKERS) and any(h in message for h in LOCAL_DRIVER_HOSTS):
+        return DEAD_SESSION
+    if isinstance(error, (TimeoutException, StaleElementReferenceException, WebDriverException,
+                          requests.RequestException, ConnectionError, TimeoutError)):
+        return TRANSIENT
+    if isinstance(error, (ValueError, KeyError, TypeError)):
+        return PERMANENT
+    return TRANSIENT
+
+
+def looks_blocked(title: str, page_source: str = '') -> bool:
+    """True if a served page looks like a block or captcha page rather than content."""
+    text = f"{title or ''} {(page_source or '')[:5000]}".lower()
+    return any(marker in text for marker in BLOCK_PAGE_MARKERS)
+
+
+class CircuitBreaker:
+    """
+    Watches the recent outcomes of this process. When the share of blocked
+    responses in the window crosses the threshold, the host is paused for every
+    process via rate_limiter.penalize, and the window starts over.
+    """
+    def __init__(self, window=20, min_samples=5, block_rate_threshold=0.3, cooldown=300):
+        self.outcomes = deque(maxlen=window)
+        self.min_samples = min_samples
+        self.block_rate_threshold = block_rate_threshold
+        self.cooldown = cooldown
+
+    def record(self, error_class: Optional[str], url: Optional[str] = None):
+        """Records an outcome (None for success) and trips the breaker if needed."""
+        self.outcomes.append(error_class == BLOCKED)
+        if len(self.outcomes) < self.min_samples:
+            return
+        block_rate = sum(self.outcomes) / len(self.outcomes)
+        if block_rate >= self.block_rate_threshold and url:
+            print(f"  🛑 Circuit breaker open: {block_rate:.0%} of recent requests blocked")
+            rate_limiter.penalize(url, self.cooldown)
+            self.outcomes.clear()
+
+
+BREAKER = CircuitBreaker()
+
+
+def _connect(db_path: str = rate_limiter.STATE_DB) -> sqlite3.Connection:
+    conn = sqlite3.connect(db_path, timeout=30, isolation_level=None)
+    conn.execute("PRAGMA journal_mode=WAL")
+    conn.execute("""
+        CREATE TABLE IF NOT EXISTS retry_stats (
+            error_class TEXT PRIMARY KEY,
+            retries INTEGER NOT NULL DEFAULT 0,
+            failures INTEGER NOT NULL DEFAULT 0,
+            seconds_lost REAL NOT NULL DEFAULT 0
+        )
+    """)
+    return conn
+
+
+def record_stats(error_class: str, retries: int = 0, failures: int = 0, seconds_lost: float = 0.0,
+                 db_path: str = rate_limiter.STATE_DB):
+    """Adds retry counts and time lost for an error class to the shared stats table."""
+    try:
+        conn = _connect(db_path)
+        try:
+            conn.execute("INSERT OR IGNORE INTO retry_stats (error_class) VALUES (?)", (error_class,))
+            conn.execute(
+                "UPDATE retry_stats SET retries = retries + ?, failures = failures + ?, seconds_lost = seconds_lost + ? WHERE error_class = ?",
+                (retries, failures, seconds_lost, error_class)
+            )
+        finally:
+            conn.close()
+    except sqlite3.Error as e:
+        print(f"  ⚠️ Could not record retry stats: {e}")
+
+
+def reset_stats(db_path: str = rate_limiter.STATE_DB):
+    """Clears the shared retry stats at the start of a run."""
+    conn = _connect(db_path)
+    try:
+        conn.execute("DELETE FROM retry_stats")
+    finally:
+        conn.close()
+
+
+def report(db_path: str = rate_limiter.STATE_DB):
+    """Prints retry counts, final failures and time lost per error class."""
+    conn = _connect(db_path)
+    try:
+        rows = conn.execute("SELECT error_class, retries, failures, seconds_lost FROM retry_stats ORDER BY seconds_lost DESC").fetchall()
+    finally:
+        conn.close()
+
+    print("\n🔁 RETRY SUMMARY:")
+    if not rows:
+        print("   No retries or failures recorded")
+        return
+    for error_class, retries, failures, seconds_lost in rows:
+        print(f"   {error_class}: {retries} retries, {failures} final failures, {seconds_lost:.0f}s lost")
+
+
+def retry_call(func: Callable, *args, policy: RetryPolicy = SELENIUM_POLICY, url: Optional[str] = None,
+               on_error: Optional[Callable] = None, **kwargs):
+    """
+    Calls func(*args, **kwargs), retrying errors whose class is in policy.retry_on
+    with jittered exponential backoff. on_error(error, error_class, attempt) is
+    called before each retry so the caller can repair state, e.g. replace a dead
+    browser. The last error is re-raised when attempts run out or the error is
+    not retryable.
+    """
+    for attempt in range(policy.max_attempts):
+        started = time.time()
+        try:
+            result = func(*args, **kwargs)
+            BREAKER.record(None, url)
+            return result
+        except Exception as e:
+            error_class = classify_error(e)
+            lost = time.time() - started
+            BREAKER.record(error_class, url)
+
+            if error_class not in policy.retry_on or attempt == policy.max_attempts - 1:
+                record_stats(error_class, failures=1, seconds_lost=lost)
+                raise
+
+            print(f"!!! {error_class} error ({type(e).__name__}). Retrying... ({attempt + 1}/{policy.max_attempts})")
+            if on_error:
+                on_error(e, error_class, attempt)
+            wait = policy.delay(attempt)
+            print(f"    - Backing off for {wait:.2f} seconds...")
+            supervisor.beat()
+            time.sleep(wait)
+            supervisor.beat()
+            record_stats(error_class, retries=1, seconds_lost=lost + wait)
@@ -5,7 +5,6 @@ import json
 import re
 from urllib.parse import urljoin, urlparse
 import time
-import random
 from typing import Dict, List, Optional, Tuple
 
 from selenium import webdriver
@@ -17,18 +16,27 @@ from selenium.webdriver.support.ui import WebDriverWait
 from selenium.webdriver.support import expected_conditions as EC
 from multiprocessing import Pool
 import os
+import sys
 import traceback
 import ctypes
 from ctypes import wintypes
 
-CLEANED_DATA_COLUMNS = [
-    'domain','country_code','url','sku','condition','gender','product_name','brand','description','manufacturer',
-    'badges','initial_price','final_price','discount','currency','inventory','is_sale','in_stock','delivery',
-    'root_category','category_tree','main_image','image_count','image_urls','rating','reviews_count','best_rating',
-    'worst_rating','rating_count','review_count','top_reviews','product_url','name','SKU','other_attributes','color',
-    'colors','sizes','similar_products','people_bought_together','related_products','has_sellback','brand_name',
-    'timestamp','input','discovery_input','error','error_code','warning','warning_code'
-]
+import failure_store
+import rate_limiter
+import retry_policy
+import supervisor
+from csv_reader import CLEANED_DATA_COLUMNS, SCRAPER_OUTPUT_SCHEMA, read_csv
+
+DEFAULT_CATEGORY_URL = "https://en.zalando.de/womens-clothing-underwear/"
+MAX_PAGES_PER_LEAF = 60
+MAX_PAGES_PER_BRAND = 50
+# retry-failed mode only re-drives a few dozen failures, so it gets its own small pool
+RETRY_PROCESSES = 2
+# Failed pages in a row after which a single-category crawl gives up on the listing
+MAX_CONSECUTIVE_PAGE_FAILURES = 3
+
+# Subcategory links live in the "Categories" navigation block of every listing page
+CATEGORY_NAV_SELECTOR = 'div[aria-label="Categories"] a[href]'
 
 # Manual overrides for brand slugs that are known to be incorrect on Zalando
 MANUAL_SLUG_OVERRIDES = {
@@ -479,6 +487,7 @@ def extract_from_category_page(driver) -> List[Dict]:
     # Wait for page to fully load before scrolling
     print("  - Waiting for page to fully load...")
     time.sleep(15)
+    supervisor.beat()
     
     # Wait for product elements to be present
     print("  - Waiting for product elements to load...")
@@ -494,6 +503,7 @@ def extract_from_category_page(driver) -> List[Dict]:
     
     # Additional wait for JavaScript to fully initialize
     time.sleep(5)
+    supervisor.beat()
     
     # Scroll to load all content
     total_products_found = scroll_to_load_content(driver)
@@ -919,6 +929,7 @@ def scroll_to_load_content(driver, timeout=10):
     for attempt in range(3):  # Max 3 attempts only
         driver.execute_script("window.scrollTo(0, document.body.scrollHeight);")
         time.sleep(0.5)  # Even faster
+        supervisor.beat()
         
         current_products = len(driver.find_elements(By.CSS_SELECTOR, "article"))
         
@@ -961,12 +972,15 @@ def scroll_to_load_content(driver, timeout=10):
 def scrape_page(driver, page_url: str) -> List[Dict]:
     """Scrape a single page using only category page extraction with robust scrolling"""
     try:
+        respectful_delay(page_url)
         driver.get(page_url)
         wait_for_dom_ready(driver)
+        supervisor.beat()
         
         # Additional wait for full page load
         print("  - Waiting for full page load...")
         time.sleep(10)  # Increased wait for full page load
+        supervisor.beat()
 
         # Only use category page extraction with robust scrolling
         print("  - Extracting products from category page...")
@@ -975,6 +989,9 @@ def scrape_page(driver, page_url: str) -> List[Dict]:
         if products:
             print(f"  ✅ SUCCESS: Found {len(products)} products from category page")
             return products
+        elif retry_policy.looks_blocked(driver.title, driver.page_source):
+            # An empty page that is really a block/captcha page must not end pagination silently
+            raise retry_policy.BlockedError(f"Block page served for {page_url}")
         else:
             print("  ❌ FAILURE: No products found on category page")
             return []
@@ -984,53 +1001,55 @@ def scrape_page(driver, page_url: str) -> List[Dict]:
         # Re-raise the exception so the retry wrapper can catch it
         raise
 
-def respectful_delay():
-    """Minimal delay for speed"""
-    time.sleep(random.uniform(0.1, 0.3))
+def build_page_url(base_url: str, page_num: int) -> str:
+    """Returns the listing URL for the given page number (page 1 is the bare URL)."""
+    if page_num <= 1:
+        return base_url
+    separator = '?' if '?' not in base_url else '&'
+    return f"{base_url}{separator}p={page_num}"
 
-def exponential_backoff(attempt, max_attempts=3):
-    """Calculates wait time for retries, e.g., 2s, 4s, 8s."""
-    wait_time = 2 ** attempt + random.uniform(0, 1)
-    print(f"    - Backing off for {wait_time:.2f} seconds...")
-    time.sleep(wait_time)
+def respectful_delay(url: str):
+    """Waits for the shared, cross-process rate limiter to allow a request to url's host"""
+    rate_limiter.acquire(url)
 
-def scrape_page_with_retry(driver, page_url: str, max_retries=2) -> List[Dict]:
+def scrape_page_with_retry(driver, page_url: str, policy=retry_policy.SELENIUM_POLICY,
+                           context: Optional[Dict] = None,
+                           record_failure: bool = True) -> Tuple[List[Dict], object, Optional[str]]:
     """
-    Scrapes a single page with retries for transient errors
+    Scrapes a single page under the shared retry policy. Transient errors are
+    retried after a backoff, a dead browser session is replaced with a new driver.
+    A page that still fails goes to the failure store with `context`, unless the
+    caller records the whole listing instead (record_failure=False).
+    Returns the products, the driver the caller should keep using and the error
+    class of a page that still failed (None if it came back clean). A failed page
+    has no products but is not the end of the listing.
     """
-    for attempt in range(max_retries):
+    current = {'driver': driver}
+
+    def replace_dead_driver(error, error_class, attempt):
+        if error_class != retry_policy.DEAD_SESSION:
+            return
+        print("!!! Browser session crashed. Recreating driver...")
         try:
-            return scrape_page(driver, page_url)
-        except InvalidSessionIdException as e:
-            print(f"!!! Browser session crashed. Need to recreate driver. ({attempt + 1}/{max_retries})")
-            if attempt < max_retries - 1:
-                # Browser crashed completely - can't recover with same driver
-                print("  - Browser session is dead, need to recreate driver in main loop")
-                raise e  # Re-raise so main loop can recreate driver
-            else:
-                print("!!! Browser crash on final attempt, giving up on this page")
-                break
-        except (StaleElementReferenceException, TimeoutException) as e:
-            print(f"!!! Caught a transient error ({type(e).__name__}). Retrying... ({attempt + 1}/{max_retries})")
-            if attempt < max_retries - 1:
-                time.sleep(1)  # Brief pause before retry
-                try:
-                    print("  - Refreshing page to get a fresh DOM state...")
-                    driver.refresh()
-                    time.sleep(1)  # Give page time to load
-                except Exception as refresh_err:
-                    print(f"!!! Critical error during page refresh: {refresh_err}. Stopping retries for this page.")
-                    break
-        except Exception as e:
-            print(f"!!! An unexpected error occurred in scrape_page: {e}.")
-            if attempt < max_retries - 1:
-                print(f"Retrying... ({attempt + 1}/{max_retries})")
-                time.sleep(1)
-            else:
-                traceback.print_exc()
+            current['driver'].quit()
+        except Exception:
+            pass  # Driver might already be dead
+        current['driver'] = setup_driver()
 
-    print(f"!!! Failed to scrape page {page_url} after {max_retries} attempts.")
-    return []
+    try:
+        products = retry_policy.retry_call(
+            lambda: scrape_page(current['driver'], page_url),
+            policy=policy, url=page_url, on_error=replace_dead_driver
+        )
+        failure_store.record_success(page_url, 'category_page')
+    except Exception as e:
+        error_class = retry_policy.classify_error(e)
+        print(f"!!! Failed to scrape page {page_url} ({error_class}): {e}")
+        if record_failure:
+            failure_store.record_failure(page_url, 'category_page', error_class, e, context=context)
+        return [], current['driver'], error_class
+
+    return products, current['driver'], None
 
 def setup_driver():
     """
@@ -1055,6 +1074,8 @@ def setup_driver():
     try:
         service = ChromeService(ChromeDriverManager().install())
         driver = webdriver.Chrome(service=service, options=options)
+        # Let the supervisor kill this browser if it hangs
+        supervisor.register_browser(driver)
         
         # Set faster timeouts
         driver.set_page_load_timeout(30)
@@ -1072,6 +1093,7 @@ def get_brand_checkbox_info(driver, base_url):
     checkbox ID for every brand available.
     """
     try:
+        respectful_delay(base_url)
         driver.get(base_url)
         wait_for_dom_ready(driver)
 
@@ -1147,6 +1169,7 @@ def extract_brand_names_from_filter(driver, base_url):
     This is more reliable than trying to find links that may not exist.
     """
     try:
+        respectful_delay(base_url)
         driver.get(base_url)
         wait_for_dom_ready(driver)
 
@@ -1256,16 +1279,9 @@ def _brand_page_is_verified(driver, brand_name: str) -> bool:
     return False
 
 
-def log_failed_brand(brand_name: str, filename="failed_brands.txt"):
-    """Appends a failed brand name to the specified log file."""
-    try:
-        # Using a with statement ensures the file is properly closed.
-        # 'a' mode appends to the file, creating it if it doesn't exist.
-        with open(filename, "a", encoding="utf-8") as f:
-            f.write(f"{brand_name}\n")
-    except IOError as e:
-        # It's good practice to log that logging failed.
-        print(f"!!! CRITICAL: Could not write failed brand '{brand_name}' to log file '{filename}'. Reason: {e}")
+def log_failed_brand(brand_name: str, error_class=retry_policy.PERMANENT, error='', brand_info=None):
+    """Records a failed brand in the failure store so retry-failed mode can pick it up."""
+    failure_store.record_failure(brand_name, 'brand', error_class, error, context=brand_info)
 
 
 def create_brand_urls(base_url, brand_names):
@@ -1308,12 +1324,18 @@ def scrape_brand_pages(args):
     
     driver = setup_driver()
     brand_products, seen_skus = [], set()
+    # Error class and message of a page or error that cut the brand short
+    failure = None
     
     try:
         verified_url = None
         # Try each potential URL until one is verified
         for url_to_try in potential_urls:
-            driver.get(url_to_try)
+            try:
+                retry_policy.retry_call(load_page_source, driver, url_to_try, url=url_to_try)
+            except Exception as e:
+                print(f"    Could not load {url_to_try} ({retry_policy.classify_error(e)}): {e}")
+                continue
             time.sleep(1) # Allow for immediate redirects to settle
             # 1. Primary verification: Check the URL first. This is the fastest way to detect a bad slug.
             slug = url_to_try.strip('/').split('/')[-1]
@@ -1335,20 +1357,22 @@ def scrape_brand_pages(args):
 
         if not verified_url:
             print(f"!!! [PID {os.getpid()}, Brand: {brand_name}] FAILED TO VERIFY ANY URLS. Skipping.")
-            log_failed_brand(brand_name)
+            log_failed_brand(brand_name, error="No candidate URL could be verified", brand_info=brand_info)
             return []
 
         # Loop through pages for the verified brand
         for page_num in range(1, num_pages_per_brand + 1):
-            if page_num > 1:
-                separator = '?' if '?' not in verified_url else '&'
-                page_url = f"{verified_url}{separator}p={page_num}"
-            else:
-                page_url = verified_url
+            page_url = build_page_url(verified_url, page_num)
+            supervisor.beat()
             
             print(f"[PID {os.getpid()}, Brand: {brand_name}] Scraping page {page_num}: {page_url}")
-            products_on_page = scrape_page_with_retry(driver, page_url)
+            products_on_page, driver, error_class = scrape_page_with_retry(driver, page_url, record_failure=False)
             
+            if error_class:
+                # The rest of the brand is unknown, so the whole brand is left for a retry run
+                print(f"[PID {os.getpid()}, Brand: {brand_name}] Page {page_num} failed ({error_class}). Stopping.")
+                failure = (error_class, f"Page {page_num} failed: {page_url}")
+                break
             if not products_on_page:
                 # If it's the first page and we get nothing, the brand might be empty.
                 print(f"[PID {os.getpid()}, Brand: {brand_name}] No more products found. Stopping.")
@@ -1366,17 +1390,20 @@ def scrape_brand_pages(args):
             if new_products_count == 0 and page_num > 1:
                 print(f"[PID {os.getpid()}, Brand: {brand_name}] Page {page_num} contained only duplicate products. Stopping.")
                 break
-
-            # A shorter delay to increase scraping speed. Can be increased if rate-limiting issues occur.
-            time.sleep(random.uniform(1, 2.5))
             
     except Exception as e:
         print(f"[PID {os.getpid()}] A critical error occurred while scraping '{brand_name}': {e}")
         traceback.print_exc()
+        failure = (retry_policy.classify_error(e), e)
     finally:
         driver.quit()
         print(f"[PID {os.getpid()}] Finished brand: {brand_name}. Found {len(brand_products)} products.")
 
+    # Only a brand whose every page came back clean counts as done
+    if failure:
+        log_failed_brand(brand_name, failure[0], failure[1], brand_info=brand_info)
+    else:
+        failure_store.record_success(brand_name, 'brand')
     return brand_products
 
 def scrape_category_pages(category_url, max_pages=50, output_filename='zalando_underwear_category.csv'):
@@ -1390,50 +1417,37 @@ def scrape_category_pages(category_url, max_pages=50, output_filename='zalando_u
     
     # Prevent computer from sleeping during scraping
     prevent_sleep()
+    rate_limiter.load_crawl_delay(category_url)
+    retry_policy.reset_stats()
     
     driver = setup_driver()
     seen_skus = set()
     total_products = 0
     csv_initialized = False
+    failed_pages = 0
     
     try:
         for page_num in range(1, max_pages + 1):
             # Construct page URL
-            if page_num > 1:
-                separator = '?' if '?' not in category_url else '&'
-                page_url = f"{category_url}{separator}p={page_num}"
-            else:
-                page_url = category_url
+            page_url = build_page_url(category_url, page_num)
             
             print(f"\n📄 Scraping page {page_num}: {page_url}")
             
             # Health check before scraping each page
             driver = ensure_driver_alive(driver)
             
-            # Scrape the page with browser crash recovery
-            try:
-                products_on_page = scrape_page_with_retry(driver, page_url)
-            except Exception as e:
-                if "invalid session id" in str(e) or "InvalidSessionIdException" in str(e):
-                    print(f"   💥 Browser crashed on page {page_num}. Recreating driver...")
-                    try:
-                        driver.quit()
-                    except:
-                        pass  # Driver might already be dead
-                    
-                    driver = setup_driver()
-                    print(f"   🔄 Driver recreated. Retrying page {page_num}...")
-                    
-                    # Retry with new driver
-                    try:
-                        products_on_page = scrape_page_with_retry(driver, page_url)
-                    except Exception as retry_e:
-                        print(f"   ❌ Still failed after driver recreation: {retry_e}")
-                        products_on_page = []
-                else:
-                    print(f"   ❌ Unexpected error on page {page_num}: {e}")
-                    products_on_page = []
+            # Scrape the page; a crashed browser is recreated by the retry policy
+            products_on_page, driver, error_class = scrape_page_with_retry(driver, page_url)
             
+            if error_class:
+                # The failed page is in the failure store for retry-failed mode; the listing goes on
+                failed_pages += 1
+                if failed_pages >= MAX_CONSECUTIVE_PAGE_FAILURES:
+                    print(f"   ❌ {failed_pages} pages in a row failed. Stopping pagination at page {page_num}.")
+                    break
+                print(f"   ⚠️ Page {page_num} failed ({error_class}). Skipping it for a retry run.")
+                continue
+            failed_pages = 0
             if not products_on_page:
                 print(f"   ⚠️ No products found on page {page_num}. Stopping pagination.")
                 break
@@ -1481,9 +1495,6 @@ def scrape_category_pages(category_url, max_pages=50, output_filename='zalando_u
             if page_num % 5 == 0:
                 save_progress_checkpoint(page_num, total_products, output_filename)
             
-            # Faster delay between pages
-            time.sleep(random.uniform(0.5, 1.0))
-            
     except Exception as e:
         print(f"❌ Error during category scraping: {e}")
         traceback.print_exc()
@@ -1494,6 +1505,299 @@ def scrape_category_pages(category_url, max_pages=50, output_filename='zalando_u
         
     print(f"\n🎉 Category scraping complete! Found {total_products} unique products across {page_num} pages.")
     print(f"💾 All data saved to: {output_filename}")
+    retry_policy.report()
+    return total_products
+
+def extract_category_links(page_source: str, base_url: str) -> List[Dict]:
+    """
+    Extracts the subcategory links from the "Categories" navigation of a listing page.
+    Only listing pages on the same host are returned (product pages end in .html).
+    """
+    soup = BeautifulSoup(page_source, 'html.parser')
+    host = urlparse(base_url).netloc
+    links, seen_urls = [], set()
+
+    for link in soup.select(CATEGORY_NAV_SELECTOR):
+        url = urljoin(base_url, link['href']).split('?')[0]
+        if urlparse(url).netloc != host or not url.endswith('/') or url in seen_urls:
+            continue
+        seen_urls.add(url)
+        links.append({
+            'name': link.get_text(' ', strip=True),
+            'url': url,
+            'slug': url.rstrip('/').split('/')[-1]
+        })
+
+    return links
+
+def load_page_source(driver, url: str) -> str:
+    """Loads a page under the rate limiter and returns its source, raising on block pages"""
+    respectful_delay(url)
+    driver.get(url)
+    wait_for_dom_ready(driver)
+    supervisor.beat()
+    if retry_policy.looks_blocked(driver.title, driver.page_source):
+        raise retry_policy.BlockedError(f"Block page served for {url}")
+    return driver.page_source
+
+def discover_category_tree(driver, root_url: str, max_depth: int = 2) -> List[Dict]:
+    """
+    Builds the subcategory tree below root_url from the category navigation and
+    returns its leaves. A category is a leaf when its page links to no category
+    we have not already seen, or when max_depth is reached.
+    """
+    root_slug = root_url.rstrip('/').split('/')[-1]
+    queue = [{'name': root_slug, 'url': root_url, 'slug': root_slug, 'path': root_slug, 'depth': 0}]
+    visited = {root_url}
+    leaves = []
+
+    while queue:
+        node = queue.pop(0)
+        children = []
+        if node['depth'] < max_depth:
+            try:
+                page_source = retry_policy.retry_call(load_page_source, driver, node['url'], url=node['url'])
+                children = [link for link in extract_category_links(page_source, node['url'])
+                            if link['url'] not in visited]
+            except Exception as e:
+                print(f"  - Could not expand category {node['path']}: {e}")
+
+        if not children:
+            if node['depth'] > 0:
+                leaves.append(node)
+            continue
+
+        print(f"  - {node['path']}: found {len(children)} subcategories")
+        for child in children:
+            visited.add(child['url'])
+            child['path'] = f"{node['path']} > {child['name']}"
+            child['depth'] = node['depth'] + 1
+            queue.append(child)
+
+    if not leaves:
+        # No navigation found - fall back to crawling the root listing itself
+        print("  - No subcategories discovered, falling back to the root category")
+        leaves = [{'name': root_slug, 'url': root_url, 'slug': root_slug, 'path': root_slug, 'depth': 0}]
+
+    print(f"🌳 Discovered {len(leaves)} leaf categories below {root_url}")
+    return leaves
+
+def save_category_tree(leaves: List[Dict], filename='zalando_category_tree.json'):
+    """Save the discovered leaf categories so a run can be inspected or resumed"""
+    try:
+        with open(filename, 'w', encoding='utf-8') as f:
+            json.dump({'timestamp': pd.Timestamp.now().isoformat(), 'leaves': leaves}, f, indent=2)
+        print(f"   💾 Category tree saved to {filename}")
+    except Exception as e:
+        print(f"   ⚠️ Could not save category tree: {e}")
+
+def scrape_leaf_category(args):
+    """
+    Scrapes all pages of a single leaf category and tags every product with the
+    leaf it was listed under.
+    """
+    leaf, max_pages = args
+    print(f"[PID {os.getpid()}] Starting leaf category: {leaf['path']}")
+
+    driver = setup_driver()
+    leaf_products, seen_skus = [], set()
+    # Error class and message of a page or error that cut the leaf short
+    failure = None
+
+    try:
+        for page_num in range(1, max_pages + 1):
+            page_url = build_page_url(leaf['url'], page_num)
+            supervisor.beat()
+            print(f"[PID {os.getpid()}, Leaf: {leaf['slug']}] Scraping page {page_num}: {page_url}")
+            products_on_page, driver, error_class = scrape_page_with_retry(driver, page_url, record_failure=False)
+
+            if error_class:
+                # The rest of the leaf is unknown, so the whole leaf is left for a retry run
+                print(f"[PID {os.getpid()}, Leaf: {leaf['slug']}] Page {page_num} failed ({error_class}). Stopping.")
+                failure = (error_class, f"Page {page_num} failed: {page_url}")
+                break
+            if not products_on_page:
+                print(f"[PID {os.getpid()}, Leaf: {leaf['slug']}] No more products found. Stopping.")
+                break
+
+            new_products_count = 0
+            for product in products_on_page:
+                sku = product.get('sku', 'N/A')
+                if sku not in seen_skus:
+                    seen_skus.add(sku)
+                    product['crawl_category'] = leaf['slug']
+                    product['category_tree'] = leaf['path']
+                    leaf_products.append(product)
+                    new_products_count += 1
+
+            if new_products_count == 0 and page_num > 1:
+                print(f"[PID {os.getpid()}, Leaf: {leaf['slug']}] Page {page_num} contained only duplicate products. Stopping.")
+                break
+
+    except Exception as e:
+        print(f"[PID {os.getpid()}] A critical error occurred while scraping leaf '{leaf['path']}': {e}")
+        traceback.print_exc()
+        failure = (retry_policy.classify_error(e), e)
+    finally:
+        driver.quit()
+        print(f"[PID {os.getpid()}] Finished leaf: {leaf['path']}. Found {len(leaf_products)} products.")
+
+    # Only a leaf whose every page came back clean counts as done
+    if failure:
+        failure_store.record_failure(leaf['url'], 'leaf_category', failure[0], failure[1], context=leaf)
+    else:
+        failure_store.record_success(leaf['url'], 'leaf_category')
+    return leaf_products
+
+def scrape_category_tree(root_url, max_pages_per_leaf=MAX_PAGES_PER_LEAF, output_filename='zalando_underwear_category.csv', processes=4):
+    """
+    Discovers the leaf categories below root_url and crawls them concurrently,
+    deduplicating products across leaves by SKU and writing to CSV as each leaf finishes.
+    """
+    print(f"🌳 Starting category-tree scraping: {root_url}")
+    prevent_sleep()
+    rate_limiter.load_crawl_delay(root_url)
+    retry_policy.reset_stats()
+
+    driver = setup_driver()
+    try:
+        leaves = discover_category_tree(driver, root_url)
+    finally:
+        driver.quit()
+    save_category_tree(leaves)
+
+    seen_skus = set()
+    total_products = 0
+    csv_initialized = False
+
+    try:
+        # Leaves run on supervised workers: a hung browser or worker is killed and its leaf requeued
+        crawl = supervisor.Supervisor(scrape_leaf_category, processes, describe=lambda task: task[0]['path'])
+        tasks = [(leaf, max_pages_per_leaf) for leaf in leaves]
+        for (leaf, _), leaf_products in crawl.run(tasks):
+            if leaf_products is None:
+                print(f"   ❌ Leaf {leaf['path']} failed")
+                failure_store.record_failure(leaf['url'], 'leaf_category', retry_policy.TRANSIENT,
+                                             "Worker failed or stalled", context=leaf)
+                continue
+            # The worker itself recorded whether every page of the leaf came back clean
+
+            # A product listed under several leaves keeps the first leaf that reported it
+            new_products = []
+            for product in leaf_products:
+                sku = product.get('sku', 'N/A')
+                if sku not in seen_skus:
+                    seen_skus.add(sku)
+                    new_products.append(product)
+
+            if not new_products:
+                continue
+
+            try:
+                df_new = pd.DataFrame(new_products).reindex(columns=CLEANED_DATA_COLUMNS, fill_value='N/A')
+                mode = 'w' if not csv_initialized else 'a'
+                df_new.to_csv(output_filename, mode=mode, header=not csv_initialized, index=False)
+                csv_initialized = True
+                total_products += len(new_products)
+                print(f"   💾 Saved {len(new_products)} new products to CSV (total saved: {total_products})")
+            except Exception as e:
+                print(f"   ❌ Error writing to CSV: {e}")
+
+    except Exception as e:
+        print(f"❌ Error during category-tree scraping: {e}")
+        traceback.print_exc()
+    finally:
+        allow_sleep()
+
+    print(f"\n🎉 Category-tree scraping complete! Found {total_products} unique products across {len(leaves)} leaf categories.")
+    print(f"💾 All data saved to: {output_filename}")
+    retry_policy.report()
+    return total_products
+
+def retry_failure_task(failure: Dict) -> List[Dict]:
+    """Re-drives one stored failure (leaf, listing page or brand) and returns the products it yields."""
+    stage, entity = failure['stage'], failure['entity']
+    context = failure['context'] or {}
+
+    if stage == 'leaf_category':
+        leaf = context or {'name': entity, 'url': entity, 'slug': entity.rstrip('/').split('/')[-1], 'path': entity}
+        return scrape_leaf_category((leaf, MAX_PAGES_PER_LEAF))
+
+    if stage == 'brand':
+        brand_options = [context] if context.get('urls') else create_brand_urls(DEFAULT_CATEGORY_URL, [entity])
+        if not brand_options:
+            return []
+        return scrape_brand_pages((brand_options[0], MAX_PAGES_PER_BRAND, 0))
+
+    if stage == 'category_page':
+        driver = setup_driver()
+        try:
+            products, driver, _ = scrape_page_with_retry(driver, entity, context=context or None)
+        finally:
+            driver.quit()
+        if context.get('slug'):
+            for product in products:
+                product['crawl_category'] = context['slug']
+                product['category_tree'] = context['path']
+        return products
+
+    print(f"   ⚠️ Unknown failure stage '{stage}' for {entity}")
+    return []
+
+def retry_failed_crawl(output_filename='zalando_underwear_category.csv', processes=RETRY_PROCESSES):
+    """
+    Re-drives the crawl failures that are due for another attempt and appends any
+    new products to the existing CSV. Nothing that already succeeded is crawled again.
+    """
+    print(f"🔁 Retrying failed crawl work from {failure_store.FAILURE_DB}")
+    failure_store.import_failed_brands_file()
+    failures = failure_store.get_eligible(['leaf_category', 'category_page', 'brand'])
+    if not failures:
+        print("   Nothing is due for a retry")
+        failure_store.print_summary()
+        return 0
+
+    print(f"   {len(failures)} failures eligible for retry")
+    prevent_sleep()
+    retry_policy.reset_stats()
+
+    seen_skus = set()
+    if os.path.exists(output_filename):
+        seen_skus = set(read_csv(output_filename, SCRAPER_OUTPUT_SCHEMA, columns=['sku'])['sku'].astype(str))
+    total_products = 0
+
+    try:
+        crawl = supervisor.Supervisor(retry_failure_task, processes,
+                                      describe=lambda failure: f"{failure['stage']} {failure['entity']}")
+        for failure, products in crawl.run(failures):
+            if products is None:
+                print(f"   ❌ Retry of {failure['stage']} {failure['entity']} failed")
+                failure_store.record_failure(failure['entity'], failure['stage'], retry_policy.TRANSIENT,
+                                             "Worker failed or stalled")
+                continue
+
+            new_products = []
+            for product in products:
+                sku = str(product.get('sku', 'N/A'))
+                if sku not in seen_skus:
+                    seen_skus.add(sku)
+                    new_products.append(product)
+            if not new_products:
+                continue
+
+            try:
+                df_new = pd.DataFrame(new_products).reindex(columns=CLEANED_DATA_COLUMNS, fill_value='N/A')
+                df_new.to_csv(output_filename, mode='a', header=not os.path.exists(output_filename), index=False)
+                total_products += len(new_products)
+                print(f"   💾 Saved {len(new_products)} recovered products to CSV (total recovered: {total_products})")
+            except Exception as e:
+                print(f"   ❌ Error writing to CSV: {e}")
+    finally:
+        allow_sleep()
+
+    print(f"\n🎉 Retry run complete! Recovered {total_products} new products.")
+    failure_store.print_summary()
+    retry_policy.report()
     return total_products
 
 def analyze_csv_quality(filename):
@@ -1503,7 +1807,7 @@ def analyze_csv_quality(filename):
             print(f"❌ CSV file {filename} not found")
             return
             
-        df = pd.read_csv(filename)
+        df = read_csv(filename, SCRAPER_OUTPUT_SCHEMA, columns=['final_price', 'name', 'brand_name', 'sizes'])
         total_products = len(df)
         
         if total_products == 0:
@@ -1703,14 +2007,26 @@ def extract_brand_from_json_data(data):
 
 if __name__ == "__main__":
     # Configuration
-    category_url = "https://en.zalando.de/womens-clothing-underwear/"
+    category_url = DEFAULT_CATEGORY_URL
     max_pages = 500 # Adjust based on how deep you want to go
     output_filename = 'zalando_underwear_category.csv'
+    use_category_tree = True # Crawl discovered leaf categories in parallel instead of the root listing
+    max_pages_per_leaf = MAX_PAGES_PER_LEAF
+    leaf_processes = 4
+
+    # `python scraper.py retry-failed [processes]` only re-drives stored failures that are due
+    if len(sys.argv) > 1 and sys.argv[1] == 'retry-failed':
+        retry_processes = int(sys.argv[2]) if len(sys.argv) > 2 else RETRY_PROCESSES
+        retry_failed_crawl(output_filename, retry_processes)
+        sys.exit(0)
     
     print("🚀 ZALANDO CATEGORY SCRAPER - ROBUST BULK EXTRACTION")
     print("=" * 70)
     print(f"Target Category: {category_url}")
-    print(f"Max Pages: {max_pages}")
+    if use_category_tree:
+        print(f"Mode: Category tree ({leaf_processes} processes, max {max_pages_per_leaf} pages per leaf)")
+    else:
+        print(f"Max Pages: {max_pages}")
     print(f"Output File: {output_filename}")
     print("")
     print("🛡️  NEW FEATURES:")
@@ -1727,7 +2043,10 @@ if __name__ == "__main__":
     print("=" * 70)
     
     # Scrape the entire category with continuous CSV writing
-    total_products = scrape_category_pages(category_url, max_pages, output_filename)
+    if use_category_tree:
+        total_products = scrape_category_tree(category_url, max_pages_per_leaf, output_filename, leaf_processes)
+    else:
+        total_products = scrape_category_pages(category_url, max_pages, output_filename)
     
     if total_products > 0:
         print(f"\n✅ SUCCESS: Continuously saved {total_products} products to '{output_filename}'")
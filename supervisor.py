@@ -0,0 +1,221 @@
+"""
+Supervisor for long crawls.
+
+Tasks run on worker processes that report heartbeats through shared memory.
+When a worker goes quiet past its deadline the supervisor first kills its
+browser (which usually lets the worker recover through the retry policy), and
+if the worker stays silent it kills the whole process, puts its current task
+back on the queue and starts a replacement. Every stall is appended to
+STALL_LOG so overnight runs can be reviewed.
+"""
+import json
+import multiprocessing as mp
+import queue
+import time
+import traceback
+from collections import deque
+from typing import Callable, Iterable, Iterator, Optional
+
+import psutil
+
+# Seconds without a heartbeat before a worker counts as stalled
+HEARTBEAT_DEADLINE = 180
+# Extra seconds a worker gets to recover after its browser was killed
+BROWSER_KILL_GRACE = 60
+# Times a task is handed out before it is given up on
+MAX_TASK_ATTEMPTS = 3
+STALL_LOG = 'stall_incidents.log'
+
+# Heartbeat state of the current process, set only inside supervised workers
+_last_beat = None
+_browser_pids = None
+_worker_slot = None
+
+
+def beat():
+    """Reports that this worker is alive and making progress. No-op outside a supervised worker."""
+    if _last_beat is not None:
+        _last_beat[_worker_slot] = time.time()
+
+
+def register_browser(driver):
+    """Records the chromedriver behind a Selenium driver so a hung browser can be killed."""
+    if _browser_pids is None:
+        return
+    try:
+        _browser_pids[_worker_slot] = driver.service.process.pid
+    except AttributeError:
+        pass
+    beat()
+
+
+def kill_process_tree(pid: int):
+    """Kills a process and all of its children (e.g. chromedriver and its Chrome processes)."""
+    try:
+        parent = psutil.Process(pid)
+        for proc in parent.children(recursive=True) + [parent]:
+            try:
+                proc.kill()
+            except psutil.NoSuchProcess:
+                pass
+    except psutil.NoSuchProcess:
+        pass
+
+
+def log_stall(slot: int, pid: int, task_label: str, silent_for: float, action: str, filename=STALL_LOG):
+    """Appends a stall incident as one JSON line and prints it."""
+    incident = {
+        'timestamp': time.strftime('%Y-%m-%dT%H:%M:%S'),
+        'worker': slot,
+        'pid': pid,
+        'task': task_label,
+        'silent_for': round(silent_for, 1),
+        'action': action
+    }
+    print(f"  🐕 Stall on worker {slot} (PID {pid}, {task_label}): silent {silent_for:.0f}s -> {action}")
+    try:
+        with open(filename, 'a', encoding='utf-8') as f:
+            f.write(json.dumps(incident) + '\n')
+    except IOError as e:
+        print(f"!!! Could not write stall incident to '{filename}'. Reason: {e}")
+
+
+def _worker_main(slot, func, inbox, outbox, last_beat, browser_pids):
+    """Worker loop: run one task at a time from the inbox until told to stop."""
+    global _last_beat, _browser_pids, _worker_slot
+    _last_beat, _browser_pids, _worker_slot = last_beat, browser_pids, slot
+
+    while True:
+        item = inbox.get()
+        if item is None:
+            break
+        task_index, task = item
+        beat()
+        try:
+            result = func(task)
+            outbox.put(('done', slot, task_index, result))
+        except Exception as e:
+            traceback.print_exc()
+            outbox.put(('error', slot, task_index, repr(e)))
+        browser_pids[slot] = 0
+
+
+class Supervisor:
+    """
+    Runs func over tasks on `processes` supervised workers and yields
+    (task, result) pairs in completion order. A task that raised or was given up
+    on after MAX_TASK_ATTEMPTS stalls yields None as its result.
+    """
+    def __init__(self, func: Callable, processes: int = 4, deadline: float = HEARTBEAT_DEADLINE,
+                 max_attempts: int = MAX_TASK_ATTEMPTS, describe: Optional[Callable] = None):
+        self.func = func
+        self.processes = processes
+        self.deadline = deadline
+        self.max_attempts = max_attempts
+        self.describe = describe or (lambda task: str(task)[:80])
+
+    def _start_worker(self, slot):
+        self.inboxes[slot] = mp.Queue()
+        self.last_beat[slot] = time.time()
+        self.browser_pids[slot] = 0
+        proc = mp.Process(
+            target=_worker_main,
+            args=(slot, self.func, self.inboxes[slot], self.outbox, self.last_beat, self.browser_pids),
+            daemon=True
+        )
+        proc.start()
+        self.workers[slot] = proc
+
+    def _replace_worker(self, slot, action, silent_for):
+        """Kill a stalled or dead worker, requeue its task and start a fresh one."""
+        proc = self.workers[slot]
+        task_index = self.in_flight.pop(slot)
+        log_stall(slot, proc.pid, self.describe(self.tasks[task_index]), silent_for, action)
+        if self.browser_pids[slot]:
+            kill_process_tree(self.browser_pids[slot])
+        kill_process_tree(proc.pid)
+        proc.join(timeout=10)
+        self.browser_killed_at.pop(slot, None)
+
+        if self.attempts[task_index] < self.max_attempts:
+            self.pending.appendleft(task_index)
+        else:
+            print(f"  ❌ Giving up on {self.describe(self.tasks[task_index])} after {self.attempts[task_index]} attempts")
+            self.given_up.append(task_index)
+        self._start_worker(slot)
+
+    def _check_workers(self):
+        now = time.time()
+        for slot in list(self.in_flight):
+            proc = self.workers[slot]
+            silent_for = now - self.last_beat[slot]
+
+            if not proc.is_alive():
+                self._replace_worker(slot, f"worker died (exit code {proc.exitcode}), requeued", silent_for)
+                continue
+
+            killed_at = self.browser_killed_at.get(slot)
+            if killed_at and self.last_beat[slot] > killed_at:
+                # The worker recovered after losing its browser
+                del self.browser_killed_at[slot]
+                continue
+            if silent_for < self.deadline:
+                continue
+
+            if killed_at is None and self.browser_pids[slot]:
+                log_stall(slot, proc.pid, self.describe(self.tasks[self.in_flight[slot]]), silent_for, "killed browser")
+                kill_process_tree(self.browser_pids[slot])
+                self.browser_pids[slot] = 0
+                self.browser_killed_at[slot] = now
+            elif killed_at is None or now - killed_at >= BROWSER_KILL_GRACE:
+                self._replace_worker(slot, "killed worker, requeued task", silent_for)
+
+    def run(self, tasks: Iterable) -> Iterator:
+        self.tasks = list(tasks)
+        self.pending = deque(range(len(self.tasks)))
+        self.attempts = [0] * len(self.tasks)
+        self.given_up = []
+        self.in_flight = {}
+        self.browser_killed_at = {}
+        self.outbox = mp.Queue()
+        self.last_beat = mp.Array('d', self.processes)
+        self.browser_pids = mp.Array('i', self.processes)
+        self.inboxes = [None] * self.processes
+        self.workers = [None] * self.processes
+
+        for slot in range(self.processes):
+            self._start_worker(slot)
+
+        try:
+            while self.pending or self.in_flight:
+                # Hand out work to idle workers
+                for slot in range(self.processes):
+                    if slot not in self.in_flight and self.pending:
+                        task_index = self.pending.popleft()
+                        self.attempts[task_index] += 1
+                        self.in_flight[slot] = task_index
+                        self.last_beat[slot] = time.time()
+                        self.inboxes[slot].put((task_index, self.tasks[task_index]))
+
+                try:
+                    status, slot, task_index, payload = self.outbox.get(timeout=5)
+                    if self.in_flight.get(slot) == task_index:
+                        del self.in_flight[slot]
+                        self.browser_killed_at.pop(slot, None)
+                        yield self.tasks[task_index], (payload if status == 'done' else None)
+                except queue.Empty:
+                    pass
+
+                self._check_workers()
+
+            for task_index in self.given_up:
+                yield self.tasks[task_index], None
+        finally:
+            for slot, proc in enumerate(self.workers):
+                if proc is not None and proc.is_alive():
+                    self.inboxes[slot].put(None)
+            for proc in self.workers:
+                if proc is not None:
+                    proc.join(timeout=10)
+                    if proc.is_alive():
+                        kill_process_tree(proc.pid)